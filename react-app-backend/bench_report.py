@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+bench_report.py
+
+Benchmark magiclamp_report.py on synthetic categories x genomes heatmaps.
+
+For every (size, density) case a heatmap CSV of random counts is written
+once (cached in --work-dir), then each stage of the report is timed on
+its own:
+
+  load        load_heatmap_csv()
+  transform   the clustering transform (log1p by default)
+  linkage     category and genome ordering (_cluster_order on both axes)
+  dotplot     build_dotplot() figure (skipped, like the report, past
+              DOTPLOT_MAX_POINTS non-zero cells)
+  heatmap     build_clustered_heatmap() figure (includes its own clustering)
+  serialize   both figures and the raw table to HTML
+  report      build_html_report() end to end
+
+With --repeat N each stage keeps its fastest run. Every case runs in a
+fresh process so its peak RSS is its own; `stage_rss_mb` is the process
+high-water mark after each stage, which shows the stage that set the peak.
+Results (plus library versions and host) are printed as a table and
+saved as JSON.
+
+--compare BASELINE.json is the regression guard. It exits 1 if any case
+present in both runs:
+  - has a stage more than --max-slowdown times slower than the baseline
+    (and more than --min-seconds slower, so timer noise on tiny stages
+    never counts);
+  - writes more than --max-growth times the baseline output bytes;
+  - peaks more than --max-growth times the baseline RSS.
+Take the baseline on the same host before a change.
+
+Usage:
+    python bench_report.py -o before.json
+    python bench_report.py --sizes 300x20000 --densities 0.01 0.2 --repeat 3
+    python bench_report.py -o after.json --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_SIZES = ["50x100", "150x2000", "300x20000"]
+DEFAULT_DENSITIES = [0.02, 0.2]
+STAGES = ["load", "transform", "linkage", "dotplot", "heatmap", "serialize", "report"]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic heatmaps
+# ---------------------------------------------------------------------------
+def parse_size(text: str) -> tuple[int, int]:
+    """'300x20000' -> (300 categories, 20000 genomes)."""
+    rows, _, cols = text.lower().partition("x")
+    try:
+        size = int(rows), int(cols)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"size must look like 300x20000, not {text!r}")
+    if min(size) < 1:
+        raise argparse.ArgumentTypeError(f"size must be at least 1x1, not {text!r}")
+    return size
+
+
+def synthetic_heatmap(rows: int, cols: int, density: float, dest: Path, seed: int = 0) -> int:
+    """Write a heatmap CSV of random counts (1-9) in ~`density` of the cells.
+
+    Returns the number of non-zero cells.
+    """
+    rng = np.random.default_rng(seed)
+    values = np.where(rng.random((rows, cols)) < density, rng.integers(1, 10, (rows, cols)), 0)
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    with tmp.open("w", encoding="utf-8") as out:
+        out.write("X," + ",".join(f"genome_{j:06d}" for j in range(cols)) + "\n")
+        for i, row in enumerate(values):
+            out.write(f"category_{i:05d}," + ",".join(map(str, row.tolist())) + "\n")
+    tmp.replace(dest)
+    return int(np.count_nonzero(values))
+
+
+def case_name(rows: int, cols: int, density: float) -> str:
+    return f"{rows}x{cols}@{density:g}"
+
+
+# ---------------------------------------------------------------------------
+# One case
+# ---------------------------------------------------------------------------
+def _rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def run_case(csv_path: Path, repeat: int = 1, transform: str = "log1p") -> dict:
+    """Time every stage on one heatmap CSV; returns the case's result record."""
+    import magiclamp_report as report
+
+    stages: dict[str, float] = {}
+    stage_rss: dict[str, float] = {}
+    results: dict[str, object] = {}
+
+    def timed(stage: str, fn):
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            results[stage] = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        stages[stage] = round(best, 4)
+        stage_rss[stage] = _rss_mb()
+        return results[stage]
+
+    rss_start = _rss_mb()
+    df = timed("load", lambda: report.load_heatmap_csv(csv_path))
+    matrix = report._values(df)
+    transformed = timed("transform", lambda: report._cluster_transform(matrix, transform))
+    timed("linkage", lambda: (
+        report._cluster_order(transformed, axis=0),
+        report._cluster_order(transformed, axis=1),
+    ))
+    cells = report._nonzero_cells(df)
+    # Like the report, no dot plot past DOTPLOT_MAX_POINTS hits (stage time 0).
+    drawn = len(cells[2]) <= report.DOTPLOT_MAX_POINTS
+    dot_fig = timed("dotplot", lambda: report.build_dotplot(df, cells) if drawn else None)
+    heat_fig = timed("heatmap", lambda: report.build_clustered_heatmap(df, cluster_transform=transform))
+
+    def serialize() -> int:
+        size = len(heat_fig.to_html(include_plotlyjs=False, full_html=False))
+        if dot_fig is not None:
+            size += len(dot_fig.to_html(include_plotlyjs=False, full_html=False))
+        if df.size <= report.TABLE_MAX_CELLS:
+            frame = df.to_frame() if isinstance(df, report.SparseHeatmap) else df
+            size += len(frame.to_html(float_format=lambda v: f"{v:g}"))
+        return size
+
+    timed("serialize", serialize)
+    html = timed("report", lambda: report.build_html_report(
+        df, source_name=csv_path.name, cluster_transform=transform,
+        plotlyjs=report.plotly_bundle_name(),
+    ))
+
+    return {
+        "rows": df.shape[0],
+        "cols": df.shape[1],
+        "nnz": int(len(cells[2])),
+        "sparse": isinstance(df, report.SparseHeatmap),
+        "dotplot_drawn": drawn,
+        "stages": stages,
+        "output_bytes": len(html.encode("utf-8")),
+        "rss_start_mb": rss_start,
+        "stage_rss_mb": stage_rss,
+        "peak_rss_mb": _rss_mb(),
+    }
+
+
+def _run_case_isolated(csv_path: Path, repeat: int, transform: str) -> dict:
+    # A fresh interpreter per case, so RSS high-water marks don't carry over.
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_case, (csv_path, repeat, transform))
+
+
+# ---------------------------------------------------------------------------
+# Suite + comparison
+# ---------------------------------------------------------------------------
+def run_suite(
+    sizes: list[tuple[int, int]],
+    densities: list[float],
+    work_dir: Path,
+    repeat: int = 1,
+    transform: str = "log1p",
+    isolate: bool = True,
+    seed: int = 0,
+) -> dict:
+    import magiclamp_report as report
+    import pandas as pd
+    import plotly
+    import scipy
+
+    work_dir.mkdir(parents=True, exist_ok=True)
+    cases = []
+    for rows, cols in sizes:
+        for density in densities:
+            name = case_name(rows, cols, density)
+            csv_path = work_dir / f"bench-{rows}x{cols}-{density:g}-{seed}.heatmap.csv"
+            if not csv_path.exists():
+                synthetic_heatmap(rows, cols, density, csv_path, seed)
+            run = _run_case_isolated if isolate else run_case
+            record = {"name": name, "density": density, **run(csv_path, repeat, transform)}
+            cases.append(record)
+            print(_format_row(record), flush=True)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "versions": {
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scipy": scipy.__version__,
+            "plotly": plotly.__version__,
+        },
+        "settings": {
+            "repeat": repeat,
+            "transform": transform,
+            "isolate": isolate,
+            "seed": seed,
+            "sparse_min_cells": report.SPARSE_MIN_CELLS,
+            "sparse_max_density": report.SPARSE_MAX_DENSITY,
+        },
+        "cases": cases,
+    }
+
+
+def _format_row(record: dict) -> str:
+    stages = " ".join(f"{s}={record['stages'][s]:.2f}" for s in STAGES)
+    return (
+        f"{record['name']:>18}  {'sparse' if record['sparse'] else 'dense ':6}  {stages}  "
+        f"out={record['output_bytes'] / 1e6:.2f}MB  peak={record['peak_rss_mb']:.0f}MB"
+    )
+
+
+def compare(
+    current: dict,
+    baseline: dict,
+    max_slowdown: float = 1.25,
+    min_seconds: float = 0.05,
+    max_growth: float = 1.10,
+) -> list[str]:
+    """Regressions of `current` against `baseline`, one message each (empty = none)."""
+    base_cases = {case["name"]: case for case in baseline.get("cases", [])}
+    problems = []
+    for case in current.get("cases", []):
+        base = base_cases.get(case["name"])
+        if base is None:
+            continue
+        for stage, seconds in case["stages"].items():
+            before = base.get("stages", {}).get(stage)
+            if before is None:
+                continue
+            if seconds > before * max_slowdown and seconds - before > min_seconds:
+                problems.append(
+                    f"{case['name']} {stage}: {seconds:.3f}s vs {before:.3f}s "
+                    f"({seconds / before if before else float('inf'):.2f}x)"
+                )
+        for key, unit in (("output_bytes", "bytes"), ("peak_rss_mb", "MB")):
+            now, before = case.get(key), base.get(key)
+            if now is not None and before and now > before * max_growth:
+                problems.append(f"{case['name']} {key}: {now} {unit} vs {before} {unit}")
+    return problems
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time magiclamp_report.py stage by stage on synthetic heatmaps."
+    )
+    parser.add_argument("--sizes", nargs="+", type=parse_size,
+                        default=[parse_size(s) for s in DEFAULT_SIZES],
+                        help=f"CATEGORIESxGENOMES cases (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--densities", nargs="+", type=float, default=DEFAULT_DENSITIES,
+                        help="Fraction of non-zero cells per case "
+                        f"(default: {' '.join(map(str, DEFAULT_DENSITIES))})")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per stage; the fastest is kept (default: 1)")
+    parser.add_argument("--cluster-transform", default="log1p",
+                        help="Clustering transform to benchmark (default: log1p)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", type=Path, default=None,
+                        help="Where synthetic CSVs are written and reused "
+                        "(default: a temporary directory)")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="Run cases in this process (faster, but peak RSS accumulates)")
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="Write the results JSON here")
+    parser.add_argument("--compare", type=Path, default=None,
+                        help="Baseline results JSON; exit 1 on a regression")
+    parser.add_argument("--max-slowdown", type=float, default=1.25,
+                        help="Allowed stage time ratio against the baseline (default: 1.25)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Stage slowdowns smaller than this never count (default: 0.05)")
+    parser.add_argument("--max-growth", type=float, default=1.10,
+                        help="Allowed output-bytes / peak-RSS ratio (default: 1.10)")
+    args = parser.parse_args(argv)
+
+    # Cases import the report from next to this script, like the worker does.
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    with tempfile.TemporaryDirectory(prefix="bench-report-") as scratch:
+        results = run_suite(
+            args.sizes, args.densities, args.work_dir or Path(scratch),
+            repeat=args.repeat, transform=args.cluster_transform,
+            isolate=not args.no_isolate, seed=args.seed,
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        problems = compare(results, baseline, args.max_slowdown, args.min_seconds, args.max_growth)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+bench_worker.py
+
+End-to-end benchmark of magiclamp_worker.process_job() without AWS or
+MagicLamp. Three stand-ins make that possible:
+
+  LocalS3         a directory-backed client with the boto3 S3 calls the
+                  worker makes (head/get/put_object, list_objects_v2,
+                  download_file, upload_file, upload_fileobj). ETags are
+                  content MD5s, so download verification runs for real;
+                  --s3-latency-ms / --s3-mbps approximate a network.
+  stub MagicLamp  a MagicLamp.py that sleeps --delay (+ --delay-per-genome
+                  per genome), then writes a realistic summary CSV (about
+                  --hits rows per genome, with ORF sequences) and a
+                  categories x genomes heatmap CSV.
+  driver          seeds a job prefix of N synthetic FASTA genomes plus
+                  form-data.txt, runs process_job() in this process with the
+                  worker's own defaults, and times each phase.
+
+Phases split the job's wall clock end to end (they add up to the total):
+
+  download    job start -> download_prefix() done (status.json, listing,
+              verified downloads)
+  validate    waiting on the genome scans still running after the download
+  stage       manifest, split_inputs, prepare_bins, run.log header
+  run         time with at least one MagicLamp.py running
+  collect     the rest of run_genies(): output normalization, side-cars,
+              report rendering
+  archive     make_tarball() (0 with --stream-archive, which overlaps the
+              upload instead)
+  upload      publish_artifacts() and the final status.json
+
+Each case also keeps the job's own metrics from status.json (per-Genie
+CPU time and peak RSS, report render times; see 'Job metrics' in the
+worker) under worker_metrics.
+
+The default sizes are jobs of 1, 100 and 5,000 genomes. Inputs are cached
+per (size, --genome-kb, --seed) in the --work-dir bucket; each run starts
+from a fresh job directory. Anything after `--` is passed to the worker,
+so its options can be compared on the same inputs.
+
+Usage:
+    python bench_worker.py -o worker.json
+    python bench_worker.py --sizes 100 --genies FeGenie LithoGenie -- --parallel-genies 2
+    python bench_worker.py --sizes 5000 --s3-latency-ms 20 --s3-mbps 200 -- --stream-archive
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+DEFAULT_SIZES = [1, 100, 5000]
+PHASES = ["download", "validate", "stage", "run", "collect", "archive", "upload"]
+INPUT_BUCKET = "bench-input"
+RESULTS_BUCKET = "bench-results"
+# LocalS3 listing page size, as in S3.
+LIST_PAGE_SIZE = 1000
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+# ---------------------------------------------------------------------------
+# Local S3 stand-in
+# ---------------------------------------------------------------------------
+def _client_error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class LocalS3:
+    """Just enough of the boto3 S3 client for process_job, backed by a directory.
+
+    Each bucket is a directory under `root` and each key a file below it.
+    ETags are recorded on write (content MD5s, like single-part uploads), so
+    listings stay cheap. Every request sleeps `latency` seconds and transfers
+    are throttled to `bandwidth` bytes/s (0 = unthrottled). `stats` counts
+    requests and bytes per operation; it is safe to share across threads.
+    """
+
+    def __init__(self, root: Path, latency: float = 0.0, bandwidth: float = 0.0):
+        self.root = Path(root)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.stats: dict[str, dict[str, int]] = {}
+        self._etags: dict[Path, tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        (self.root / ".tmp").mkdir(parents=True, exist_ok=True)
+
+    # -- bookkeeping ---------------------------------------------------------
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def _request(self, op: str, nbytes: int = 0) -> None:
+        with self._lock:
+            entry = self.stats.setdefault(op, {"requests": 0, "bytes": 0})
+            entry["requests"] += 1
+            entry["bytes"] += nbytes
+        delay = self.latency + (nbytes / self.bandwidth if self.bandwidth else 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = {}
+
+    def _etag(self, path: Path) -> str:
+        st = path.stat()
+        known = self._etags.get(path)
+        if known is None or known[:2] != (st.st_size, st.st_mtime_ns):
+            h = hashlib.md5()
+            with path.open("rb") as fh:
+                for chunk in iter(lambda: fh.read(COPY_CHUNK_BYTES), b""):
+                    h.update(chunk)
+            self._remember(path, h.hexdigest())
+            known = self._etags[path]
+        return f'"{known[2]}"'
+
+    def _remember(self, path: Path, md5: str) -> None:
+        st = path.stat()
+        with self._lock:
+            self._etags[path] = (st.st_size, st.st_mtime_ns, md5)
+
+    def _store(self, bucket: str, key: str, source: BinaryIO) -> int:
+        """Copy `source` to the object at bucket/key atomically; returns its size."""
+        dest = self._path(bucket, key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        h = hashlib.md5()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.root / ".tmp")
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: source.read(COPY_CHUNK_BYTES), b""):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        os.replace(tmp, dest)
+        self._remember(dest, h.hexdigest())
+        return size
+
+    def seed(self, bucket: str, key: str, data: bytes) -> None:
+        """Store an object without simulated network cost or stats."""
+        self._store(bucket, key, io.BytesIO(data))
+
+    def _existing(self, bucket: str, key: str, operation: str, code: str = "404") -> Path:
+        path = self._path(bucket, key)
+        if not path.is_file():
+            raise _client_error(code, operation)
+        return path
+
+    # -- boto3 surface -------------------------------------------------------
+    def head_object(self, Bucket: str, Key: str, **_) -> dict:
+        path = self._existing(Bucket, Key, "HeadObject")
+        self._request("head_object")
+        return {"ContentLength": path.stat().st_size, "ETag": self._etag(path)}
+
+    def get_object(self, Bucket: str, Key: str, **_) -> dict:
+        path = self._existing(Bucket, Key, "GetObject", "NoSuchKey")
+        data = path.read_bytes()
+        self._request("get_object", len(data))
+        return {"Body": io.BytesIO(data), "ContentLength": len(data), "ETag": self._etag(path)}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes | str = b"", IfNoneMatch: str | None = None, **_) -> dict:
+        if IfNoneMatch == "*" and self._path(Bucket, Key).exists():
+            raise _client_error("PreconditionFailed", "PutObject")
+        data = Body.encode("utf-8") if isinstance(Body, str) else bytes(Body)
+        self._request("put_object", len(data))
+        self._store(Bucket, Key, io.BytesIO(data))
+        return {"ETag": self._etag(self._path(Bucket, Key))}
+
+    def download_file(self, Bucket: str, Key: str, Filename: str, ExtraArgs=None, Callback=None, Config=None) -> None:
+        path = self._existing(Bucket, Key, "HeadObject")
+        self._request("download_file", path.stat().st_size)
+        shutil.copyfile(path, Filename)
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str, ExtraArgs=None, Callback=None, Config=None) -> None:
+        with open(Filename, "rb") as fh:
+            size = self._store(Bucket, Key, fh)
+        self._request("upload_file", size)
+
+    def upload_fileobj(self, Fileobj: BinaryIO, Bucket: str, Key: str, ExtraArgs=None, Callback=None, Config=None) -> None:
+        size = self._store(Bucket, Key, Fileobj)
+        self._request("upload_fileobj", size)
+
+    def get_paginator(self, name: str) -> "_LocalPaginator":
+        if name != "list_objects_v2":
+            raise NotImplementedError(f"LocalS3 has no {name} paginator")
+        return _LocalPaginator(self)
+
+
+class _LocalPaginator:
+    def __init__(self, s3: LocalS3):
+        self.s3 = s3
+
+    def paginate(self, Bucket: str, Prefix: str = "", Delimiter: str | None = None, **_):
+        bucket_dir = self.s3.root / Bucket
+        keys = sorted(
+            p.relative_to(bucket_dir).as_posix()
+            for p in (bucket_dir.rglob("*") if bucket_dir.is_dir() else [])
+            if p.is_file()
+        )
+        contents: list[dict] = []
+        common: dict[str, None] = {}
+        for key in keys:
+            if not key.startswith(Prefix):
+                continue
+            if Delimiter and Delimiter in key[len(Prefix):]:
+                rest = key[len(Prefix):]
+                common.setdefault(Prefix + rest[:rest.index(Delimiter) + 1], None)
+                continue
+            path = bucket_dir / key
+            contents.append({"Key": key, "Size": path.stat().st_size, "ETag": self.s3._etag(path)})
+
+        entries = [("Contents", c) for c in contents] + [("CommonPrefixes", {"Prefix": p}) for p in common]
+        for start in range(0, max(1, len(entries)), LIST_PAGE_SIZE):
+            self.s3._request("list_objects_v2")
+            page: dict[str, list] = {}
+            for kind, entry in entries[start:start + LIST_PAGE_SIZE]:
+                page.setdefault(kind, []).append(entry)
+            yield page
+
+
+# ---------------------------------------------------------------------------
+# Stub MagicLamp.py
+# ---------------------------------------------------------------------------
+STUB_MAGICLAMP = '''\
+import random
+import sys
+import time
+from pathlib import Path
+
+argv = sys.argv[1:]
+genie = argv[argv.index("-genie") + 1] if "-genie" in argv else argv[0]
+bins = Path(argv[argv.index("-bin_dir") + 1])
+ext = argv[argv.index("-bin_ext") + 1]
+out = Path(argv[argv.index("-out") + 1])
+genomes = sorted(p.name for p in bins.iterdir() if p.name.endswith("." + ext))
+print(f"stub {genie}: {len(genomes)} genome(s)", flush=True)
+time.sleep(DELAY + DELAY_PER_GENOME * len(genomes))
+
+stem = "hmmgenie" if genie == "HmmGenie" else genie
+categories = [f"{stem.lower()}_category_{i:02d}" for i in range(CATEGORIES)]
+pool = random.Random(genie)
+proteins = ["".join(pool.choices("ACDEFGHIKLMNPQRSTVWY", k=pool.randint(150, 450))) for _ in range(64)]
+counts = [[0] * len(genomes) for _ in categories]
+with (out / f"{stem}-summary.csv").open("w") as summary:
+    summary.write("category,organism,locus,HMM,evalue,bitscore,clusterID,ORF_sequence\\n")
+    for j, name in enumerate(genomes):
+        rng = random.Random(f"{genie}/{name}")
+        for k in range(rng.randint(HITS // 2, HITS + HITS // 2) if HITS else 0):
+            c = rng.randrange(len(categories))
+            counts[c][j] += 1
+            summary.write(
+                f"{categories[c]},{name},contig_{rng.randint(1, 40)}_{k + 1},"
+                f"{categories[c]}_hmm{rng.randint(1, 12)}.hmm,{10 ** -rng.uniform(5, 80):.2e},"
+                f"{rng.uniform(40, 900):.1f},{k + 1},{rng.choice(proteins)}\\n"
+            )
+with (out / f"{stem}.heatmap.csv").open("w") as heatmap:
+    heatmap.write(",".join(["X", *genomes]) + "\\n")
+    for category, row in zip(categories, counts):
+        heatmap.write(",".join([category, *map(str, row)]) + "\\n")
+'''
+
+
+def write_stub_magiclamp(dest: Path, delay: float = 1.0, delay_per_genome: float = 0.0,
+                         hits: int = 20, categories: int = 30) -> Path:
+    """Write the stub MagicLamp.py with its settings baked in; returns `dest`."""
+    settings = (
+        f"DELAY = {delay!r}\nDELAY_PER_GENOME = {delay_per_genome!r}\n"
+        f"HITS = {hits!r}\nCATEGORIES = {max(1, categories)!r}\n"
+    )
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_text(settings + STUB_MAGICLAMP, encoding="utf-8")
+    return dest
+
+
+# ---------------------------------------------------------------------------
+# Synthetic jobs
+# ---------------------------------------------------------------------------
+def synthetic_genome(bp: int, contig_bp: int, rng: np.random.Generator) -> bytes:
+    """A random nucleotide FASTA of `bp` bases in contigs of `contig_bp`, 80 per line."""
+    bases = np.frombuffer(b"ACGT", dtype=np.uint8)[rng.integers(0, 4, max(1, bp))]
+    parts: list[bytes] = []
+    for c, start in enumerate(range(0, len(bases), contig_bp)):
+        contig = bases[start:start + contig_bp]
+        full = len(contig) // 80 * 80
+        lines = np.hstack([contig[:full].reshape(-1, 80), np.full((full // 80, 1), ord("\n"), np.uint8)])
+        parts.append(f">contig_{c + 1}\n".encode())
+        parts.append(lines.tobytes())
+        if full < len(contig):
+            parts.append(contig[full:].tobytes() + b"\n")
+    return b"".join(parts)
+
+
+def job_prefix(genomes: int, genome_kb: int, seed: int) -> str:
+    # Slugs are alphanumeric (PREFIX_RE); inputs are reused per prefix.
+    return f"magiclamp-bench{genomes}g{genome_kb}k{seed}s/"
+
+
+def seed_job(s3: LocalS3, prefix: str, genomes: int, genies: list[str], genome_kb: int = 500,
+             contig_kb: int = 50, seed: int = 0) -> int:
+    """Upload `genomes` FASTA files and form-data.txt under `prefix` unless already there.
+
+    form-data.txt goes last, so a half-seeded prefix is redone. Returns the
+    prefix's input bytes.
+    """
+    manifest = f"Job Slug: {prefix[len('magiclamp-'):-1]}\nGenies: {','.join(genies)}\nMode: fasta_or_genbank\n"
+    manifest_path = s3.root / INPUT_BUCKET / f"{prefix}form-data.txt"
+    if not manifest_path.exists():
+        rng = np.random.default_rng(seed)
+        for i in range(genomes):
+            data = synthetic_genome(genome_kb * 1000, contig_kb * 1000, rng)
+            s3.seed(INPUT_BUCKET, f"{prefix}genome_{i + 1:05d}.fna", data)
+    # The Genie list can change between runs on the same genomes.
+    s3.seed(INPUT_BUCKET, f"{prefix}form-data.txt", manifest.encode("utf-8"))
+    return sum(p.stat().st_size for p in (s3.root / INPUT_BUCKET / prefix).iterdir() if p.is_file())
+
+
+# ---------------------------------------------------------------------------
+# Phase clock
+# ---------------------------------------------------------------------------
+class PhaseClock:
+    """Timestamps process_job's progress by wrapping the worker functions it calls.
+
+    The worker calls its helpers through module globals, so swapping them
+    for timed wrappers (and back) is enough; nothing in the worker changes.
+    """
+
+    def __init__(self, worker, magiclamp_bin: str):
+        self.worker = worker
+        self.magiclamp_bin = magiclamp_bin
+        self.marks: dict[str, float] = {}
+        self.magiclamp_runs: list[tuple[float, float]] = []
+        self._lock = threading.Lock()
+        self._originals: dict[str, object] = {}
+
+    def _wrap(self, name: str, before: str | None = None, after: str | None = None) -> None:
+        fn = getattr(self.worker, name)
+        self._originals[name] = fn
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            if before:
+                self.marks[before] = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if after:
+                    self.marks[after] = time.perf_counter()
+
+        setattr(self.worker, name, timed)
+
+    def _wrap_run_command(self) -> None:
+        fn = self.worker.run_command
+        self._originals["run_command"] = fn
+
+        @functools.wraps(fn)
+        def timed(cmd: list[str], log_handle):
+            start = time.perf_counter()
+            try:
+                return fn(cmd, log_handle)
+            finally:
+                if self.magiclamp_bin in cmd:
+                    with self._lock:
+                        self.magiclamp_runs.append((start, time.perf_counter()))
+
+        self.worker.run_command = timed
+
+    def __enter__(self) -> "PhaseClock":
+        self._wrap("download_prefix", after="downloaded")
+        self._wrap("parse_manifest", before="manifest")
+        self._wrap("run_genies", before="run_start", after="run_end")
+        self._wrap("make_tarball", after="archived")
+        self._wrap_run_command()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for name, fn in self._originals.items():
+            setattr(self.worker, name, fn)
+        self._originals.clear()
+
+    def magiclamp_seconds(self) -> float:
+        """Wall time with at least one MagicLamp.py running (overlaps counted once)."""
+        total, reach = 0.0, float("-inf")
+        for start, end in sorted(self.magiclamp_runs):
+            if end > reach:
+                total += end - max(start, reach)
+                reach = end
+        return total
+
+    def phases(self, started: float, finished: float) -> dict[str, float]:
+        """Split [started, finished] into PHASES. Marks a job never reached
+        (e.g. after a failure) fall back to the previous one, so the phases
+        always add up to the total."""
+        points = [started]
+        for mark in ("downloaded", "manifest", "run_start", "run_end", "archived"):
+            points.append(min(max(self.marks.get(mark, points[-1]), points[-1]), finished))
+        points.append(finished)
+        downloaded, manifest, run_start, run_end, archived = points[1:6]
+        run = min(self.magiclamp_seconds(), run_end - run_start)
+        seconds = {
+            "download": downloaded - started,
+            "validate": manifest - downloaded,
+            "stage": run_start - manifest,
+            "run": run,
+            "collect": run_end - run_start - run,
+            "archive": archived - run_end,
+            "upload": finished - archived,
+        }
+        return {phase: round(seconds[phase], 4) for phase in PHASES}
+
+
+# ---------------------------------------------------------------------------
+# One case
+# ---------------------------------------------------------------------------
+def worker_args(work_dir: Path, stub: Path, extra: list[str] = ()) -> argparse.Namespace:
+    """The worker's own defaults, pointed at the local buckets and the stub."""
+    import magiclamp_worker as worker
+
+    return worker.parse_args([
+        "--input-bucket", INPUT_BUCKET,
+        "--results-bucket", RESULTS_BUCKET,
+        "--work-root", str(work_dir / "jobs"),
+        "--lock-dir", str(work_dir / "locks"),
+        "--log-file", str(work_dir / "worker.log"),
+        "--magiclamp-bin", str(stub),
+        "--command-prefix", sys.executable,
+        "--force",
+        *extra,
+    ])
+
+
+def run_case(s3: LocalS3, args: argparse.Namespace, prefix: str, repeat: int = 1) -> dict:
+    """Run process_job on `prefix`; with `repeat`, keep the fastest run."""
+    import magiclamp_worker as worker
+
+    best: dict | None = None
+    for _ in range(max(1, repeat)):
+        s3.reset_stats()
+        with PhaseClock(worker, args.magiclamp_bin) as clock:
+            started = time.perf_counter()
+            try:
+                state = worker.process_job(args, s3, prefix)
+            except Exception as e:  # recorded, so one broken case doesn't end the suite
+                logging.exception("process_job failed on %s", prefix)
+                state = f"error: {e}"
+            finished = time.perf_counter()
+        shutil.rmtree(Path(args.work_root) / prefix.rstrip("/"), ignore_errors=True)
+        # Read behind the client's back, so it doesn't count as a request.
+        status_path = s3.root / args.results_bucket / f"{prefix}status.json"
+        status = json.loads(status_path.read_text(encoding="utf-8")) if status_path.exists() else {}
+        record = {
+            "state": state,
+            "total_seconds": round(finished - started, 4),
+            "phases": clock.phases(started, finished),
+            "magiclamp_calls": len(clock.magiclamp_runs),
+            "s3": s3.stats,
+            "uploaded_bytes": sum(s3.stats.get(op, {}).get("bytes", 0) for op in ("upload_file", "upload_fileobj")),
+            # The job's own record (status.json "metrics"): per-Genie CPU / RSS, reports.
+            "worker_metrics": status.get("metrics"),
+        }
+        if best is None or record["total_seconds"] < best["total_seconds"]:
+            best = record
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Suite
+# ---------------------------------------------------------------------------
+def run_suite(
+    sizes: list[int],
+    work_dir: Path,
+    genies: list[str],
+    genome_kb: int = 500,
+    contig_kb: int = 50,
+    delay: float = 1.0,
+    delay_per_genome: float = 0.0,
+    hits: int = 20,
+    categories: int = 30,
+    latency: float = 0.0,
+    bandwidth: float = 0.0,
+    repeat: int = 1,
+    seed: int = 0,
+    extra_worker_args: list[str] = (),
+) -> dict:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    s3 = LocalS3(work_dir / "s3", latency=latency, bandwidth=bandwidth)
+    stub = write_stub_magiclamp(work_dir / "stub" / "MagicLamp.py", delay, delay_per_genome, hits, categories)
+    args = worker_args(work_dir, stub, list(extra_worker_args))
+
+    cases = []
+    for genomes in sizes:
+        prefix = job_prefix(genomes, genome_kb, seed)
+        input_bytes = seed_job(s3, prefix, genomes, genies, genome_kb, contig_kb, seed)
+        record = {
+            "name": f"{genomes} genome{'s' if genomes != 1 else ''}",
+            "genomes": genomes,
+            "input_bytes": input_bytes,
+            **run_case(s3, args, prefix, repeat),
+        }
+        cases.append(record)
+        print(_format_row(record), flush=True)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "genies": genies,
+            "genome_kb": genome_kb,
+            "contig_kb": contig_kb,
+            "delay": delay,
+            "delay_per_genome": delay_per_genome,
+            "hits": hits,
+            "categories": categories,
+            "s3_latency_ms": latency * 1000,
+            "s3_mbps": bandwidth / 1e6,
+            "repeat": repeat,
+            "seed": seed,
+            "worker_args": list(extra_worker_args),
+            "threads": args.threads,
+        },
+        "cases": cases,
+    }
+
+
+def _format_row(record: dict) -> str:
+    phases = " ".join(f"{p}={record['phases'][p]:.2f}" for p in PHASES)
+    return (
+        f"{record['name']:>14}  {record['state']:8}  total={record['total_seconds']:.2f}  {phases}  "
+        f"in={record['input_bytes'] / 1e6:.1f}MB out={record['uploaded_bytes'] / 1e6:.1f}MB"
+    )
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time process_job() phase by phase against a local S3 and a stub MagicLamp.py.",
+        epilog="Arguments after -- are passed to magiclamp_worker.py (e.g. -- --stream-archive).",
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                        help=f"Genomes per job (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--genies", nargs="+", default=["FeGenie"],
+                        help="Genies in form-data.txt (default: FeGenie)")
+    parser.add_argument("--genome-kb", type=int, default=500,
+                        help="Size of each synthetic genome in kbp (default: 500; real MAGs are 1-5 Mbp)")
+    parser.add_argument("--contig-kb", type=int, default=50,
+                        help="Contig length in kbp (default: 50)")
+    parser.add_argument("--delay", type=float, default=1.0,
+                        help="Seconds each stub MagicLamp.py call sleeps (default: 1.0)")
+    parser.add_argument("--delay-per-genome", type=float, default=0.0,
+                        help="Extra stub seconds per genome in the call (default: 0)")
+    parser.add_argument("--hits", type=int, default=20,
+                        help="Mean summary rows per genome and Genie (default: 20)")
+    parser.add_argument("--categories", type=int, default=30,
+                        help="Heatmap categories per Genie (default: 30)")
+    parser.add_argument("--s3-latency-ms", type=float, default=0.0,
+                        help="Simulated latency per S3 request (default: 0)")
+    parser.add_argument("--s3-mbps", type=float, default=0.0,
+                        help="Simulated per-request transfer rate in MB/s (default: 0 = disk speed)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per size; the fastest is kept (default: 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", type=Path, default=None,
+                        help="Local buckets and job directories; inputs are reused "
+                        "(default: a temporary directory)")
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="Write the results JSON here")
+    parser.add_argument("--verbose", action="store_true", help="Show the worker's INFO logging")
+    parser.add_argument("worker_args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    extra = args.worker_args[1:] if args.worker_args[:1] == ["--"] else args.worker_args
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    # The worker (and its report script) are imported from next to this file.
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    with tempfile.TemporaryDirectory(prefix="bench-worker-") as scratch:
+        results = run_suite(
+            args.sizes, args.work_dir or Path(scratch), args.genies,
+            genome_kb=args.genome_kb, contig_kb=args.contig_kb,
+            delay=args.delay, delay_per_genome=args.delay_per_genome,
+            hits=args.hits, categories=args.categories,
+            latency=args.s3_latency_ms / 1000, bandwidth=args.s3_mbps * 1e6,
+            repeat=args.repeat, seed=args.seed, extra_worker_args=extra,
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {args.output}")
+    return 0 if all(case["state"] == "complete" for case in results["cases"]) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+magiclamp_merge.py
+
+Merge MagicLamp result tables produced in pieces — genome shards, per-genome
+result-cache entries, reruns — into the single per-Genie files the results
+viewer expects:
+
+  1. Summary CSVs (one row per HMM hit) are concatenated under one header.
+     The header is the union of every source's columns in first-seen order;
+     rows are re-ordered by column name and blanks fill missing columns.
+  2. Heatmap CSVs (categories × genomes) are outer-joined on category and
+     genome, zero-filling cells no source provides. Categories and genome
+     columns keep first-seen order; if several sources carry the same genome
+     column, the first one wins.
+
+Both merges stream. Summaries are copied row by row; heatmaps are re-laid
+out one source at a time into column blocks aligned on the global category
+order, which are then pasted side by side `fanout` files at a time. Memory
+is bounded by the largest single source, not the merged result, and every
+input row is read a fixed number of times.
+
+The worker imports merge_summary_csvs / merge_heatmap_csvs from here; the
+command line is handy for stitching reruns together by hand.
+
+Usage:
+    python magiclamp_merge.py summary merged-summary.csv part1.csv part2.csv ...
+    python magiclamp_merge.py heatmap merged.heatmap.csv part1.csv part2.csv ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator
+
+# Aligned heatmap blocks pasted together per pass; keeps open files bounded.
+MERGE_FANOUT = 256
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+def _rows(path: Path) -> Iterator[list[str]]:
+    with path.open("r", newline="", encoding="utf-8", errors="replace") as inp:
+        yield from csv.reader(inp)
+
+
+def _header(path: Path) -> list[str]:
+    with path.open("r", newline="", encoding="utf-8", errors="replace") as inp:
+        return next(csv.reader(inp), [])
+
+
+# ---------------------------------------------------------------------------
+# Summary CSVs
+# ---------------------------------------------------------------------------
+def merge_summary_csvs(sources: list[Path], dest: Path) -> int:
+    """Concatenate summary CSVs under the union of their headers.
+
+    Columns are matched by name, so sources with a reordered or partial
+    header still line up. Repeated header rows and blank rows are dropped.
+    Returns the number of data rows written.
+    """
+    headers = [_header(src) for src in sources]
+    union: dict[str, None] = {}
+    for header in headers:
+        for name in header:
+            union.setdefault(name, None)
+    columns = list(union)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.merge")
+    rows = 0
+    with tmp.open("w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        if columns:
+            writer.writerow(columns)
+        for src, header in zip(sources, headers):
+            if not header:
+                continue
+            index = {name: i for i, name in enumerate(header)}
+            aligned = header == columns
+            reader = _rows(src)
+            next(reader, None)
+            for row in reader:
+                if not row or row == header:
+                    continue
+                if not aligned:
+                    row = [row[index[c]] if c in index and index[c] < len(row) else "" for c in columns]
+                writer.writerow(row)
+                rows += 1
+    # Sources may include `dest` itself (new rows merged into an existing
+    # file), so it is only replaced once everything has been read.
+    os.replace(tmp, dest)
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Heatmap CSVs
+# ---------------------------------------------------------------------------
+def _write_block(
+    src: Path,
+    owned: list[int],
+    categories: dict[str, None],
+    dest: Path,
+) -> None:
+    """Re-lay `src` as one line per global category holding only its owned columns."""
+    zeros = ["0"] * len(owned)
+    values: dict[str, list[str]] = {}
+    reader = _rows(src)
+    next(reader, None)
+    for row in reader:
+        if not row or not row[0]:
+            continue
+        values[row[0]] = [
+            row[1 + j] if 1 + j < len(row) and row[1 + j] != "" else "0" for j in owned
+        ]
+    with dest.open("w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        for category in categories:
+            writer.writerow(values.get(category, zeros))
+
+
+def _paste(blocks: list[Path], dest: Path, first: list[str] | None = None,
+           labels: Iterator[str] | None = None) -> None:
+    """Join aligned block files line by line (like `paste -d,`)."""
+    handles = [b.open("r", newline="", encoding="utf-8") for b in blocks]
+    try:
+        readers = [csv.reader(h) for h in handles]
+        with dest.open("w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            if first is not None:
+                writer.writerow(first)
+            for parts in zip(*readers):
+                row = [value for part in parts for value in part]
+                writer.writerow([next(labels), *row] if labels is not None else row)
+    finally:
+        for h in handles:
+            h.close()
+
+
+def merge_heatmap_csvs(sources: list[Path], dest: Path, fanout: int = MERGE_FANOUT) -> bool:
+    """Outer-join heatmap CSVs on categories × genomes, zero-filling gaps.
+
+    Genome columns and categories keep first-seen order; a genome column
+    already provided by an earlier source is ignored. Returns False (and
+    writes nothing) if the result would be empty.
+    """
+    # Pass 1: global category order and which columns each source owns.
+    categories: dict[str, None] = {}
+    genomes: dict[str, None] = {}
+    owned: list[list[int]] = []
+    for src in sources:
+        reader = _rows(src)
+        header = next(reader, None) or []
+        mine = []
+        for j, genome in enumerate(header[1:]):
+            if genome not in genomes:
+                genomes[genome] = None
+                mine.append(j)
+        owned.append(mine)
+        for row in reader:
+            if row and row[0]:
+                categories.setdefault(row[0], None)
+    if not genomes or not categories:
+        return False
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".merge-", dir=dest.parent) as scratch:
+        scratch_dir = Path(scratch)
+        # Pass 2: one aligned column block per contributing source.
+        blocks: list[Path] = []
+        for i, (src, mine) in enumerate(zip(sources, owned)):
+            if mine:
+                block = scratch_dir / f"block-{i:06d}.csv"
+                _write_block(src, mine, categories, block)
+                blocks.append(block)
+
+        # Pass 3: paste blocks together, `fanout` at a time, until one pass remains.
+        fanout = max(2, fanout)
+        level = 0
+        while len(blocks) > fanout:
+            level += 1
+            merged: list[Path] = []
+            for k in range(0, len(blocks), fanout):
+                out = scratch_dir / f"paste-{level}-{k // fanout:06d}.csv"
+                _paste(blocks[k:k + fanout], out)
+                merged.append(out)
+            blocks = merged
+
+        tmp = dest.with_name(f".{dest.name}.merge")
+        _paste(blocks, tmp, first=["X", *genomes], labels=iter(categories))
+        os.replace(tmp, dest)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge MagicLamp summary or heatmap CSVs.")
+    parser.add_argument("kind", choices=["summary", "heatmap"])
+    parser.add_argument("output", type=Path)
+    parser.add_argument("inputs", type=Path, nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.kind == "summary":
+        rows = merge_summary_csvs(args.inputs, args.output)
+        print(f"Wrote {rows} row(s) to {args.output}")
+        return 0
+    if not merge_heatmap_csvs(args.inputs, args.output):
+        print("Nothing to merge: no categories or genome columns in the inputs.")
+        return 1
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -13,16 +13,43 @@ Genie-agnostic.
 The report contains:
 
   1. A dot plot mirroring the heatmap-format CSV (genomes on x-axis, categories
-     on y-axis, dot size and color encode the value).
+     on y-axis, dot size and color encode the value). Only non-zero cells
+     are drawn; zeros are the empty grid.
   2. A clustered heatmap with dendrograms on both axes (rows = categories,
      columns = genomes), reflecting the same numeric values (integers or
      fractions) from the CSV.
 
-The output HTML is fully self-contained (Plotly bundled inline) so it can be
-downloaded and opened in any modern browser without a network connection.
+By default the output HTML is fully self-contained (Plotly bundled inline)
+so it can be downloaded and opened in any modern browser without a network
+connection. With `--plotlyjs shared` the report instead loads a versioned
+`plotly-<version>.min.js` written once next to it, so a directory of
+reports (one per Genie) shares a single copy of the ~4.5 MB bundle and the
+browser caches it across reports. Figure data is kept compact either way:
+numeric arrays are serialized as typed arrays and hover text is produced
+by templates instead of one string per cell.
+
+Given several heatmap CSVs (one per Genie) it writes one combined, tabbed
+report instead: an "All Genies" view stacking every Genie's categories
+against a shared genome axis, then one tab per Genie. Genomes are clustered
+once, on their concatenated category profiles across all Genies, and every
+tab uses that order. plotly.js and the template are loaded once for all
+of them.
+
+Taxon-scale matrices (thousands of genomes) switch to a large-matrix mode
+so the page still renders in seconds at a bounded size: dendrograms are
+one trace each, cell annotations, the dot plot and the raw table drop out
+past fixed cell counts, more than `--cluster-max-leaves` genomes are
+placed by clustering a sample, and very wide heatmaps average adjacent
+genomes. `--optimal-ordering` adds scipy's optimal leaf ordering.
+
+Large, mostly-zero matrices load as a SparseHeatmap (CSR plus labels)
+and stay sparse through the clustering transforms, the nearest-genome
+search and the dot plot, so memory and time follow the number of hits
+rather than categories x genomes. Only the drawn heatmap is dense.
 
 Usage:
-    python fegenie_report.py FeGenie-heatmap-data.csv [-o report.html]
+    python fegenie_report.py FeGenie-heatmap-data.csv [-o report.html] [--plotlyjs shared]
+    python magiclamp_report.py FeGenie.heatmap.csv LithoGenie.heatmap.csv [-o combined-report.html]
 
 Dependencies:
     pandas, numpy, scipy, plotly
@@ -31,87 +58,197 @@ Dependencies:
 from __future__ import annotations
 
 import argparse
+import os
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+import scipy.sparse as sp
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
 from plotly.subplots import make_subplots
 from scipy.cluster.hierarchy import linkage, leaves_list
-from scipy.spatial.distance import pdist
+from scipy.spatial.distance import cdist, pdist
 
 
 # ---------------------------------------------------------------------------
 # Data loading
 # ---------------------------------------------------------------------------
-def load_heatmap_csv(csv_path: Path) -> pd.DataFrame:
+# Matrices at least this large and at most this dense load as a SparseHeatmap.
+SPARSE_MIN_CELLS = 100_000
+SPARSE_MAX_DENSITY = 0.2
+# Categories parsed per read_csv chunk, so loading never holds the whole
+# dense matrix for a sparse file.
+LOAD_CHUNK_ROWS = 128
+
+
+@dataclass
+class SparseHeatmap:
+    """A categories x genomes matrix kept as CSR (NaNs stored like values).
+
+    Offers the parts of the DataFrame interface the report reads (`index`,
+    `columns`, `shape`, `size`, `empty`); to_frame() gives the dense frame.
+    """
+
+    values: sp.csr_matrix
+    index: pd.Index
+    columns: pd.Index
+
+    @classmethod
+    def from_csr(cls, csr: sp.spmatrix, index, columns) -> SparseHeatmap:
+        return cls(
+            sp.csr_matrix(csr, dtype=float),
+            pd.Index(list(index), name="Category"),
+            pd.Index(list(columns), name="Genome"),
+        )
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def size(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def empty(self) -> bool:
+        return self.size == 0
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values.toarray(), index=self.index, columns=self.columns)
+
+
+def load_heatmap_csv(csv_path: Path, sparse: bool | None = None) -> pd.DataFrame | SparseHeatmap:
     """Load a FeGenie heatmap CSV.
 
     Expected layout:
         first column = category labels (header is typically 'X')
         remaining columns = genomes (one per column)
         cell values    = counts / fractions (numeric)
+
+    Genie heatmaps are mostly zeros. With `sparse=None` a matrix of at least
+    SPARSE_MIN_CELLS cells and at most SPARSE_MAX_DENSITY non-zeros comes
+    back as a SparseHeatmap, which the rest of this module handles touching
+    only the non-zero cells; True / False force either form.
     """
-    df = pd.read_csv(csv_path, index_col=0)
-    df.index.name = "Category"
-    df.columns.name = "Genome"
+    index: list[str] = []
+    columns = None
+    blocks = []
+    nnz = 0
+    for chunk in pd.read_csv(csv_path, index_col=0, chunksize=LOAD_CHUNK_ROWS):
+        # Coerce to numeric; non-numeric becomes NaN -> 0 for plotting safety,
+        # but we keep NaN-aware logic where it matters. Only columns the
+        # parser left as text need it; wide files have thousands of columns.
+        text = chunk.columns[[not pd.api.types.is_numeric_dtype(t) for t in chunk.dtypes]]
+        if len(text):
+            chunk[text] = chunk[text].apply(pd.to_numeric, errors="coerce")
+        columns = chunk.columns
+        index.extend(chunk.index)
+        block = chunk.to_numpy(dtype=float)
+        # Count non-zeros as CSR stores them (NaN included). Chunks stay dense
+        # until the form is known, so a dense result never passes through CSR.
+        nnz += np.count_nonzero(block)
+        blocks.append(sp.csr_matrix(block) if sparse else block)
+    if columns is None:
+        columns = pd.read_csv(csv_path, index_col=0, nrows=0).columns
+
+    size = len(index) * len(columns)
+    if sparse is None:
+        sparse = size >= SPARSE_MIN_CELLS and nnz <= SPARSE_MAX_DENSITY * size
+    if not sparse:
+        values = np.vstack(blocks) if blocks else np.zeros((0, len(columns)))
+        blocks.clear()
+        return pd.DataFrame(
+            values,
+            index=pd.Index(index, name="Category"),
+            columns=pd.Index(list(columns), name="Genome"),
+        )
+    # Convert dense chunks one at a time, dropping each as it goes.
+    for i, block in enumerate(blocks):
+        if not sp.issparse(block):
+            blocks[i] = sp.csr_matrix(block)
+    csr = (
+        sp.vstack(blocks, format="csr") if blocks
+        else sp.csr_matrix((0, len(columns)))
+    )
+    return SparseHeatmap.from_csr(csr, index, columns)
+
+
+def _values(df: pd.DataFrame | SparseHeatmap) -> np.ndarray | sp.csr_matrix:
+    """Cell values: CSR for a SparseHeatmap, a float array for a DataFrame."""
+    if isinstance(df, SparseHeatmap):
+        return df.values
+    return df.to_numpy(dtype=float)
 
-    # Coerce to numeric; non-numeric becomes NaN -> 0 for plotting safety,
-    # but we keep NaN-aware logic where it matters.
-    df = df.apply(pd.to_numeric, errors="coerce")
-    return df
+
+def _nonzero_cells(df: pd.DataFrame | SparseHeatmap) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(row, column, value) of every non-zero, non-NaN cell."""
+    values = _values(df)
+    if sp.issparse(values):
+        coo = values.tocoo()
+        rows, cols, vals = coo.row, coo.col, np.nan_to_num(coo.data, nan=0.0)
+        keep = vals != 0
+        return rows[keep], cols[keep], vals[keep]
+    filled = np.nan_to_num(values, nan=0.0)
+    rows, cols = np.nonzero(filled)
+    return rows, cols, filled[rows, cols]
 
 
 # ---------------------------------------------------------------------------
 # Dot plot
 # ---------------------------------------------------------------------------
-def build_dotplot(df: pd.DataFrame) -> go.Figure:
-    """Dot plot: x = genomes, y = categories. Size + color encode value."""
-    # Long-format for scatter
-    long_df = (
-        df.reset_index()
-        .melt(id_vars="Category", var_name="Genome", value_name="Value")
-    )
+def build_dotplot(
+    df: pd.DataFrame | SparseHeatmap,
+    cells: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None,
+) -> go.Figure:
+    """Dot plot: x = genomes, y = categories. Size + color encode value.
 
-    # Keep zeros visible as faint markers so the grid reads cleanly,
-    # but scale size from the non-zero distribution.
-    vmax = float(np.nanmax(df.values)) if df.size else 1.0
-    vmax = vmax if vmax > 0 else 1.0
+    Only non-zero cells are drawn (`cells` from _nonzero_cells() if the
+    caller already has them); zeros are the empty background grid, so the
+    figure grows with hits, not with categories x genomes.
+    """
+    rows, cols, values = cells if cells is not None else _nonzero_cells(df)
 
-    sizes = long_df["Value"].fillna(0).clip(lower=0)
-    # Min marker size 4 (for zero), scaled up to 36 at vmax.
-    marker_sizes = 4 + (sizes / vmax) * 32
+    # Scale size from the non-zero distribution.
+    vmax = float(values.max()) if values.size else 1.0
+    vmax = vmax if vmax > 0 else 1.0
 
-    hover = [
-        f"<b>{cat}</b><br>Genome: {gen}<br>Value: {val:g}"
-        for cat, gen, val in zip(
-            long_df["Category"], long_df["Genome"], long_df["Value"].fillna(0)
-        )
-    ]
+    # Min marker size 4, scaled up to 36 at vmax.
+    marker_sizes = 4 + (np.clip(values, 0, None) / vmax) * 32
 
     fig = go.Figure(
         go.Scatter(
-            x=long_df["Genome"],
-            y=long_df["Category"],
+            x=df.columns.to_numpy(dtype=object)[cols],
+            y=df.index.to_numpy(dtype=object)[rows],
             mode="markers",
             marker=dict(
                 size=marker_sizes,
-                color=long_df["Value"].fillna(0),
+                color=values,
                 colorscale="Viridis",
                 cmin=0,
                 cmax=vmax,
                 colorbar=dict(title="Value", thickness=14, len=0.75),
                 line=dict(width=0.5, color="rgba(40,40,40,0.6)"),
             ),
-            hovertemplate="%{text}<extra></extra>",
-            text=hover,
+            # Built in the browser from the point itself, not shipped per point.
+            hovertemplate=(
+                "<b>%{y}</b><br>Genome: %{x}<br>Value: %{marker.color:g}<extra></extra>"
+            ),
         )
     )
 
     fig.update_layout(
         title="Dot plot (mirrors heatmap CSV values)",
-        xaxis=dict(title="Genome", tickangle=-30, automargin=True),
+        xaxis=dict(
+            title="Genome",
+            tickangle=-30,
+            automargin=True,
+            # Every genome and category keeps its grid line, hits or not.
+            categoryorder="array",
+            categoryarray=list(df.columns),
+        ),
         yaxis=dict(
             title="Category",
             automargin=True,
@@ -136,7 +273,14 @@ def _cluster_transform(matrix: np.ndarray, mode: str) -> np.ndarray:
     The raw FeGenie matrix is often sparse and count-dominated; a few abundant
     categories can otherwise control the genome dendrogram. These transforms
     make the clustering reflect profile similarity more than absolute magnitude.
+
+    A sparse matrix stays sparse for every transform that maps zero to zero,
+    which then only touches the stored non-zero cells; row z-scores center
+    every cell, so that one densifies.
     """
+    if sp.issparse(matrix):
+        return _sparse_cluster_transform(matrix, mode)
+
     data = np.nan_to_num(matrix.astype(float), nan=0.0)
 
     if mode == "none":
@@ -162,11 +306,43 @@ def _cluster_transform(matrix: np.ndarray, mode: str) -> np.ndarray:
     raise ValueError(f"Unknown cluster transform: {mode}")
 
 
+def _sparse_cluster_transform(matrix: sp.spmatrix, mode: str) -> sp.csr_matrix | np.ndarray:
+    data = sp.csr_matrix(matrix, dtype=float, copy=True)
+    data.data = np.nan_to_num(data.data, nan=0.0)
+
+    if mode == "none":
+        pass
+    elif mode == "log1p":
+        data.data = np.log1p(np.clip(data.data, a_min=0, a_max=None))
+    elif mode == "presence_absence":
+        data.data = (data.data > 0).astype(float)
+    elif mode == "column_fraction":
+        col_sums = np.asarray(data.sum(axis=0)).ravel()
+        scale = np.divide(1.0, col_sums, out=np.zeros_like(col_sums), where=col_sums != 0)
+        data = data.multiply(scale[np.newaxis, :]).tocsr()
+    elif mode == "column_fraction_row_zscore":
+        return _cluster_transform(data.toarray(), mode)
+    else:
+        raise ValueError(f"Unknown cluster transform: {mode}")
+    data.eliminate_zeros()
+    return data
+
+
+# Large-matrix mode: past these sizes the report trades detail for a page
+# that renders in seconds and stays a bounded size.
+ANNOTATE_MAX_CELLS = 2_500       # numbers printed inside heatmap cells
+CLUSTER_MAX_LEAVES = 2_000       # exact linkage per axis; beyond, a sample is clustered
+HEATMAP_MAX_CELLS = 1_000_000    # drawn cells; wider matrices average adjacent genomes
+DOTPLOT_MAX_POINTS = 40_000      # dot plot markers (non-zero cells)
+TABLE_MAX_CELLS = 40_000         # raw data table cells
+
+
 def _safe_linkage(
     matrix: np.ndarray,
     axis: int,
     metric: str = "correlation",
     method: str = "average",
+    optimal_ordering: bool = False,
 ) -> np.ndarray | None:
     """Compute linkage along an axis. Returns None if not enough data."""
     data = matrix if axis == 0 else matrix.T
@@ -175,7 +351,7 @@ def _safe_linkage(
         return None
 
     # Replace NaNs with 0 for distance computation.
-    data = np.nan_to_num(data, nan=0.0)
+    data = np.nan_to_num(data.toarray() if sp.issparse(data) else data, nan=0.0)
 
     try:
         dists = pdist(data, metric=metric)
@@ -185,94 +361,235 @@ def _safe_linkage(
         if not np.any(dists):
             # Add tiny jitter so linkage produces a stable order.
             dists = dists + 1e-9
-        return linkage(dists, method=method)
+        return linkage(dists, method=method, optimal_ordering=optimal_ordering)
     except Exception:
         return None
 
+
+def _dense(block: np.ndarray | sp.spmatrix) -> np.ndarray:
+    return np.nan_to_num(block.toarray() if sp.issparse(block) else block, nan=0.0)
+
+
+def _nearest_rows(
+    data: np.ndarray | sp.csr_matrix, anchors: np.ndarray, metric: str, chunk: int = 1024,
+) -> np.ndarray:
+    """Index into `anchors` of the row nearest to each row of `data`.
+
+    correlation, cosine and (sq)euclidean reduce to dot products with the
+    anchors, so sparse rows only touch their non-zero cells and are never
+    densified. Other metrics go through cdist one chunk at a time.
+    Undefined distances (e.g. correlation with a constant row) never win.
+    """
+    n, width = data.shape
+    nearest = np.empty(n, dtype=np.intp)
+    if metric not in ("correlation", "cosine", "euclidean", "sqeuclidean"):
+        for start in range(0, n, chunk):
+            dists = cdist(_dense(data[start:start + chunk]), anchors, metric=metric)
+            nearest[start:start + chunk] = np.nan_to_num(dists, nan=np.inf).argmin(axis=1)
+        return nearest
+
+    if metric == "correlation":
+        # Centering the anchors makes x . a_c equal to x_c . a_c.
+        anchors = anchors - anchors.mean(axis=1, keepdims=True)
+    anchor_sq = np.einsum("ij,ij->i", anchors, anchors)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, n, chunk):
+            block = data[start:start + chunk]
+            dots = np.asarray(block @ anchors.T)
+            if sp.issparse(block):
+                sq = np.asarray(block.multiply(block).sum(axis=1)).ravel()
+                sums = np.asarray(block.sum(axis=1)).ravel()
+            else:
+                sq = np.einsum("ij,ij->i", block, block)
+                sums = block.sum(axis=1)
+            if metric in ("euclidean", "sqeuclidean"):
+                score = 2 * dots - anchor_sq[np.newaxis, :]  # = |x|^2 - d(x, a)^2
+            else:
+                if metric == "correlation":
+                    sq = sq - sums * sums / width
+                norms = np.sqrt(np.clip(sq, 0, None))[:, np.newaxis] * np.sqrt(anchor_sq)[np.newaxis, :]
+                score = dots / norms
+            # Rounded so exact ties (common between sparse profiles) go to
+            # the first anchor whether BLAS or the sparse product summed them.
+            nearest[start:start + chunk] = np.round(np.nan_to_num(
+                score, nan=-np.inf, posinf=-np.inf, neginf=-np.inf,
+            ), 9).argmax(axis=1)
+    return nearest
+
+
+def _cluster_order(
+    matrix: np.ndarray,
+    axis: int,
+    metric: str = "correlation",
+    method: str = "average",
+    optimal_ordering: bool = False,
+    max_leaves: int = CLUSTER_MAX_LEAVES,
+    seed: int = 0,
+) -> tuple[np.ndarray | None, np.ndarray]:
+    """Leaf order along an axis, plus the linkage to draw as a dendrogram.
+
+    Up to `max_leaves` items are clustered exactly. Past that, a seeded
+    random sample of `max_leaves` items is clustered and every other item
+    is placed right after its nearest sampled item (same metric), so the
+    cost stays O(n * max_leaves). The linkage is None in that case: it
+    only covers the sample, not every leaf.
+    """
+    data = matrix if axis == 0 else matrix.T
+    n = data.shape[0]
+    if n <= max_leaves:
+        Z = _safe_linkage(data, axis=0, metric=metric, method=method,
+                          optimal_ordering=optimal_ordering)
+        return Z, (leaves_list(Z) if Z is not None else np.arange(n))
+
+    data = data.tocsr() if sp.issparse(data) else np.nan_to_num(data, nan=0.0)
+    sample = np.sort(np.random.default_rng(seed).choice(n, size=max_leaves, replace=False))
+    Z = _safe_linkage(data[sample], axis=0, metric=metric, method=method,
+                      optimal_ordering=optimal_ordering)
+    anchors = sample[leaves_list(Z)] if Z is not None else sample
+    nearest = _nearest_rows(data, _dense(data[anchors]), metric)
+
+    is_anchor = np.zeros(n, dtype=bool)
+    is_anchor[anchors] = True
+    # Anchors keep the sampled leaf order; each one is followed by the
+    # items it attracted.
+    return None, np.lexsort((np.arange(n), ~is_anchor, nearest))
+
+
 def _dendrogram_traces(Z: np.ndarray, orientation: str, leaf_count: int):
-    """Build line traces for a dendrogram from a SciPy linkage matrix.
+    """Build the line trace for a dendrogram from a SciPy linkage matrix.
 
     orientation: 'top' (columns) or 'left' (rows).
     Leaves are placed at integer positions 0..leaf_count-1 in the order given
-    by scipy.cluster.hierarchy.leaves_list(Z).
-    Returns (traces, max_height).
+    by scipy.cluster.hierarchy.leaves_list(Z). Every merge is one
+    four-point segment in a single trace, separated by gaps, so the figure
+    stays one trace however many leaves there are.
+    Returns (traces, max_height, leaves).
     """
     leaves = leaves_list(Z)
-    # position[node_id] = x-or-y coordinate of that node along the leaf axis
     n = leaf_count
+    # position[node_id] = coordinate of that node along the leaf axis
     position = np.zeros(2 * n - 1)
-    position[:n] = np.argsort(leaves)  # leaf i is at slot argsort(leaves)[i]
-    # Reassign so leaf at index k of `leaves` lives at coordinate k:
-    # position[leaf_id] = k where leaves[k] == leaf_id
-    inv = np.empty_like(leaves)
-    inv[leaves] = np.arange(n)
-    position[:n] = inv
-
+    position[leaves] = np.arange(n)
     height = np.zeros(2 * n - 1)
-    traces = []
-
-    for i, (a, b, dist, _count) in enumerate(Z):
-        a, b = int(a), int(b)
-        node_id = n + i
-        xa, xb = position[a], position[b]
-        ya, yb = height[a], height[b]
-        position[node_id] = (xa + xb) / 2.0
-        height[node_id] = dist
-
-        if orientation == "top":
-            # Horizontal axis = leaf positions, vertical axis = distance
-            xs = [xa, xa, xb, xb]
-            ys = [ya, dist, dist, yb]
-        else:  # 'left'
-            # Vertical axis = leaf positions, horizontal axis = distance
-            xs = [ya, dist, dist, yb]
-            ys = [xa, xa, xb, xb]
-
-        traces.append(
-            go.Scatter(
-                x=xs,
-                y=ys,
-                mode="lines",
-                line=dict(color="#444", width=1),
-                hoverinfo="skip",
-                showlegend=False,
-            )
-        )
+    height[n:] = Z[:, 2]
+
+    a = Z[:, 0].astype(np.intp)
+    b = Z[:, 1].astype(np.intp)
+    # Merges only reference earlier nodes, so one pass in order fills them in.
+    for i in range(n - 1):
+        position[n + i] = (position[a[i]] + position[b[i]]) / 2.0
+
+    gap = np.full(n - 1, np.nan)
+    along = np.column_stack([position[a], position[a], position[b], position[b], gap]).ravel()
+    depth = np.column_stack([height[a], height[n:], height[n:], height[b], gap]).ravel()
+    # top: horizontal axis = leaf positions, vertical axis = distance;
+    # left: the other way round.
+    xs, ys = (along, depth) if orientation == "top" else (depth, along)
+
+    trace = go.Scatter(
+        x=xs,
+        y=ys,
+        mode="lines",
+        line=dict(color="#444", width=1),
+        hoverinfo="skip",
+        showlegend=False,
+    )
 
     max_height = float(height.max()) if len(height) else 1.0
     if max_height == 0:
         max_height = 1.0
-    return traces, max_height, leaves
+    return [trace], max_height, leaves
+
+
+def _bin_columns(
+    matrix: np.ndarray | sp.spmatrix, labels: list[str], max_cols: int
+) -> tuple[np.ndarray, list[str]]:
+    """Average runs of adjacent columns so at most `max_cols` remain.
+
+    Bins are labelled by their first and last genome and their size. A
+    sparse matrix is summed through its non-zero cells only; the (dense)
+    result is at most `max_cols` wide.
+    """
+    width = -(-len(labels) // max_cols)
+    starts = np.arange(0, len(labels), width)
+    if sp.issparse(matrix):
+        n = len(labels)
+        bins = sp.csr_matrix((np.ones(n), (np.arange(n), np.arange(n) // width)),
+                             shape=(n, len(starts)))
+        values = sp.csr_matrix(matrix, dtype=float, copy=True)
+        missing = values.copy()
+        missing.data = np.isnan(values.data).astype(float)
+        values.data = np.nan_to_num(values.data, nan=0.0)
+        sums = (values @ bins).toarray()
+        counts = np.diff(np.append(starts, n))[np.newaxis, :] - (missing @ bins).toarray()
+    else:
+        sums = np.add.reduceat(np.nan_to_num(matrix, nan=0.0), starts, axis=1)
+        counts = np.add.reduceat(~np.isnan(matrix), starts, axis=1)
+    binned = np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+    names = []
+    for s in starts:
+        e = min(s + width, len(labels))
+        names.append(f"{labels[s]} … {labels[e - 1]} ({e - s})")
+    return binned, names
 
 
 def build_clustered_heatmap(
-    df: pd.DataFrame,
+    df: pd.DataFrame | SparseHeatmap,
     cluster_transform: str = "log1p",
     cluster_metric: str = "correlation",
     cluster_method: str = "average",
+    column_clustering: tuple[np.ndarray | None, np.ndarray] | None = None,
+    cluster_rows: bool = True,
+    title: str = "Clustered heatmap with dendrograms",
+    optimal_ordering: bool = False,
+    max_leaves: int = CLUSTER_MAX_LEAVES,
 ) -> go.Figure:
-    """Heatmap with hierarchical-clustering dendrograms on top and left."""
-    matrix = df.values.astype(float)
+    """Heatmap with hierarchical-clustering dendrograms on top and left.
+
+    `column_clustering` is a (linkage, order) pair from _cluster_order()
+    that replaces the genome clustering computed from `df` (the combined
+    report clusters genomes once across all Genies); `cluster_rows=False`
+    keeps the rows in input order without a dendrogram.
+
+    Large matrices switch features off rather than grow the page: cell
+    annotations above ANNOTATE_MAX_CELLS, exact clustering (and its
+    dendrogram) above `max_leaves` per axis, and one column per genome above
+    HEATMAP_MAX_CELLS, where adjacent genomes in the clustered order are
+    averaged instead.
+    """
+    matrix = _values(df)
     cluster_matrix = _cluster_transform(matrix, cluster_transform)
     row_labels = list(df.index)
     col_labels = list(df.columns)
-
-    Z_rows = _safe_linkage(cluster_matrix, axis=0, metric=cluster_metric, method=cluster_method)
-    Z_cols = _safe_linkage(cluster_matrix, axis=1, metric=cluster_metric, method=cluster_method)
+    options = dict(metric=cluster_metric, method=cluster_method,
+                   optimal_ordering=optimal_ordering, max_leaves=max_leaves)
 
     # Reorder rows / columns according to dendrogram leaves
-    if Z_rows is not None:
-        row_order = leaves_list(Z_rows)
+    if cluster_rows:
+        Z_rows, row_order = _cluster_order(cluster_matrix, axis=0, **options)
     else:
-        row_order = np.arange(len(row_labels))
-    if Z_cols is not None:
-        col_order = leaves_list(Z_cols)
+        Z_rows, row_order = None, np.arange(len(row_labels))
+    if column_clustering is not None:
+        Z_cols, col_order = column_clustering
     else:
-        col_order = np.arange(len(col_labels))
+        Z_cols, col_order = _cluster_order(cluster_matrix, axis=1, **options)
 
     ordered_rows = [row_labels[i] for i in row_order]
     ordered_cols = [col_labels[i] for i in col_order]
-    ordered_matrix = matrix[np.ix_(row_order, col_order)]
+    if sp.issparse(matrix):
+        ordered_matrix = matrix[row_order][:, col_order]
+    else:
+        ordered_matrix = matrix[np.ix_(row_order, col_order)]
+
+    # The drawn heatmap is dense, so a sparse matrix is only expanded once
+    # it fits under HEATMAP_MAX_CELLS.
+    max_cols = max(1, HEATMAP_MAX_CELLS // max(1, len(ordered_rows)))
+    if len(ordered_cols) > max_cols:
+        ordered_matrix, ordered_cols = _bin_columns(ordered_matrix, ordered_cols, max_cols)
+        title = f"{title} (adjacent genomes averaged into {len(ordered_cols)} columns)"
+    elif sp.issparse(ordered_matrix):
+        ordered_matrix = ordered_matrix.toarray()
+    annotate = ordered_matrix.size <= ANNOTATE_MAX_CELLS
 
     # Layout: 2x2 grid. Top-left empty, top-right = column dendrogram,
     # bottom-left = row dendrogram, bottom-right = heatmap.
@@ -337,16 +654,10 @@ def build_clustered_heatmap(
         )
 
     # --- Heatmap (bottom-right) ---
-    # Show numeric annotations inside cells so fractional values are readable.
-    text_vals = np.where(
-        np.isnan(ordered_matrix),
-        "",
-        np.vectorize(lambda v: f"{v:g}")(ordered_matrix),
-    )
-
     fig.add_trace(
         go.Heatmap(
-            z=ordered_matrix,
+            # float32 halves the serialized array; plenty for a color scale.
+            z=ordered_matrix.astype(np.float32),
             x=ordered_cols,
             y=ordered_rows,
             colorscale="Viridis",
@@ -363,8 +674,10 @@ def build_clustered_heatmap(
             hovertemplate=(
                 "<b>%{y}</b><br>Genome: %{x}<br>Value: %{z:g}<extra></extra>"
             ),
-            text=text_vals,
-            texttemplate="%{text}",
+            # Numeric annotations inside cells so fractional values are
+            # readable; formatted from z in the browser (blank for NaN).
+            # Past ANNOTATE_MAX_CELLS they are unreadable and slow to draw.
+            texttemplate="%{z:g}" if annotate else None,
             textfont=dict(size=11, color="white"),
             zmin=float(np.nanmin(ordered_matrix)) if ordered_matrix.size else 0,
             zmax=float(np.nanmax(ordered_matrix)) if ordered_matrix.size else 1,
@@ -391,8 +704,8 @@ def build_clustered_heatmap(
     )
 
     fig.update_layout(
-        title="Clustered heatmap with dendrograms",
-        height=max(520, 42 * len(row_labels) + 220),
+        title=title,
+        height=max(520, min(42 * len(row_labels), 6000) + 220),
         margin=dict(l=110, r=260, t=70, b=230),
         plot_bgcolor="white",
         showlegend=False,
@@ -403,79 +716,94 @@ def build_clustered_heatmap(
 # ---------------------------------------------------------------------------
 # HTML assembly
 # ---------------------------------------------------------------------------
-HTML_TEMPLATE = """<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="utf-8">
-<title>FeGenie report &mdash; {source}</title>
-<style>
-  :root {{
+REPORT_CSS = """\
+  :root {
     --fg: #1f2937;
     --muted: #6b7280;
     --bg: #ffffff;
     --panel: #f8fafc;
     --border: #e5e7eb;
     --accent: #2563eb;
-  }}
-  * {{ box-sizing: border-box; }}
-  body {{
+  }
+  * { box-sizing: border-box; }
+  body {
     font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
     color: var(--fg);
     background: var(--bg);
     margin: 0;
     padding: 32px 24px 64px;
     line-height: 1.5;
-  }}
-  .container {{ max-width: 1200px; margin: 0 auto; }}
-  header h1 {{
+  }
+  .container { max-width: 1200px; margin: 0 auto; }
+  header h1 {
     font-size: 1.6rem;
     margin: 0 0 4px;
-  }}
-  header p {{
+  }
+  header p {
     color: var(--muted);
     margin: 0 0 24px;
     font-size: 0.95rem;
-  }}
-  section {{
+  }
+  section {
     background: var(--panel);
     border: 1px solid var(--border);
     border-radius: 10px;
     padding: 18px 20px;
     margin-bottom: 28px;
-  }}
-  section h2 {{
+  }
+  section h2 {
     margin: 0 0 4px;
     font-size: 1.15rem;
-  }}
-  section p.desc {{
+  }
+  section p.desc {
     color: var(--muted);
     margin: 0 0 14px;
     font-size: 0.9rem;
-  }}
-  footer {{
+  }
+  footer {
     color: var(--muted);
     font-size: 0.8rem;
     text-align: center;
     margin-top: 32px;
-  }}
-  details summary {{
+  }
+  details summary {
     cursor: pointer;
     color: var(--accent);
     font-size: 0.9rem;
-  }}
-  table {{
+  }
+  table {
     border-collapse: collapse;
     margin-top: 10px;
     font-size: 0.85rem;
-  }}
-  th, td {{
+  }
+  th, td {
     border: 1px solid var(--border);
     padding: 4px 8px;
     text-align: right;
-  }}
-  th:first-child, td:first-child {{ text-align: left; }}
-  thead th {{ background: #eef2ff; }}
-</style>
+  }
+  th:first-child, td:first-child { text-align: left; }
+  thead th { background: #eef2ff; }
+  nav.tabs { display: flex; flex-wrap: wrap; gap: 6px; margin: 0 0 18px; }
+  nav.tabs button {
+    font: inherit;
+    font-size: 0.9rem;
+    padding: 6px 14px;
+    border: 1px solid var(--border);
+    border-radius: 999px;
+    background: var(--panel);
+    color: var(--fg);
+    cursor: pointer;
+  }
+  nav.tabs button.active { background: var(--accent); border-color: var(--accent); color: #fff; }
+"""
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>FeGenie report &mdash; {source}</title>
+<style>
+{style}</style>
 </head>
 <body>
 <div class="container">
@@ -486,7 +814,7 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 
   <section>
     <h2>Dot plot</h2>
-    <p class="desc">Mirrors the heatmap-format CSV. Marker size and color both encode the cell value; zeros are kept visible as small dots.</p>
+    <p class="desc">Mirrors the heatmap-format CSV. Marker size and color both encode the cell value; only non-zero cells are drawn, zeros are the empty background grid.</p>
     {dotplot_div}
   </section>
 
@@ -504,7 +832,7 @@ HTML_TEMPLATE = """<!DOCTYPE html>
   </section>
 
   <footer>
-    Generated by <code>Middle Author Bioinformatics</code>. Open this file in any modern browser &mdash; no internet required.
+    Generated by <code>Middle Author Bioinformatics</code>. {footer_note}
   </footer>
 </div>
 </body>
@@ -512,41 +840,336 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 """
 
 
+def plotly_bundle_name() -> str:
+    """Versioned file name of the shared plotly.js bundle, e.g. plotly-3.0.1.min.js."""
+    return f"plotly-{get_plotlyjs_version()}.min.js"
+
+
+def write_plotly_bundle(directory: Path) -> Path:
+    """Write the shared plotly.js bundle into `directory` unless it is already there.
+
+    The name carries the plotly.js version, so an existing file is always
+    the right one. Safe to call from several processes at once.
+    """
+    dest = Path(directory) / plotly_bundle_name()
+    if not dest.exists():
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        tmp.write_text(get_plotlyjs(), encoding="utf-8")
+        os.replace(tmp, dest)
+    return dest
+
+
+def _too_large_note(df: pd.DataFrame | SparseHeatmap, what: str, hint: str) -> str:
+    return (
+        f'<p class="desc">{df.shape[0]} &times; {df.shape[1]} cells is too large for '
+        f"the {what}; {hint}.</p>"
+    )
+
+
+def _too_many_hits_note(hits: int) -> str:
+    return (
+        f'<p class="desc">{hits} non-zero cells are too many for the dot plot; '
+        "see the heatmap.</p>"
+    )
+
+
 def build_html_report(
-    df: pd.DataFrame,
+    df: pd.DataFrame | SparseHeatmap,
     source_name: str,
     cluster_transform: str = "log1p",
     cluster_metric: str = "correlation",
     cluster_method: str = "average",
+    plotlyjs: str = "inline",
+    optimal_ordering: bool = False,
+    max_leaves: int = CLUSTER_MAX_LEAVES,
 ) -> str:
-    dot_fig = build_dotplot(df)
+    """Render the full report page.
+
+    `plotlyjs` is "inline" for a self-contained file, or the `src` of a
+    shared plotly.js bundle (e.g. plotly_bundle_name() when the bundle is
+    written next to the report with write_plotly_bundle()). Above
+    DOTPLOT_MAX_POINTS non-zero cells / TABLE_MAX_CELLS cells the dot plot
+    and raw table are replaced by a note; the heatmap carries the data at
+    any size.
+    """
     heat_fig = build_clustered_heatmap(
         df,
         cluster_transform=cluster_transform,
         cluster_metric=cluster_metric,
         cluster_method=cluster_method,
+        optimal_ordering=optimal_ordering,
+        max_leaves=max_leaves,
     )
 
-    # First figure includes the Plotly JS bundle inline; subsequent figures
-    # reuse it so the file stays self-contained but isn't duplicated.
-    dot_div = dot_fig.to_html(
-        include_plotlyjs="inline", full_html=False, div_id="dotplot"
-    )
+    # First figure on the page includes the Plotly JS bundle (inline, or a
+    # <script src> for the shared bundle); subsequent figures reuse it.
+    cells = _nonzero_cells(df)
+    if len(cells[2]) > DOTPLOT_MAX_POINTS:
+        dot_div = _too_many_hits_note(len(cells[2]))
+        heat_plotlyjs = plotlyjs
+    else:
+        dot_div = build_dotplot(df, cells).to_html(
+            include_plotlyjs=plotlyjs, full_html=False, div_id="dotplot"
+        )
+        heat_plotlyjs = False
     heat_div = heat_fig.to_html(
-        include_plotlyjs=False, full_html=False, div_id="heatmap"
+        include_plotlyjs=heat_plotlyjs, full_html=False, div_id="heatmap"
     )
 
-    table_html = df.to_html(
-        classes="rawdata", border=0, float_format=lambda v: f"{v:g}"
-    )
+    if df.size > TABLE_MAX_CELLS:
+        table_html = _too_large_note(df, "table", "the source CSV has every value")
+    else:
+        frame = df.to_frame() if isinstance(df, SparseHeatmap) else df
+        table_html = frame.to_html(
+            classes="rawdata", border=0, float_format=lambda v: f"{v:g}"
+        )
 
     return HTML_TEMPLATE.format(
+        style=REPORT_CSS,
         source=source_name,
         n_rows=df.shape[0],
         n_cols=df.shape[1],
         dotplot_div=dot_div,
         heatmap_div=heat_div,
         table_html=table_html,
+        footer_note=(
+            "Open this file in any modern browser &mdash; no internet required."
+            if plotlyjs == "inline"
+            else f"Keep <code>{plotlyjs}</code> next to this file to view it offline."
+        ),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Combined multi-Genie report
+# ---------------------------------------------------------------------------
+COMBINED_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>MagicLamp report &mdash; {title}</title>
+<style>
+{style}</style>
+</head>
+<body>
+<div class="container">
+  <header>
+    <h1>MagicLamp combined report</h1>
+    <p>{n_genies} Genies &middot; {n_cols} genomes &middot; genomes share one order, clustered on every Genie's category profile together</p>
+  </header>
+
+  <nav class="tabs">
+{tab_buttons}
+  </nav>
+
+{tab_panels}
+
+  <footer>
+    Generated by <code>Middle Author Bioinformatics</code>. {footer_note}
+  </footer>
+</div>
+<script>
+  function showTab(id) {{
+    document.querySelectorAll(".tab-panel").forEach(function (p) {{ p.hidden = p.id !== id; }});
+    document.querySelectorAll("nav.tabs button").forEach(function (b) {{
+      b.classList.toggle("active", b.dataset.tab === id);
+    }});
+    // Plots drawn while hidden have no width yet.
+    document.querySelectorAll("#" + id + " .plotly-graph-div").forEach(function (d) {{
+      Plotly.Plots.resize(d);
+    }});
+  }}
+  document.querySelectorAll("nav.tabs button").forEach(function (b) {{
+    b.addEventListener("click", function () {{
+      showTab(b.dataset.tab);
+      history.replaceState(null, "", "#" + b.dataset.tab);
+    }});
+  }});
+  var initial = decodeURIComponent(location.hash.slice(1));
+  showTab(initial && document.getElementById(initial) ? initial : "{first_tab}");
+</script>
+</body>
+</html>
+"""
+
+COMBINED_PANEL = """  <div class="tab-panel" id="{tab_id}">
+    <section>
+      <h2>{heading}</h2>
+      <p class="desc">{description}</p>
+      {heatmap_div}
+    </section>
+{extra}  </div>
+"""
+
+
+def genie_label(csv_path: Path) -> str:
+    """Genie name from a heatmap file name (`FeGenie.heatmap.csv`, `FeGenie-heatmap-data.csv`)."""
+    name = Path(csv_path).name
+    for suffix in (".heatmap.csv", "-heatmap-data.csv", ".csv"):
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[: -len(suffix)]
+    return Path(csv_path).stem
+
+
+def _tab_id(label: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "-" for c in label) or "genie"
+
+
+def align_genomes(
+    frames: dict[str, pd.DataFrame | SparseHeatmap],
+) -> dict[str, pd.DataFrame | SparseHeatmap]:
+    """Reindex every Genie's matrix onto the union of genomes (first-seen order).
+
+    A genome missing from one Genie's heatmap had no hits there, so it is
+    filled with zeros rather than left out. Sparse matrices stay sparse:
+    their stored cells are moved to the new column positions.
+    """
+    genomes: dict[str, None] = {}
+    for df in frames.values():
+        genomes.update(dict.fromkeys(df.columns))
+    order = list(genomes)
+    position = {genome: i for i, genome in enumerate(order)}
+
+    aligned = {}
+    for label, df in frames.items():
+        if isinstance(df, SparseHeatmap):
+            coo = df.values.tocoo()
+            cols = np.array([position[g] for g in df.columns], dtype=np.intp)[coo.col]
+            csr = sp.csr_matrix((coo.data, (coo.row, cols)), shape=(df.shape[0], len(order)))
+            aligned[label] = SparseHeatmap.from_csr(csr, df.index, order)
+        else:
+            aligned[label] = df.reindex(columns=order, fill_value=0.0)
+    return aligned
+
+
+def _stack_genies(
+    frames: dict[str, pd.DataFrame | SparseHeatmap],
+) -> pd.DataFrame | SparseHeatmap:
+    """Genome-aligned matrices stacked into one, rows labelled `<Genie>: <category>`.
+
+    Sparse if any input is sparse.
+    """
+    index = [f"{label}: {category}" for label, df in frames.items() for category in df.index]
+    columns = next(iter(frames.values())).columns
+    if any(isinstance(df, SparseHeatmap) for df in frames.values()):
+        csr = sp.vstack([sp.csr_matrix(_values(df)) for df in frames.values()], format="csr")
+        return SparseHeatmap.from_csr(csr, index, columns)
+    stacked = pd.concat(frames.values())
+    stacked.index = index
+    return stacked
+
+
+def shared_genome_clustering(
+    frames: dict[str, pd.DataFrame | SparseHeatmap],
+    cluster_transform: str = "log1p",
+    cluster_metric: str = "correlation",
+    cluster_method: str = "average",
+    optimal_ordering: bool = False,
+    max_leaves: int = CLUSTER_MAX_LEAVES,
+) -> tuple[np.ndarray | None, np.ndarray]:
+    """One genome clustering over every Genie's category profile.
+
+    Each Genie's matrix is transformed on its own (so column fractions stay
+    within a Genie), then the matrices are stacked category-wise and the
+    genomes clustered on the concatenated profiles. Returns the
+    (linkage, order) pair build_clustered_heatmap() takes as
+    `column_clustering`.
+    """
+    blocks = [_cluster_transform(_values(df), cluster_transform) for df in frames.values()]
+    if any(sp.issparse(block) for block in blocks):
+        stacked = sp.vstack([sp.csr_matrix(block) for block in blocks], format="csr")
+    else:
+        stacked = np.vstack(blocks)
+    return _cluster_order(stacked, axis=1, metric=cluster_metric, method=cluster_method,
+                          optimal_ordering=optimal_ordering, max_leaves=max_leaves)
+
+
+def build_combined_report(
+    frames: dict[str, pd.DataFrame | SparseHeatmap],
+    cluster_transform: str = "log1p",
+    cluster_metric: str = "correlation",
+    cluster_method: str = "average",
+    plotlyjs: str = "inline",
+    optimal_ordering: bool = False,
+    max_leaves: int = CLUSTER_MAX_LEAVES,
+) -> str:
+    """One tabbed page for several Genies' heatmaps, rendered in one pass.
+
+    The first tab stacks every Genie's categories against one genome axis;
+    each Genie then gets its own tab (clustered heatmap + dot plot) with the
+    genome columns in that same shared order. plotly.js is included once,
+    as in build_html_report(), and the same size limits apply per tab.
+    `#<Genie>` in the URL opens that Genie's tab.
+    """
+    frames = align_genomes(frames)
+    columns = shared_genome_clustering(
+        frames, cluster_transform, cluster_metric, cluster_method, optimal_ordering, max_leaves,
+    )
+    options = dict(
+        cluster_transform=cluster_transform,
+        cluster_metric=cluster_metric,
+        cluster_method=cluster_method,
+        column_clustering=columns,
+        optimal_ordering=optimal_ordering,
+        max_leaves=max_leaves,
+    )
+
+    stacked = _stack_genies(frames)
+    overview = build_clustered_heatmap(
+        stacked, cluster_rows=False, title="All Genies, genomes clustered together", **options,
+    )
+
+    buttons = ['    <button type="button" data-tab="all">All Genies</button>']
+    panels = [COMBINED_PANEL.format(
+        tab_id="all",
+        heading="All Genies",
+        description=(
+            "Every Genie's categories against one genome axis, grouped by Genie. "
+            "Genomes are clustered once on their combined category profile "
+            f"({cluster_transform}, {cluster_method} linkage, {cluster_metric} distance)."
+        ),
+        heatmap_div=overview.to_html(include_plotlyjs=plotlyjs, full_html=False, div_id="heatmap-all"),
+        extra="",
+    )]
+    for label, df in frames.items():
+        tab = _tab_id(label)
+        buttons.append(f'    <button type="button" data-tab="{tab}">{label}</button>')
+        heatmap = build_clustered_heatmap(df, title=f"{label}: clustered heatmap", **options)
+        cells = _nonzero_cells(df)
+        if len(cells[2]) > DOTPLOT_MAX_POINTS:
+            dotplot = _too_many_hits_note(len(cells[2]))
+        else:
+            dotplot = build_dotplot(df, cells).to_html(
+                include_plotlyjs=False, full_html=False, div_id=f"dotplot-{tab}"
+            )
+        panels.append(COMBINED_PANEL.format(
+            tab_id=tab,
+            heading=f"{label}: {df.shape[0]} categories",
+            description=(
+                "Categories are clustered within this Genie; genome columns keep "
+                "the order shared by every tab."
+            ),
+            heatmap_div=heatmap.to_html(include_plotlyjs=False, full_html=False, div_id=f"heatmap-{tab}"),
+            extra=(
+                "    <section>\n      <h2>Dot plot</h2>\n      "
+                + dotplot
+                + "\n    </section>\n"
+            ),
+        ))
+
+    return COMBINED_TEMPLATE.format(
+        style=REPORT_CSS,
+        title=", ".join(frames),
+        n_genies=len(frames),
+        n_cols=stacked.shape[1],
+        tab_buttons="\n".join(buttons),
+        tab_panels="".join(panels),
+        first_tab="all",
+        footer_note=(
+            "Open this file in any modern browser &mdash; no internet required."
+            if plotlyjs == "inline"
+            else f"Keep <code>{plotlyjs}</code> next to this file to view it offline."
+        ),
     )
 
 
@@ -556,15 +1179,40 @@ def build_html_report(
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(
         description="Generate an HTML report (dot plot + clustered heatmap) "
-        "from a FeGenie heatmap-format CSV file."
+        "from a FeGenie heatmap-format CSV file, or one tabbed report from "
+        "several Genies' heatmap CSVs."
+    )
+    parser.add_argument(
+        "csv",
+        type=Path,
+        nargs="+",
+        help="Input heatmap-format CSV; give several for a combined multi-Genie report",
     )
-    parser.add_argument("csv", type=Path, help="Input heatmap-format CSV")
     parser.add_argument(
         "-o",
         "--output",
         type=Path,
         default=None,
-        help="Output HTML path (default: <input>.report.html)",
+        help=(
+            "Output HTML path (default: <input>.report.html, or "
+            "combined-report.html beside the first input for several inputs)"
+        ),
+    )
+    parser.add_argument(
+        "--labels",
+        nargs="+",
+        default=None,
+        help="Genie names for the combined report's tabs (default: from the file names)",
+    )
+    parser.add_argument(
+        "--plotlyjs",
+        choices=["inline", "shared"],
+        default="inline",
+        help=(
+            "inline: embed plotly.js so the report is self-contained (default). "
+            "shared: write plotly-<version>.min.js next to the output (once) and "
+            "reference it, so several reports share one bundle."
+        ),
     )
     parser.add_argument(
         "--cluster-transform",
@@ -591,26 +1239,81 @@ def main(argv: list[str] | None = None) -> int:
         default="average",
         help="Linkage method passed to scipy.cluster.hierarchy.linkage. Default: average.",
     )
+    parser.add_argument(
+        "--optimal-ordering",
+        action="store_true",
+        help=(
+            "Reorder dendrogram leaves so adjacent leaves are as similar as "
+            "possible (scipy optimal leaf ordering). Slower; off by default."
+        ),
+    )
+    parser.add_argument(
+        "--cluster-max-leaves",
+        type=int,
+        default=CLUSTER_MAX_LEAVES,
+        help=(
+            "Cluster at most this many genomes (or categories) exactly; past it, "
+            "a random sample is clustered, the rest placed beside their nearest "
+            f"sampled neighbour, and that dendrogram is not drawn. Default: {CLUSTER_MAX_LEAVES}."
+        ),
+    )
+    parser.add_argument(
+        "--sparse",
+        choices=["auto", "on", "off"],
+        default="auto",
+        help=(
+            "Keep the matrix sparse (only non-zero cells are stored and drawn). "
+            f"auto: when it has at least {SPARSE_MIN_CELLS} cells and at most "
+            f"{SPARSE_MAX_DENSITY:.0%} of them non-zero. Default: auto."
+        ),
+    )
     args = parser.parse_args(argv)
 
-    if not args.csv.is_file():
-        print(f"Error: {args.csv} not found", file=sys.stderr)
+    for csv_path in args.csv:
+        if not csv_path.is_file():
+            print(f"Error: {csv_path} not found", file=sys.stderr)
+            return 2
+    if args.labels is not None and len(args.labels) != len(args.csv):
+        print("Error: --labels needs one name per input CSV", file=sys.stderr)
         return 2
 
-    out_path = args.output or args.csv.with_suffix(".report.html")
-
-    df = load_heatmap_csv(args.csv)
-    if df.empty:
-        print("Error: input CSV produced an empty data frame", file=sys.stderr)
-        return 2
-
-    html = build_html_report(
-        df,
-        source_name=args.csv.name,
+    combined = len(args.csv) > 1
+    if args.output:
+        out_path = args.output
+    elif combined:
+        out_path = args.csv[0].with_name("combined-report.html")
+    else:
+        out_path = args.csv[0].with_suffix(".report.html")
+
+    labels = args.labels or [genie_label(p) for p in args.csv]
+    frames: dict[str, pd.DataFrame | SparseHeatmap] = {}
+    for label, csv_path in zip(labels, args.csv):
+        df = load_heatmap_csv(csv_path, sparse={"auto": None, "on": True, "off": False}[args.sparse])
+        if df.empty:
+            print(f"Error: {csv_path} produced an empty data frame", file=sys.stderr)
+            return 2
+        frames[label] = df
+
+    plotlyjs = "inline"
+    if args.plotlyjs == "shared":
+        plotlyjs = write_plotly_bundle(out_path.resolve().parent).name
+    clustering = dict(
         cluster_transform=args.cluster_transform,
         cluster_metric=args.cluster_metric,
         cluster_method=args.cluster_method,
+        optimal_ordering=args.optimal_ordering,
+        max_leaves=max(2, args.cluster_max_leaves),
     )
+
+    if combined:
+        html = build_combined_report(frames, plotlyjs=plotlyjs, **clustering)
+        out_path.write_text(html, encoding="utf-8")
+        n_genomes = len(align_genomes(frames)[labels[0]].columns)
+        print(f"Wrote {out_path}  ({len(frames)} Genies x {n_genomes} genomes)")
+        return 0
+
+    df = frames[labels[0]]
+    html = build_html_report(df, source_name=args.csv[0].name, plotlyjs=plotlyjs, **clustering)
     out_path.write_text(html, encoding="utf-8")
     print(f"Wrote {out_path}  ({df.shape[0]} categories x {df.shape[1]} genomes)")
     return 0
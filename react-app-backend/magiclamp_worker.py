@@ -12,7 +12,8 @@ What it does
 4. Validates that uploaded genomes are FASTA contigs or **annotated** GenBank
    files (CDS + gene + /product or /gene qualifiers). Re-runs the same
    inspection the browser did so the trust boundary is at the worker.
-5. Normalizes input file extensions into a clean run directory.
+5. Unpacks compressed uploads (.gz/.bgz genomes, .zip/.tar.gz bundles) and
+   normalizes input file extensions into a clean run directory.
 6. Routes to the matching MagicLamp.py subcommand — see GENIE_DISPATCH below.
 7. Writes frontend-ready results to:
      s3://<results-bucket>/magiclamp-<slug>/
@@ -55,41 +56,61 @@ If MagicLamp.py is already on PATH in the active environment, omit
 from __future__ import annotations
 
 import argparse
+import copy
+import contextlib
 import csv
+import fnmatch
+import gzip
+import hashlib
+import importlib.util
 import json
 import logging
 import os
 import re
+import resource
 import shutil
+import sqlite3
 import subprocess
 import sys
 import tarfile
+import threading
 import time
+import urllib.parse
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable
+from typing import BinaryIO, Callable, Iterable, Iterator
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
+from magiclamp_merge import merge_heatmap_csvs, merge_summary_csvs
+
 
 # ---------- File-format constants -------------------------------------------
 FASTA_EXTS = {".fa", ".fasta", ".fna"}
 GENBANK_EXTS = {".gb", ".gbk", ".gbff", ".gbf", ".genbank"}
 HMM_EXTS = {".hmm"}
+# Single-file compression around any of the above (bgzip is multi-member gzip).
+COMPRESSED_INPUT_EXTS = {".gz", ".bgz"}
+# Bundles of genomes and/or HMMs.
+ARCHIVE_INPUT_EXTS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
 # Files in the input prefix that are NOT inputs to MagicLamp itself.
 SKIP_INPUT_NAMES = {"form-data.txt"}
 
 PREFIX_RE = re.compile(r"^magiclamp-(?P<slug>[A-Za-z0-9]+)/$")
 # Recognise an annotated GenBank record: feature table + CDS + gene + a
 # /product= or /gene= qualifier (loose checks, mirroring the browser inspector).
-GENBANK_FEATURES_RE = re.compile(r"^FEATURES\s+Location/Qualifiers", re.MULTILINE)
-GENBANK_CDS_RE = re.compile(r"^\s{5}CDS\s+", re.MULTILINE)
-GENBANK_GENE_RE = re.compile(r"^\s{5}gene\s+", re.MULTILINE)
-GENBANK_PRODUCT_RE = re.compile(r"/product=")
-GENBANK_GENE_QUAL_RE = re.compile(r"/gene=")
+# Matched line by line against raw bytes by scan_genbank().
+GENBANK_FEATURES_RE = re.compile(rb"FEATURES\s+Location/Qualifiers")
+GENBANK_CDS_RE = re.compile(rb"\s{5}CDS\s+")
+GENBANK_GENE_RE = re.compile(rb"\s{5}gene\s+")
+GENBANK_PRODUCT_RE = re.compile(rb"/product=")
+GENBANK_GENE_QUAL_RE = re.compile(rb"/gene=")
 
 
 # ---------- Genie dispatch ---------------------------------------------------
@@ -222,7 +243,17 @@ def configure_logging(log_path: Path, verbose: bool = False) -> None:
     )
 
 
-def make_s3(region: str):
+# Parallel parts per object in a managed transfer. A client shared by N
+# transfer threads needs N * TRANSFER_CONCURRENCY pooled connections.
+TRANSFER_CONCURRENCY = 4
+DOWNLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=32 * 1024 * 1024,
+    multipart_chunksize=32 * 1024 * 1024,
+    max_concurrency=TRANSFER_CONCURRENCY,
+)
+
+
+def make_s3(region: str, max_pool_connections: int = 10):
     # Important: use the regional endpoint, otherwise browser presigned PUTs
     # may CORS-fail after an S3 redirect from s3.amazonaws.com to the bucket
     # region. (Same rationale as the FeGenie worker.)
@@ -230,10 +261,34 @@ def make_s3(region: str):
         "s3",
         region_name=region,
         endpoint_url=f"https://s3.{region}.amazonaws.com",
-        config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"}),
+        config=Config(
+            signature_version="s3v4",
+            s3={"addressing_style": "virtual"},
+            max_pool_connections=max_pool_connections,
+        ),
     )
 
 
+# Uploads: small artifacts go in one PUT; anything past the threshold (in
+# practice the results tarball) goes up in large parts, many at once.
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=64 * 1024 * 1024,
+    multipart_chunksize=64 * 1024 * 1024,
+    max_concurrency=TRANSFER_CONCURRENCY,
+)
+LARGE_UPLOAD_CONCURRENCY = 16
+LARGE_UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=64 * 1024 * 1024,
+    multipart_chunksize=128 * 1024 * 1024,
+    max_concurrency=LARGE_UPLOAD_CONCURRENCY,
+)
+
+
+def s3_pool_size(args) -> int:
+    per_file = max(args.download_workers, args.upload_workers) * TRANSFER_CONCURRENCY
+    return max(10, per_file + LARGE_UPLOAD_CONCURRENCY)
+
+
 def s3_key_exists(s3, bucket: str, key: str) -> bool:
     try:
         s3.head_object(Bucket=bucket, Key=key)
@@ -254,11 +309,71 @@ def put_json(s3, bucket: str, key: str, payload: dict) -> None:
     )
 
 
-def upload_file(s3, bucket: str, key: str, path: Path, content_type: str | None = None) -> None:
+def get_json(s3, bucket: str, key: str) -> dict | None:
+    """Parsed JSON object at `key`, or None if it does not exist."""
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        if code in {"404", "NoSuchKey", "NotFound"}:
+            return None
+        raise
+    return json.loads(body)
+
+
+def upload_file(
+    s3,
+    bucket: str,
+    key: str,
+    path: Path,
+    content_type: str | None = None,
+    config: TransferConfig | None = None,
+    cache_control: str | None = None,
+) -> None:
     extra = {}
     if content_type:
         extra["ContentType"] = content_type
-    s3.upload_file(str(path), bucket, key, ExtraArgs=extra)
+    if cache_control:
+        extra["CacheControl"] = cache_control
+    s3.upload_file(str(path), bucket, key, ExtraArgs=extra, Config=config or UPLOAD_TRANSFER_CONFIG)
+
+
+@dataclass
+class Artifact:
+    """One result file to publish under the job's results prefix."""
+    key: str
+    path: Path
+    content_type: str
+    cache_control: str | None = None
+
+
+def publish_artifacts(s3, bucket: str, artifacts: list[Artifact], workers: int = 8) -> None:
+    """Upload every artifact concurrently; return only once all are acknowledged.
+
+    Files past the multipart threshold use LARGE_UPLOAD_TRANSFER_CONFIG so
+    the tarball's parts go up in parallel alongside the small files. If any
+    upload fails, the rest are still waited for and the first error is
+    raised — callers write status.json only after this returns.
+    """
+    if not artifacts:
+        return
+
+    def _put(artifact: Artifact) -> None:
+        big = artifact.path.stat().st_size >= LARGE_UPLOAD_TRANSFER_CONFIG.multipart_threshold
+        upload_file(
+            s3, bucket, artifact.key, artifact.path, artifact.content_type,
+            LARGE_UPLOAD_TRANSFER_CONFIG if big else UPLOAD_TRANSFER_CONFIG,
+            artifact.cache_control,
+        )
+        logging.info("Uploaded %s -> s3://%s/%s", artifact.path.name, bucket, artifact.key)
+
+    # Largest first, so the long tarball upload starts right away.
+    ordered = sorted(artifacts, key=lambda a: a.path.stat().st_size, reverse=True)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(ordered)))) as pool:
+        futures = [pool.submit(_put, a) for a in ordered]
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if errors:
+        raise errors[0]
 
 
 # ---------- S3 polling ------------------------------------------------------
@@ -278,22 +393,264 @@ def manifest_key_for(prefix: str) -> str:
     return f"{prefix}form-data.txt"
 
 
-def download_prefix(s3, bucket: str, prefix: str, dest: Path) -> list[Path]:
+def verify_download(local: Path, obj: dict) -> str | None:
+    """Compare a downloaded file with its listing entry. Returns a reason on mismatch.
+
+    Size is always checked. Single-part uploads also get an MD5 check against
+    the ETag; multipart ETags (containing '-') are not content MD5s.
+    """
+    size = local.stat().st_size
+    if size != obj["Size"]:
+        return f"size {size} != {obj['Size']}"
+    etag = obj.get("ETag", "").strip('"')
+    if re.fullmatch(r"[0-9a-f]{32}", etag):
+        h = hashlib.md5()
+        with local.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                h.update(chunk)
+        if h.hexdigest() != etag:
+            return f"md5 {h.hexdigest()} != ETag {etag}"
+    return None
+
+
+def download_prefix(
+    s3,
+    bucket: str,
+    prefix: str,
+    dest: Path,
+    workers: int = 8,
+    on_file: Callable[[Path], None] | None = None,
+) -> list[Path]:
+    """Download every object under `prefix` into `dest`, `workers` at a time.
+
+    The listing is taken up front, then objects download concurrently over
+    the shared (thread-safe) client. Each file is verified against its
+    listing entry, retried once on mismatch, and handed to `on_file` from
+    the download thread as soon as it is complete — so per-genome checks can
+    start while the rest of the upload is still arriving. Returns local
+    paths in key order.
+    """
     dest.mkdir(parents=True, exist_ok=True)
-    downloaded: list[Path] = []
+    objects: list[dict] = []
     paginator = s3.get_paginator("list_objects_v2")
     for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            key = obj["Key"]
-            if key.endswith("/"):
-                continue
-            rel = Path(key).relative_to(prefix)
-            local = dest / rel
-            local.parent.mkdir(parents=True, exist_ok=True)
-            s3.download_file(bucket, key, str(local))
-            downloaded.append(local)
-            logging.info("Downloaded s3://%s/%s -> %s", bucket, key, local)
-    return downloaded
+        objects.extend(obj for obj in page.get("Contents", []) if not obj["Key"].endswith("/"))
+
+    def _fetch(obj: dict) -> Path:
+        key = obj["Key"]
+        local = dest / Path(key).relative_to(prefix)
+        local.parent.mkdir(parents=True, exist_ok=True)
+        for attempt in (1, 2):
+            s3.download_file(bucket, key, str(local), Config=DOWNLOAD_TRANSFER_CONFIG)
+            problem = verify_download(local, obj)
+            if problem is None:
+                break
+            logging.warning("Download check failed for s3://%s/%s (%s), attempt %d.", bucket, key, problem, attempt)
+        else:
+            raise RuntimeError(f"Download of s3://{bucket}/{key} failed verification: {problem}")
+        logging.info("Downloaded s3://%s/%s -> %s", bucket, key, local)
+        if on_file is not None:
+            on_file(local)
+        return local
+
+    if not objects:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(objects)))) as pool:
+        return list(pool.map(_fetch, objects))
+
+
+# ---------- Job intake ------------------------------------------------------
+#
+# Where the scheduler gets job prefixes from (--intake):
+#
+#   poll         LIST the whole input bucket every cycle and let process_job
+#                head_object status.json / form-data.txt for every prefix ever
+#                uploaded. Cost grows with the bucket's history.
+#   incremental  Same LIST, but prefixes that already reached a final state
+#                are remembered in a local SQLite index (--intake-index) and
+#                never looked at again.
+#   queue        Consume S3 ObjectCreated notifications for form-data.txt from
+#                --intake-queue (an SQS queue URL, or sqlite:///path/queue.db as
+#                a local stand-in). No LIST at all; with a short --interval
+#                jobs are picked up within seconds.
+#
+# process_job reports how each job ended; JOB_FINAL_STATES are remembered in
+# the index, anything else (e.g. form-data.txt not uploaded yet) is retried.
+JOB_FINAL_STATES = {"complete", "failed", "skipped"}
+
+
+class JobIndex:
+    """Local SQLite record of job prefixes the intake has seen."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " prefix TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def set_state(self, prefix: str, state: str) -> None:
+        self.conn.execute(
+            "INSERT INTO jobs (prefix, state, updated_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(prefix) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (prefix, state, utc_now()),
+        )
+        self.conn.commit()
+
+    def prefixes(self, state: str) -> set[str]:
+        rows = self.conn.execute("SELECT prefix FROM jobs WHERE state = ?", (state,))
+        return {prefix for (prefix,) in rows}
+
+
+class PollIntake:
+    """Full-bucket LIST every cycle (the original behaviour)."""
+
+    def __init__(self, s3, input_bucket: str):
+        self.s3 = s3
+        self.input_bucket = input_bucket
+
+    def pending(self) -> list[str]:
+        return list_job_prefixes(self.s3, self.input_bucket)
+
+    def mark(self, prefix: str, state: str | None) -> None:
+        pass
+
+
+class IncrementalIntake(PollIntake):
+    """LIST every cycle, but skip prefixes already finished according to the index."""
+
+    def __init__(self, s3, input_bucket: str, index: JobIndex):
+        super().__init__(s3, input_bucket)
+        self.index = index
+
+    def pending(self) -> list[str]:
+        done = self.index.prefixes("done")
+        return [p for p in list_job_prefixes(self.s3, self.input_bucket) if p not in done]
+
+    def mark(self, prefix: str, state: str | None) -> None:
+        if state in JOB_FINAL_STATES:
+            self.index.set_state(prefix, "done")
+
+
+def prefixes_from_s3_event(body: str) -> list[str]:
+    """Job prefixes whose form-data.txt appears in an S3 event notification.
+
+    Accepts the raw S3 event JSON as well as the SNS envelope around it.
+    Anything else (s3:TestEvent, other keys) yields nothing.
+    """
+    try:
+        event = json.loads(body)
+        if "Message" in event and "Records" not in event:
+            event = json.loads(event["Message"])
+    except (TypeError, ValueError):
+        return []
+    prefixes: list[str] = []
+    for record in event.get("Records", []) if isinstance(event, dict) else []:
+        key = urllib.parse.unquote_plus(record.get("s3", {}).get("object", {}).get("key", ""))
+        prefix, _, name = key.rpartition("/")
+        prefix = f"{prefix}/"
+        if name == "form-data.txt" and PREFIX_RE.match(prefix) and prefix not in prefixes:
+            prefixes.append(prefix)
+    return prefixes
+
+
+class SqliteMessageQueue:
+    """Local stand-in for SQS: one message body per row in a SQLite file."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, body TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def send(self, body: str) -> None:
+        self.conn.execute("INSERT INTO messages (body) VALUES (?)", (body,))
+        self.conn.commit()
+
+    def receive(self, max_messages: int = 10) -> list[tuple[int, str]]:
+        """Up to max_messages (handle, body) pairs; they stay queued until delete()."""
+        return self.conn.execute(
+            "SELECT id, body FROM messages ORDER BY id LIMIT ?", (max_messages,)
+        ).fetchall()
+
+    def delete(self, handles: list[int]) -> None:
+        with self.conn:
+            self.conn.executemany("DELETE FROM messages WHERE id = ?", [(h,) for h in handles])
+
+
+class SqsMessageQueue:
+    """S3 event notifications delivered through an SQS queue (long polling)."""
+
+    def __init__(self, queue_url: str, region: str, wait_seconds: int = 20):
+        self.sqs = boto3.client("sqs", region_name=region)
+        self.queue_url = queue_url
+        self.wait_seconds = wait_seconds
+
+    def receive(self, max_messages: int = 10) -> list[tuple[str, str]]:
+        """(receipt handle, body) pairs; SQS redelivers them unless delete() is called."""
+        resp = self.sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=max_messages,
+            WaitTimeSeconds=self.wait_seconds,
+        )
+        return [(m["ReceiptHandle"], m["Body"]) for m in resp.get("Messages", [])]
+
+    def delete(self, handles: list[str]) -> None:
+        if handles:
+            self.sqs.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{"Id": str(i), "ReceiptHandle": h} for i, h in enumerate(handles)],
+            )
+
+
+class QueueIntake:
+    """Job prefixes from S3 event notifications, persisted in the local index.
+
+    A notification is recorded as `queued` in the index before it is
+    deleted from the queue, so a worker restart does not lose jobs.
+    """
+
+    def __init__(self, queue, index: JobIndex):
+        self.queue = queue
+        self.index = index
+
+    def pending(self) -> list[str]:
+        while True:
+            messages = self.queue.receive()
+            if not messages:
+                break
+            for _, body in messages:
+                for prefix in prefixes_from_s3_event(body):
+                    self.index.set_state(prefix, "queued")
+            # Only once the whole batch is in the index; a crash before this
+            # leaves the messages to be received again.
+            self.queue.delete([handle for handle, _ in messages])
+            if len(messages) < 10:
+                break
+        return sorted(self.index.prefixes("queued"))
+
+    def mark(self, prefix: str, state: str | None) -> None:
+        if state in JOB_FINAL_STATES:
+            self.index.set_state(prefix, "done")
+
+
+def make_intake(args, s3):
+    if args.intake == "poll":
+        return PollIntake(s3, args.input_bucket)
+    index = JobIndex(Path(args.intake_index or Path(args.work_root) / "intake-index.sqlite"))
+    if args.intake == "incremental":
+        return IncrementalIntake(s3, args.input_bucket, index)
+    if not args.intake_queue:
+        raise RuntimeError("--intake queue needs --intake-queue (an SQS URL or sqlite:///path).")
+    if args.intake_queue.startswith("sqlite://"):
+        queue = SqliteMessageQueue(Path(args.intake_queue[len("sqlite://"):]))
+    else:
+        queue = SqsMessageQueue(args.intake_queue, args.region, wait_seconds=min(20, max(0, args.interval)))
+    return QueueIntake(queue, index)
 
 
 # ---------- Manifest parsing ------------------------------------------------
@@ -364,30 +721,466 @@ def safe_output_name(name: str) -> str:
     return re.sub(r"[^A-Za-z0-9._-]+", "_", name)
 
 
-def is_annotated_genbank(path: Path, sniff_bytes: int = 1024 * 1024) -> tuple[bool, str | None]:
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def open_genome(path: Path) -> BinaryIO:
+    """Open a genome for binary reading, transparently gunzipping gzip/bgzip input."""
+    with path.open("rb") as fh:
+        magic = fh.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, "rb")
+    return path.open("rb")
+
+
+@dataclass
+class GenbankRecordCheck:
+    """Annotation verdict for one LOCUS record of a GenBank file."""
+    locus: str
+    annotated: bool
+    reason: str | None = None
+
+
+@dataclass
+class GenbankReport:
+    """Whole-file GenBank validation result.
+
+    A file passes when it is structurally sound (every record opens with
+    LOCUS and closes with //, no binary junk, intact gzip stream) and at
+    least one record is annotated. Unannotated records in a passing file —
+    typically plasmids or tiny contigs — are reported but do not reject it.
+    """
+    name: str
+    records: list[GenbankRecordCheck] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and any(r.annotated for r in self.records)
+
+    @property
+    def reason(self) -> str | None:
+        if self.error:
+            return self.error
+        if self.ok:
+            return None
+        if len(self.records) == 1:
+            return self.records[0].reason
+        return "no annotated records (" + "; ".join(
+            f"{r.locus}: {r.reason}" for r in self.records[:5]
+        ) + (", ..." if len(self.records) > 5 else "") + ")"
+
+    def summary(self) -> dict:
+        """Compact, JSON-ready form for status.json."""
+        return {
+            "ok": self.ok,
+            "reason": self.reason,
+            "records": len(self.records),
+            "unannotated_records": [
+                {"locus": r.locus, "reason": r.reason} for r in self.records if not r.annotated
+            ][:20],
+        }
+
+
+def _record_check(locus: str, features: bool, cds: bool, gene: bool, qualifier: bool) -> GenbankRecordCheck:
+    if not features:
+        return GenbankRecordCheck(locus, False, "missing FEATURES table")
+    if not cds:
+        return GenbankRecordCheck(locus, False, "missing CDS features")
+    if not gene:
+        return GenbankRecordCheck(locus, False, "missing gene features")
+    if not qualifier:
+        return GenbankRecordCheck(locus, False, "missing /product or /gene qualifiers")
+    return GenbankRecordCheck(locus, True)
+
+
+def scan_genbank(path: Path) -> GenbankReport:
+    """Validate every LOCUS record of a (possibly gzipped) GenBank file.
+
+    Streams the file line by line, so memory stays flat and the whole file
+    is checked rather than a leading sniff. Sequence (ORIGIN) sections are
+    only scanned for the // terminator and stray binary bytes.
+    """
+    report = GenbankReport(name=path.name)
+    locus: str | None = None
+    in_origin = False
+    features = cds = gene = qualifier = False
+    lineno = 0
+    try:
+        with open_genome(path) as fh:
+            for lineno, line in enumerate(fh, 1):
+                if b"\x00" in line:
+                    report.error = f"binary data at line {lineno}"
+                    return report
+                if line.startswith(b"//"):
+                    if locus is None:
+                        report.error = f"// without a LOCUS record at line {lineno}"
+                        return report
+                    report.records.append(_record_check(locus, features, cds, gene, qualifier))
+                    locus = None
+                    continue
+                if line.startswith(b"LOCUS"):
+                    if locus is not None:
+                        report.error = f"record {locus} is not terminated by // (line {lineno})"
+                        return report
+                    parts = line.split()
+                    locus = parts[1].decode("utf-8", "replace") if len(parts) > 1 else f"record{len(report.records) + 1}"
+                    in_origin = False
+                    features = cds = gene = qualifier = False
+                    continue
+                if locus is None:
+                    if line.strip():
+                        report.error = f"text outside a LOCUS record at line {lineno}"
+                        return report
+                    continue
+                if in_origin:
+                    continue
+                if line.startswith(b"ORIGIN"):
+                    in_origin = True
+                elif GENBANK_FEATURES_RE.match(line):
+                    features = True
+                elif line.startswith(b"     "):
+                    if not cds and GENBANK_CDS_RE.match(line):
+                        cds = True
+                    elif not gene and GENBANK_GENE_RE.match(line):
+                        gene = True
+                    elif not qualifier and (GENBANK_PRODUCT_RE.search(line) or GENBANK_GENE_QUAL_RE.search(line)):
+                        qualifier = True
+    except (OSError, EOFError, gzip.BadGzipFile) as e:
+        report.error = f"could not read file: {e}"
+        return report
+
+    if locus is not None:
+        report.error = f"record {locus} is truncated (no // before end of file)"
+    elif not report.records:
+        report.error = "no LOCUS records" if lineno else "empty file"
+    return report
+
+
+def is_annotated_genbank(path: Path) -> tuple[bool, str | None]:
     """Re-implement the browser's GenBank annotation check on the worker.
 
-    Reads up to `sniff_bytes` of the file. Returns (is_annotated, reason).
+    Scans the whole file (see scan_genbank). Returns (is_annotated, reason).
+    """
+    report = scan_genbank(path)
+    return report.ok, report.reason
+
+
+# Bytes accepted in nucleotide sequence lines: IUPAC codes (either case),
+# gaps and stop/mask characters some assemblers emit.
+FASTA_NUCLEOTIDES = b"ACGTURYKMSWBDHVNacgturykmswbdhvn-.*"
+FASTA_WHITESPACE = b" \t\r\n"
+FASTA_CHUNK_BYTES = 4 * 1024 * 1024
+# Flag (not reject) assemblies that look suspicious but may still be usable.
+FASTA_MIN_TOTAL_LENGTH = 10_000
+FASTA_MAX_N_FRACTION = 0.5
+
+
+@dataclass
+class FastaReport:
+    """Single-pass FASTA validation and assembly statistics for one genome."""
+    name: str
+    contigs: int = 0
+    total_length: int = 0
+    n50: int = 0
+    gc: float = 0.0
+    n_fraction: float = 0.0
+    error: str | None = None
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def reason(self) -> str | None:
+        return self.error
+
+    def stats(self) -> dict:
+        return {
+            "contigs": self.contigs,
+            "total_length": self.total_length,
+            "n50": self.n50,
+            "gc": round(self.gc, 4),
+            "n_fraction": round(self.n_fraction, 4),
+        }
+
+    def summary(self) -> dict:
+        """Compact, JSON-ready form for status.json."""
+        return {"ok": self.ok, "reason": self.reason, "warnings": self.warnings}
+
+
+def n50(lengths: list[int]) -> int:
+    """Length of the contig at which sorted cumulative length reaches half the total."""
+    half = sum(lengths) / 2
+    running = 0
+    for length in sorted(lengths, reverse=True):
+        running += length
+        if running >= half:
+            return length
+    return 0
+
+
+def scan_fasta(path: Path) -> FastaReport:
+    """Validate a (possibly gzipped) nucleotide FASTA and compute its stats.
+
+    Reads the file once in large chunks; sequence runs between headers are
+    counted with bytes.count/translate, so the per-byte work stays in C.
+    Rejects empty files, FASTQ, protein FASTA and anything else that is not
+    nucleotide sequence; odd-but-usable assemblies only get warnings.
     """
+    report = FastaReport(name=path.name)
+    lengths: list[int] = []
+    current: int | None = None
+    acgtn = gc = ns = invalid = 0
+    # Bytes not scanned yet. Only a header (or the first line) has to be
+    # complete before it is scanned; a sequence line is scanned piecewise,
+    # so a single-line chromosome never piles up here.
+    tail = bytearray()
+    line_start = True  # the next scanned byte begins a line
+    started = False
     try:
-        with path.open("r", encoding="utf-8", errors="replace") as fh:
-            head = fh.read(sniff_bytes)
-    except OSError as e:
-        return False, f"could not read file: {e}"
+        with open_genome(path) as fh:
+            while True:
+                chunk = fh.read(FASTA_CHUNK_BYTES)
+                if chunk:
+                    tail += chunk
+                    newline = chunk.rfind(b"\n")
+                    if newline != -1:
+                        cut = len(tail) - len(chunk) + newline + 1
+                    elif started and not (line_start and tail[:1] == b">"):
+                        cut = len(tail)
+                    else:
+                        continue
+                    text = bytes(tail[:cut])
+                    del tail[:cut]
+                else:
+                    text = bytes(tail)
+                    tail.clear()
+                    if not text:
+                        break
+
+                if not started:
+                    text = text.lstrip(FASTA_WHITESPACE)
+                    if not text:
+                        continue
+                    if text.startswith(b"@"):
+                        report.error = "looks like FASTQ, not FASTA"
+                        return report
+                    if not text.startswith(b">"):
+                        report.error = "does not start with a '>' header"
+                        return report
+                    started = True
+                    line_start = True
+
+                pos = 0
+                while pos < len(text):
+                    if text[pos] == 0x3E and (pos or line_start):  # '>' opening a line
+                        end = text.find(b"\n", pos)
+                        pos = len(text) if end == -1 else end + 1
+                        if current is not None:
+                            lengths.append(current)
+                        current = 0
+                        continue
+                    nxt = text.find(b"\n>", pos)
+                    end = len(text) if nxt == -1 else nxt + 1
+                    seq = text[pos:end].translate(None, FASTA_WHITESPACE)
+                    pos = end
+                    if b"\x00" in seq:
+                        report.error = "contains binary data"
+                        return report
+                    current += len(seq)
+                    bad = len(seq.translate(None, FASTA_NUCLEOTIDES))
+                    if bad:
+                        invalid += bad
+                        continue
+                    g_c = seq.count(b"G") + seq.count(b"C") + seq.count(b"g") + seq.count(b"c")
+                    n = seq.count(b"N") + seq.count(b"n")
+                    gc += g_c
+                    ns += n
+                    acgtn += len(seq) - len(seq.translate(None, b"ACGTUNacgtun"))
+                line_start = text.endswith(b"\n")
+                if not chunk:
+                    break
+    except (OSError, EOFError, gzip.BadGzipFile) as e:
+        report.error = f"could not read file: {e}"
+        return report
+
+    if current is not None:
+        lengths.append(current)
+    report.contigs = len(lengths)
+    report.total_length = sum(lengths)
+    if not started or not lengths:
+        report.error = "empty file"
+        return report
+    if report.total_length == 0:
+        report.error = "no sequence data"
+        return report
+    if invalid:
+        report.error = (
+            f"{invalid} non-nucleotide characters"
+            + (" (protein FASTA?)" if invalid > report.total_length / 10 else "")
+        )
+        return report
+    if acgtn < report.total_length / 2:
+        report.error = "mostly ambiguity codes; looks like protein FASTA"
+        return report
+
+    report.n50 = n50(lengths)
+    called = report.total_length - ns
+    report.gc = gc / called if called else 0.0
+    report.n_fraction = ns / report.total_length
+    empty = sum(1 for length in lengths if length == 0)
+    if empty:
+        report.warnings.append(f"{empty} empty contig(s)")
+    if report.total_length < FASTA_MIN_TOTAL_LENGTH:
+        report.warnings.append(f"only {report.total_length} bp of sequence")
+    if report.n_fraction > FASTA_MAX_N_FRACTION:
+        report.warnings.append(f"{report.n_fraction:.0%} N")
+    return report
+
+
+def scan_genome(path: Path) -> GenbankReport | FastaReport | None:
+    """Dispatch to the validator for the file's format (None if it has none)."""
+    suffix = path.suffix.lower()
+    if suffix in GENBANK_EXTS:
+        return scan_genbank(path)
+    if suffix in FASTA_EXTS:
+        return scan_fasta(path)
+    return None
+
+
+# Linux ioctl that clones a file's extents (btrfs, XFS with reflink=1, ...).
+FICLONE = 0x40049409
 
-    if not GENBANK_FEATURES_RE.search(head):
-        return False, "missing FEATURES table"
-    if not GENBANK_CDS_RE.search(head):
-        return False, "missing CDS features"
-    if not GENBANK_GENE_RE.search(head):
-        return False, "missing gene features"
-    if not (GENBANK_PRODUCT_RE.search(head) or GENBANK_GENE_QUAL_RE.search(head)):
-        return False, "missing /product or /gene qualifiers"
-    return True, None
 
+def reflink(src: Path, dest: Path) -> bool:
+    """Copy-on-write clone of `src` at `dest`. False if the filesystem can't.
 
-def split_inputs(job_dir: Path) -> tuple[list[Path], list[Path]]:
-    """Sort uploaded files into (genomes, hmms). Skips the manifest itself."""
+    Clones into a fresh temporary file and renames it over `dest`: opening an
+    existing `dest` for writing would truncate `src` too when the two share
+    an inode (a stale hard-linked staging copy).
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+    try:
+        with src.open("rb") as s, tmp.open("xb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dest)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def link_or_copy(src: Path, dest: Path) -> str:
+    """Stage `src` at `dest` without copying bytes where possible.
+
+    Tries a hard link, then a reflink, then falls back to a real copy.
+    Staged inputs are only ever read, so sharing the inode with the
+    downloaded file (or a cache entry) is safe. Returns the method used.
+    """
+    try:
+        os.link(src, dest)
+        return "link"
+    except OSError:
+        pass
+    if reflink(src, dest):
+        return "reflink"
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+def input_kind(name: str) -> str | None:
+    """Classify an upload by name: genome, hmm, compressed, archive or None."""
+    lower = name.lower()
+    if lower.endswith(ARCHIVE_INPUT_EXTS):
+        return "archive"
+    stem, suffix = os.path.splitext(lower)
+    if suffix in COMPRESSED_INPUT_EXTS:
+        inner = os.path.splitext(stem)[1]
+        return "compressed" if inner in FASTA_EXTS | GENBANK_EXTS | HMM_EXTS else None
+    if suffix in HMM_EXTS:
+        return "hmm"
+    if suffix in FASTA_EXTS or suffix in GENBANK_EXTS:
+        return "genome"
+    return None
+
+
+def _unpack_stream(stream: BinaryIO, name: str, dest_dir: Path) -> Path | None:
+    """Stream one genome/HMM (optionally gzipped) into dest_dir; None if not one."""
+    name = Path(name).name
+    kind = input_kind(name)
+    if not name or name.startswith(".") or kind not in ("genome", "hmm", "compressed"):
+        return None
+    if kind == "compressed":
+        stream = gzip.GzipFile(fileobj=stream)
+        name = os.path.splitext(name)[0]
+    stem, suffix = os.path.splitext(name)
+    dest = dest_dir / name
+    i = 2
+    while dest.exists():
+        dest = dest_dir / f"{stem}_{i}{suffix}"
+        i += 1
+    tmp = dest.with_name(dest.name + ".part")
+    with tmp.open("wb") as out:
+        shutil.copyfileobj(stream, out, 1024 * 1024)
+    os.replace(tmp, dest)
+    return dest
+
+
+def unpack_input(src: Path, dest_root: Path) -> list[Path]:
+    """Decompress one compressed upload or bundle into its own dest_root subdir.
+
+    Everything is streamed (gzip member by member, zip/tar entry by entry),
+    so nothing is held in memory and no intermediate copy of the compressed
+    bytes is written. Archive paths are flattened to basenames, which also
+    keeps hostile member names inside dest_root. Returns the files written.
+    """
+    dest_dir = dest_root / safe_output_name(src.name)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    written: list[Path] = []
+    try:
+        lower = src.name.lower()
+        if lower.endswith(".zip"):
+            with zipfile.ZipFile(src) as zf:
+                for info in zf.infolist():
+                    if info.is_dir() or "__MACOSX" in info.filename:
+                        continue
+                    with zf.open(info) as member:
+                        out = _unpack_stream(member, info.filename, dest_dir)
+                    if out:
+                        written.append(out)
+        elif lower.endswith(ARCHIVE_INPUT_EXTS):
+            with tarfile.open(src, "r|*") as tf:
+                for member in tf:
+                    if not member.isfile():
+                        continue
+                    out = _unpack_stream(tf.extractfile(member), member.name, dest_dir)
+                    if out:
+                        written.append(out)
+        else:
+            with src.open("rb") as fh:
+                out = _unpack_stream(fh, src.name, dest_dir)
+            if out:
+                written.append(out)
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise RuntimeError(f"Could not unpack {src.name}: {e}") from e
+    if not written:
+        logging.warning("%s contained no FASTA, GenBank or HMM files.", src.name)
+    return written
+
+
+def split_inputs(job_dir: Path, unpacked: Iterable[Path] = ()) -> tuple[list[Path], list[Path]]:
+    """Sort uploaded files into (genomes, hmms). Skips the manifest itself.
+
+    Compressed uploads and bundles are left to unpack_input(); pass the files
+    it produced as `unpacked` and they are sorted alongside the plain ones.
+    """
     genomes: list[Path] = []
     hmms: list[Path] = []
     for path in sorted(job_dir.iterdir()):
@@ -396,22 +1189,37 @@ def split_inputs(job_dir: Path) -> tuple[list[Path], list[Path]]:
         lower = path.name.lower()
         if lower in SKIP_INPUT_NAMES or lower.startswith("manifest-"):
             continue
-        suffix = path.suffix.lower()
-        if suffix in HMM_EXTS:
+        kind = input_kind(path.name)
+        if kind == "hmm":
             hmms.append(path)
-        elif suffix in FASTA_EXTS or suffix in GENBANK_EXTS:
+        elif kind == "genome":
             genomes.append(path)
-        else:
+        elif kind is None:
             logging.warning("Skipping unrecognised file: %s", path.name)
+    for path in sorted(unpacked):
+        kind = input_kind(path.name)
+        if kind == "hmm":
+            hmms.append(path)
+        elif kind == "genome":
+            genomes.append(path)
     return genomes, hmms
 
 
-def prepare_bins(genomes: list[Path], bins_dir: Path) -> tuple[str, list[Path]]:
+def prepare_bins(
+    genomes: list[Path],
+    bins_dir: Path,
+    checks: dict[Path, GenbankReport | FastaReport] | None = None,
+) -> tuple[str, list[Path]]:
     """Normalize uploaded genomes into a clean directory with a single extension.
 
     MagicLamp.py (like FeGenie) accepts one -bin_ext per run, so all genomes
     in a single job must share a format. The React app rejects mixed-format
     submissions, but we re-enforce it server-side.
+
+    `checks` carries GenBank/FASTA reports already computed while the
+    upload was downloading; genomes missing from it are scanned here.
+    Genomes are staged with link_or_copy, so a normalized name usually costs
+    a directory entry rather than a second copy of the data.
     """
     if not genomes:
         raise RuntimeError("No FASTA or GenBank input files found in the job folder.")
@@ -427,14 +1235,34 @@ def prepare_bins(genomes: list[Path], bins_dir: Path) -> tuple[str, list[Path]]:
     if has_genbank:
         bad: list[str] = []
         for p in genomes:
-            ok, reason = is_annotated_genbank(p)
-            if not ok:
-                bad.append(f"{p.name} ({reason})")
+            report = checks[p] if checks and p in checks else scan_genome(p)
+            if not report.ok:
+                bad.append(f"{p.name} ({report.reason})")
+            elif len(report.records) > 1 and not all(r.annotated for r in report.records):
+                logging.info(
+                    "%s: %d of %d records unannotated; accepted on the annotated ones.",
+                    p.name, sum(not r.annotated for r in report.records), len(report.records),
+                )
         if bad:
             raise RuntimeError(
                 "GenBank inputs missing annotation: " + "; ".join(bad)
                 + ". Provide annotated GenBank (CDS + gene + /product or /gene) or upload FASTA."
             )
+    else:
+        # Catch empty, FASTQ and protein uploads before a Genie burns a
+        # full MagicLamp run on them.
+        bad = []
+        for p in genomes:
+            report = checks[p] if checks and p in checks else scan_genome(p)
+            if not report.ok:
+                bad.append(f"{p.name} ({report.reason})")
+            for warning in report.warnings:
+                logging.warning("%s: %s", p.name, warning)
+        if bad:
+            raise RuntimeError(
+                "FASTA inputs failed validation: " + "; ".join(bad)
+                + ". Upload nucleotide FASTA (contigs or a complete genome)."
+            )
 
     target_ext = ".gbk" if has_genbank else ".fa"
     bin_ext = target_ext.lstrip(".")
@@ -451,14 +1279,14 @@ def prepare_bins(genomes: list[Path], bins_dir: Path) -> tuple[str, list[Path]]:
             i += 1
         seen.add(name)
         dest = bins_dir / name
-        shutil.copy2(src, dest)
+        link_or_copy(src, dest)
         normalized.append(dest)
 
     return bin_ext, normalized
 
 
 def prepare_hmms(hmms: list[Path], hmm_dir: Path) -> list[Path]:
-    """Copy uploaded .hmm files into a clean HmmGenie input directory."""
+    """Stage uploaded .hmm files into a clean HmmGenie input directory."""
     hmm_dir.mkdir(parents=True, exist_ok=True)
     out: list[Path] = []
     seen: set[str] = set()
@@ -471,11 +1299,167 @@ def prepare_hmms(hmms: list[Path], hmm_dir: Path) -> list[Path]:
             i += 1
         seen.add(name)
         dest = hmm_dir / name
-        shutil.copy2(src, dest)
+        link_or_copy(src, dest)
         out.append(dest)
     return out
 
 
+# ---------- Shared caches ---------------------------------------------------
+#
+# --cache-dir holds content-addressed intermediates that are worth keeping
+# across Genies and across jobs. Entries are keyed by the SHA-256 of the
+# uploaded genome, so the same genome submitted under a new slug (or a new
+# filename) hits the same entry. The whole directory is trimmed back under
+# --cache-max-bytes after every job that added entries, oldest-used first; a
+# cache hit refreshes the entry's mtime.
+#
+#   orfs/<aa>/<sha256>.faa    Prodigal protein calls for one FASTA genome
+#   results/<genie>/<version>/<sha256>/
+#                             one genome's rows of a Genie's summary and its
+#                             heatmap column (see ResultCache)
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _path_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def touch_cache_entry(path: Path) -> None:
+    """Mark a cache entry as recently used (LRU order is by mtime)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def cache_entries(cache_dir: Path) -> list[Path]:
+    """Every evictable unit in the cache: one ORF file, or one Genie result dir, per genome."""
+    entries = [p for p in (cache_dir / "orfs").glob("*/*.faa") if p.is_file()]
+    entries.extend(p for p in (cache_dir / "results").glob("*/*/*") if p.is_dir())
+    return entries
+
+
+def evict_lru(cache_dir: Path, max_bytes: int) -> int:
+    """Delete least-recently-used entries until the cache fits in `max_bytes`.
+
+    Returns the number of bytes freed. `max_bytes <= 0` disables eviction.
+    """
+    if max_bytes <= 0 or not cache_dir.exists():
+        return 0
+    entries: list[tuple[float, int, Path]] = []
+    for entry in cache_entries(cache_dir):
+        try:
+            entries.append((entry.stat().st_mtime, _path_size(entry), entry))
+        except FileNotFoundError:
+            continue  # evicted by a concurrent job
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            entry.unlink(missing_ok=True)
+        total -= size
+        freed += size
+    if freed:
+        logging.info("Evicted %d bytes from cache %s.", freed, cache_dir)
+    return freed
+
+
+def orf_cache_path(cache_dir: Path, digest: str) -> Path:
+    return cache_dir / "orfs" / digest[:2] / f"{digest}.faa"
+
+
+def call_orfs(args, genome: Path, dest: Path, log_handle) -> None:
+    """Run Prodigal on one genome, writing proteins to `dest` atomically.
+
+    Single-genome mode first (what MagicLamp does itself); Prodigal refuses
+    that mode for very small inputs, so fall back to -p meta.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+    base: list[str] = []
+    if args.command_prefix:
+        base.extend(args.command_prefix.split())
+    base.extend([args.prodigal_bin, "-i", str(genome), "-a", str(tmp), "-o", os.devnull, "-q"])
+    try:
+        try:
+            run_command(base, log_handle)
+        except RuntimeError:
+            logging.info("Prodigal single mode failed for %s; retrying with -p meta.", genome.name)
+            run_command([*base, "-p", "meta"], log_handle)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def cached_orfs(args, genome: Path, log_handle) -> tuple[Path, bool]:
+    """Protein FASTA for `genome`, from the ORF cache or freshly called into it.
+
+    The flag is True when Prodigal ran, i.e. the cache grew.
+    """
+    cached = orf_cache_path(Path(args.cache_dir), file_digest(genome))
+    if cached.exists():
+        touch_cache_entry(cached)
+        logging.info("ORF cache hit for %s (%s).", genome.name, cached.stem[:12])
+        return cached, False
+    call_orfs(args, genome, cached, log_handle)
+    return cached, True
+
+
+def stage_orfs(
+    args, genomes: list[Path], orf_dir: Path, log_handle, called: list[Path] | None = None,
+) -> list[Path]:
+    """Stage cached protein calls for every genome as <stem>.faa in `orf_dir`.
+
+    Gene prediction is the largest fixed per-genome cost, and every Genie
+    used to repeat it. Staged files keep the genome's stem, so Genie outputs
+    still name genomes after the normalized bins (with a .faa extension).
+    Prodigal is single-threaded, so genomes are called --threads at a time.
+    Each call logs to its own file, appended to `log_handle` in genome order
+    afterwards, so concurrent Prodigal output never interleaves. Genomes
+    Prodigal had to call (cache misses) are appended to `called`.
+    """
+    orf_dir.mkdir(parents=True, exist_ok=True)
+    logs = [orf_dir / f".{genome.stem}.prodigal.log" for genome in genomes]
+
+    def _stage(genome: Path, log_path: Path) -> Path:
+        dest = orf_dir / f"{genome.stem}.faa"
+        with log_path.open("w", encoding="utf-8") as genome_log:
+            # A concurrent job's evict_lru may delete the cache entry between
+            # the lookup and the link; call the genome again once if it does.
+            for attempt in (1, 2):
+                src, fresh = cached_orfs(args, genome, genome_log)
+                if fresh and called is not None:
+                    called.append(genome)
+                try:
+                    link_or_copy(src, dest)
+                    return dest
+                except FileNotFoundError:
+                    if attempt == 2:
+                        raise
+                    logging.warning("ORF cache entry for %s was evicted while staging; calling it again.", genome.name)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.threads)) as pool:
+            return list(pool.map(_stage, genomes, logs))
+    finally:
+        for log_path in logs:
+            if log_path.exists():
+                with log_path.open("r", encoding="utf-8", errors="replace") as src:
+                    shutil.copyfileobj(src, log_handle)
+                log_path.unlink()
+
+
 # ---------- Command building ------------------------------------------------
 def build_magiclamp_command(
     args,
@@ -514,6 +1498,9 @@ def build_magiclamp_command(
     if bin_ext == "gbk":
         # MagicLamp accepts --gbk for GenBank input.
         cmd.append("--gbk")
+    elif bin_ext == "faa":
+        # Pre-called proteins from the ORF cache; skip MagicLamp's own Prodigal run.
+        cmd.append("--orfs")
 
     if genie == "Custom":
         if hmm_dir is None:
@@ -525,11 +1512,147 @@ def build_magiclamp_command(
 
 
 # ---------- Subprocess runner -----------------------------------------------
-def run_command(cmd: list[str], log_handle) -> None:
+def rss_mb(maxrss: int) -> float:
+    """ru_maxrss in MB (Linux reports KiB, macOS bytes)."""
+    return round(maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+@dataclass
+class ProcessUsage:
+    """Wall time and resource use of finished child processes.
+
+    Times add up across processes; max_rss_mb is the largest single peak.
+    """
+    processes: int = 0
+    wall_seconds: float = 0.0
+    user_seconds: float = 0.0
+    system_seconds: float = 0.0
+    max_rss_mb: float = 0.0
+
+    def add(self, other: ProcessUsage | None) -> ProcessUsage:
+        if other is not None:
+            self.processes += other.processes
+            self.wall_seconds += other.wall_seconds
+            self.user_seconds += other.user_seconds
+            self.system_seconds += other.system_seconds
+            self.max_rss_mb = max(self.max_rss_mb, other.max_rss_mb)
+        return self
+
+    def as_dict(self) -> dict:
+        return {
+            "processes": self.processes,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.user_seconds + self.system_seconds, 3),
+            "user_seconds": round(self.user_seconds, 3),
+            "system_seconds": round(self.system_seconds, 3),
+            "max_rss_mb": self.max_rss_mb,
+        }
+
+
+def run_command(cmd: list[str], log_handle) -> ProcessUsage:
+    """Run `cmd` with its output in `log_handle`; returns its wall time and rusage.
+
+    The child is reaped with wait4, so its CPU time and peak RSS include the
+    descendants it waited for (hmmsearch, prodigal, ...) and nothing else
+    running in this process.
+    """
     logging.info("Running command: %s", " ".join(cmd))
-    proc = subprocess.run(cmd, stdout=log_handle, stderr=subprocess.STDOUT, text=True)
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=log_handle, stderr=subprocess.STDOUT, text=True)
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        result = ProcessUsage(1, time.perf_counter() - started, usage.ru_utime, usage.ru_stime, rss_mb(usage.ru_maxrss))
+    else:
+        proc.wait()
+        result = ProcessUsage(1, time.perf_counter() - started)
     if proc.returncode != 0:
         raise RuntimeError(f"Command failed with exit code {proc.returncode}: {' '.join(cmd)}")
+    return result
+
+
+def children_cpu_seconds() -> float:
+    """CPU time of every child this process has reaped so far."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+# ---------- Job metrics -----------------------------------------------------
+#
+# process_job times each phase of a job and records what it moved:
+#
+#   download         job inputs fetched from S3 (files, bytes)
+#   validation       waiting on genome scans / unpacking after the download,
+#                    plus the CPU time the scan processes used
+#   staging          manifest, bins/ and hmms/
+#   orfs             Prodigal through the ORF cache (--orf-cache only)
+#   genies           every Genie and report, end to end
+#   archive          the results tarball (bytes); with --stream-archive it is
+#                    marked streamed and overlaps upload
+#   upload           published artifacts (files, bytes), streamed tarball included
+#
+# Each Genie also gets its own wall time and the wait4 rusage of its
+# MagicLamp.py processes, and each report its render time. The record goes
+# into status.json under "metrics", into <result prefix>/metrics.json, and
+# (with --metrics-log) one JSON line per job into a local file.
+METRICS_FILE = "metrics.json"
+
+
+@dataclass
+class JobMetrics:
+    """Per-phase timings and resource use of one job (see 'Job metrics')."""
+    started: float = field(default_factory=time.perf_counter)
+    phases: dict[str, dict] = field(default_factory=dict)
+    genies: dict[str, dict] = field(default_factory=dict)
+    reports: dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[dict]:
+        """Time a phase; figures the caller adds to the yielded dict are kept with it."""
+        entry = self.phases.setdefault(name, {})
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = round(entry.get("seconds", 0.0) + time.perf_counter() - start, 3)
+
+    def record_genie(self, genie: str, **fields) -> None:
+        with self._lock:
+            self.genies.setdefault(genie, {}).update(fields)
+
+    def record_report(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.reports[name] = round(seconds, 3)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "total_seconds": round(time.perf_counter() - self.started, 3),
+                "phases": copy.deepcopy(self.phases),
+                "genies": copy.deepcopy(self.genies),
+                "reports": dict(self.reports),
+            }
+
+
+def publish_metrics(s3, bucket: str, result_prefix: str, record: dict, metrics_log: str = "") -> None:
+    """Write a job's metrics record to metrics.json and, if set, append it to `metrics_log`.
+
+    A metrics log that cannot be written is only logged; it never fails the job.
+    """
+    put_json(s3, bucket, f"{result_prefix}{METRICS_FILE}", record)
+    if not metrics_log:
+        return
+    line = json.dumps(record, sort_keys=True) + "\n"
+    try:
+        # One O_APPEND write per job, so concurrent jobs never interleave lines.
+        fd = os.open(metrics_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logging.warning("Could not append job metrics to %s: %s", metrics_log, e)
 
 
 # ---------- Output staging --------------------------------------------------
@@ -611,19 +1734,141 @@ def find_heatmap_csv(out_dir: Path, genie: str) -> Path | None:
     return first_existing_recursive(out_dir, candidates)
 
 
-def normalize_csv(src: Path, dest: Path) -> None:
-    """Strip duplicate header rows (MagicLamp/FeGenie occasionally emit two)."""
-    with src.open("r", newline="", encoding="utf-8", errors="replace") as inp:
-        rows = list(csv.reader(inp))
-    if not rows:
-        raise RuntimeError(f"{src} is empty.")
-    header = rows[0]
-    data = [r for r in rows[1:] if r and r != header]
+# Compressed copies of summary CSVs (--summary-sidecar), named after the CSV.
+SIDECAR_SUFFIXES = {"gz": ".csv.gz", "parquet": ".parquet"}
+SIDECAR_CONTENT_TYPES = {
+    ".gz": "application/gzip",
+    ".parquet": "application/vnd.apache.parquet",
+    ".json": "application/json",
+    ".csv": "text/csv",
+}
+# Rows per Parquet row group; bounds the rows buffered before each write.
+PARQUET_BATCH_ROWS = 10_000
+
+
+def sidecar_path(csv_path: Path, fmt: str) -> Path:
+    stem = csv_path.name[:-4] if csv_path.name.lower().endswith(".csv") else csv_path.name
+    return csv_path.with_name(stem + SIDECAR_SUFFIXES[fmt])
+
+
+class SidecarWriter:
+    """Compressed copy of a CSV written row by row next to it (gz or parquet).
+
+    Parquet needs pyarrow, imported only when asked for; every column is
+    stored as a string, one row group per PARQUET_BATCH_ROWS rows. The file
+    appears under its final name only once it is complete.
+    """
+
+    def __init__(self, path: Path, fmt: str, header: list[str]):
+        self.path = path
+        self.fmt = fmt
+        self.width = len(header)
+        self.tmp = path.with_name(f".{path.name}.tmp")
+        if fmt == "gz":
+            self._fh = gzip.open(self.tmp, "wt", newline="", encoding="utf-8", compresslevel=6)
+            self._csv = csv.writer(self._fh)
+            self._csv.writerow(header)
+        elif fmt == "parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise RuntimeError("Parquet side-cars need pyarrow (pip install pyarrow).") from e
+            self._pa = pa
+            names: list[str] = []
+            for name in header:
+                unique, i = name or "column", 2
+                while unique in names:
+                    unique, i = f"{name}_{i}", i + 1
+                names.append(unique)
+            self._schema = pa.schema([(name, pa.string()) for name in names])
+            self._writer = pq.ParquetWriter(str(self.tmp), self._schema, compression="zstd")
+            self._batch: list[list[str]] = []
+        else:
+            raise ValueError(f"Unknown side-car format: {fmt}")
+
+    def write(self, row: list[str]) -> None:
+        if self.fmt == "gz":
+            self._csv.writerow(row)
+            return
+        self._batch.append(row)
+        if len(self._batch) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._batch:
+            return
+        pa = self._pa
+        columns = [
+            pa.array([row[i] if i < len(row) else None for row in self._batch], pa.string())
+            for i in range(self.width)
+        ]
+        self._writer.write_table(pa.Table.from_arrays(columns, schema=self._schema))
+        self._batch = []
+
+    def __enter__(self) -> "SidecarWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.fmt == "gz":
+            self._fh.close()
+        else:
+            if exc_type is None:
+                self._flush()
+            self._writer.close()
+        if exc_type is None:
+            os.replace(self.tmp, self.path)
+        else:
+            self.tmp.unlink(missing_ok=True)
+
+
+def _is_separator_row(row: list[str]) -> bool:
+    """FeGenie's geneSummary separates genomes with rows of '#' characters."""
+    text = "".join(row).strip()
+    return bool(text) and not text.strip("#")
+
+
+def normalize_csv(src: Path, dest: Path, sidecars: Iterable[str] = ()) -> int:
+    """Stream a summary CSV into `dest`, dropping rows the viewer can't use.
+
+    Repeated header rows (MagicLamp/FeGenie occasionally emit two), blank
+    rows and '####' separator rows are skipped one row at a time, so memory
+    stays flat however large the summary is. Each of `sidecars` ("gz",
+    "parquet") gets a compressed copy written in the same pass, see
+    sidecar_path(). `src` and `dest` may be the same file. Returns the
+    number of data rows written.
+    """
     dest.parent.mkdir(parents=True, exist_ok=True)
-    with dest.open("w", newline="", encoding="utf-8") as out:
-        writer = csv.writer(out)
-        writer.writerow(header)
-        writer.writerows(data)
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    rows = dropped = 0
+    try:
+        with src.open("r", newline="", encoding="utf-8", errors="replace") as inp:
+            reader = csv.reader(inp)
+            header = next(reader, None)
+            if not header:
+                raise RuntimeError(f"{src} is empty.")
+            with contextlib.ExitStack() as stack:
+                out = stack.enter_context(tmp.open("w", newline="", encoding="utf-8"))
+                sides = [
+                    stack.enter_context(SidecarWriter(sidecar_path(dest, fmt), fmt, header))
+                    for fmt in sidecars
+                ]
+                writer = csv.writer(out)
+                writer.writerow(header)
+                for row in reader:
+                    if not row or row == header or _is_separator_row(row):
+                        dropped += 1
+                        continue
+                    writer.writerow(row)
+                    for side in sides:
+                        side.write(row)
+                    rows += 1
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    if dropped:
+        logging.debug("normalize_csv %s: kept %d row(s), dropped %d.", src.name, rows, dropped)
+    return rows
 
 
 def normalize_heatmap(src: Path, dest: Path) -> None:
@@ -640,68 +1885,267 @@ def normalize_heatmap(src: Path, dest: Path) -> None:
         writer.writerows(rows)
 
 
-def synthesize_heatmap_from_summary(summary_csv: Path, dest: Path) -> bool:
-    """Build a categories × genomes count matrix from a summary CSV.
+def heatmap_to_parquet(src: Path, dest: Path) -> int:
+    """Write a heatmap CSV as long-format Parquet: (category, genome, value).
 
-    A defensive fallback for when a Genie completes but fails to emit its own
-    heatmap CSV — this has been observed for FeGenie on single-genome inputs
-    and for some Genies when `--norm` isn't requested. The summary CSV always
-    contains a `category` column and a genome column (under varying names:
-    'genome/assembly', 'genome', 'bin', 'file', 'organism'), so we can
-    reconstruct the same categories × genomes count table the frontend
-    expects.
+    Zero cells are left out, so wide, sparse matrices stay small and the
+    viewer can fetch single genomes. Values are float64. Returns the number
+    of rows written. Needs pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).") from e
+    schema = pa.schema([("category", pa.string()), ("genome", pa.string()), ("value", pa.float64())])
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    batch: dict[str, list] = {"category": [], "genome": [], "value": []}
+    written = 0
+    try:
+        with src.open("r", newline="", encoding="utf-8", errors="replace") as inp, \
+                pq.ParquetWriter(str(tmp), schema, compression="zstd") as writer:
+            reader = csv.reader(inp)
+            genomes = (next(reader, None) or ["X"])[1:]
+            for row in reader:
+                if not row or not row[0]:
+                    continue
+                for genome, cell in zip(genomes, row[1:]):
+                    try:
+                        value = float(cell)
+                    except ValueError:
+                        continue
+                    if value:
+                        batch["category"].append(row[0])
+                        batch["genome"].append(genome)
+                        batch["value"].append(value)
+                if len(batch["value"]) >= PARQUET_BATCH_ROWS:
+                    written += len(batch["value"])
+                    writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                    batch = {"category": [], "genome": [], "value": []}
+            if batch["value"] or not written:
+                written += len(batch["value"])
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return written
 
-    Returns True if a non-empty heatmap was written, False if we could not
-    find usable category / genome columns.
+
+def columnar_index(genie: str, files: dict[str, Path], dest: Path, genome_columns: Iterable[str] = ()) -> None:
+    """Describe Parquet files so the viewer can fetch only what it needs.
+
+    For every row group the index records its row range and the byte range
+    of each column chunk, so a browser can issue HTTP Range requests for,
+    say, the genome and HMM columns first and ORF sequences on demand,
+    without parsing the Parquet footer itself. Where a genome column is
+    present its min/max per row group is included to narrow lookups.
     """
-    GENOME_COLS = ("genome/assembly", "genome", "bin", "file", "organism", "assembly")
-    CATEGORY_COLS = ("category", "Category", "subcategory")
+    import pyarrow.parquet as pq
+
+    wanted = set(genome_columns)
+    index: dict = {"genie": genie, "version": 1, "created_at": utc_now(), "files": {}}
+    for kind, path in files.items():
+        meta = pq.ParquetFile(str(path)).metadata
+        names = [meta.schema.column(i).name for i in range(meta.num_columns)]
+        groups = []
+        first_row = 0
+        for g in range(meta.num_row_groups):
+            rg = meta.row_group(g)
+            columns = {}
+            genome_range = None
+            for c in range(rg.num_columns):
+                chunk = rg.column(c)
+                start = chunk.dictionary_page_offset if chunk.has_dictionary_page else chunk.data_page_offset
+                columns[names[c]] = {"offset": start, "length": chunk.total_compressed_size}
+                stats = chunk.statistics
+                if names[c] in wanted and genome_range is None and stats is not None and stats.has_min_max:
+                    genome_range = [stats.min, stats.max]
+            groups.append({
+                "first_row": first_row,
+                "rows": rg.num_rows,
+                "columns": columns,
+                **({"genome_range": genome_range} if genome_range else {}),
+            })
+            first_row += rg.num_rows
+        index["files"][kind] = {
+            "name": path.name,
+            "bytes": path.stat().st_size,
+            "rows": meta.num_rows,
+            "columns": names,
+            "row_groups": groups,
+        }
+    dest.write_text(json.dumps(index, indent=2, default=str), encoding="utf-8")
 
-    with summary_csv.open("r", newline="", encoding="utf-8", errors="replace") as inp:
-        reader = csv.DictReader(inp)
-        fields = reader.fieldnames or []
-        # Pick a category column — prefer 'category', fall back to 'subcategory'.
-        cat_col = next((c for c in CATEGORY_COLS if c in fields), None)
-        gen_col = next((c for c in GENOME_COLS if c in fields), None)
-        if not cat_col or not gen_col:
-            logging.warning(
-                "synthesize_heatmap_from_summary: %s missing category or genome "
-                "column (cat=%s, genome=%s). Available columns: %s",
-                summary_csv, cat_col, gen_col, fields,
-            )
-            return False
 
-        from collections import defaultdict, OrderedDict
-        counts: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
-        genomes_ordered: "OrderedDict[str, None]" = OrderedDict()
-        categories_ordered: "OrderedDict[str, None]" = OrderedDict()
+# Summary CSVs name their genome and category columns differently per Genie.
+SUMMARY_GENOME_COLS = ("genome/assembly", "genome", "bin", "file", "organism", "assembly")
+SUMMARY_CATEGORY_COLS = ("category", "Category", "subcategory")
 
-        for row in reader:
+
+SUMMARY_HMM_COLS = ("HMM", "hmm", "HMM_name", "hmm_name")
+SUMMARY_BITSCORE_COLS = ("bitscore", "bit_score", "bitScore", "score")
+# Extra categories × genomes matrices (--heatmap-aggregations), each written
+# as <genie>.heatmap.<name>.csv next to the count heatmap.
+HEATMAP_AGGREGATIONS = ("distinct-hmms", "best-bitscore", "per-mbp")
+
+
+def _summary_columns(summary_csv: Path) -> tuple[list[str], str | None, str | None]:
+    with summary_csv.open("r", newline="", encoding="utf-8", errors="replace") as inp:
+        fields = next(csv.reader(inp), None) or []
+    # Pick a category column — prefer 'category', fall back to 'subcategory'.
+    cat_col = next((c for c in SUMMARY_CATEGORY_COLS if c in fields), None)
+    gen_col = next((c for c in SUMMARY_GENOME_COLS if c in fields), None)
+    return fields, cat_col, gen_col
+
+
+def aggregate_summary(
+    summary_csv: Path,
+    aggregations: Iterable[str] = (),
+    genome_sizes: dict[str, int] | None = None,
+) -> dict | None:
+    """Categories × genomes matrices from a summary CSV, in one group-by.
+
+    Reads only the columns needed (category, genome and, when asked for,
+    HMM / bitscore) with pandas, factorizes categories and genomes in
+    first-seen order and bins every hit into the flattened matrix with
+    numpy. Always returns "counts" (a DataFrame); `aggregations` adds:
+
+      distinct-hmms  distinct HMMs hit per category and genome
+      best-bitscore  highest bitscore per category and genome (blank if none)
+      per-mbp        counts per megabase of assembly, from `genome_sizes`
+                     (bins stem -> total length); blank for unknown sizes
+
+    Returns None if the summary has no usable category/genome columns or rows.
+    """
+    import numpy as np
+    import pandas as pd
+
+    fields, cat_col, gen_col = _summary_columns(summary_csv)
+    if not cat_col or not gen_col:
+        logging.warning(
+            "synthesize_heatmap_from_summary: %s missing category or genome "
+            "column (cat=%s, genome=%s). Available columns: %s",
+            summary_csv, cat_col, gen_col, fields,
+        )
+        return None
+    aggregations = set(aggregations)
+    hmm_col = next((c for c in SUMMARY_HMM_COLS if c in fields), None) if "distinct-hmms" in aggregations else None
+    bit_col = next((c for c in SUMMARY_BITSCORE_COLS if c in fields), None) if "best-bitscore" in aggregations else None
+    usecols = list(dict.fromkeys(c for c in (cat_col, gen_col, hmm_col, bit_col) if c))
+
+    # Bitscores are left to the parser so they arrive as floats, not strings.
+    text = {c: str for c in usecols if c != bit_col}
+    read = dict(usecols=usecols, dtype=text, keep_default_na=False)
+    try:
+        # pyarrow's multithreaded reader is ~3x faster on big summaries. It
+        # rejects ragged rows, which the C engine reads like csv.DictReader
+        # (short rows padded with blanks), so those files go the slow way.
+        df = pd.read_csv(summary_csv, engine="pyarrow", **read)
+    except (ImportError, ValueError, UnicodeDecodeError):
+        df = pd.read_csv(summary_csv, encoding="utf-8", encoding_errors="replace", **read)
+    cat = df[cat_col].str.strip()
+    gen = df[gen_col].str.strip()
+    # Skip header echoes and `####` separator rows used by some Genies.
+    keep = (
+        (cat != "") & (gen != "")
+        & ~cat.isin([cat_col, "category", "subcategory"])
+        & ~cat.str.startswith("#") & ~gen.str.startswith("#")
+    )
+    if not keep.any():
+        logging.warning("synthesize_heatmap_from_summary: no usable rows in %s", summary_csv)
+        return None
+    df, cat, gen = df[keep], cat[keep], gen[keep]
+
+    cat_codes, categories = pd.factorize(cat, sort=False)
+    gen_codes, genomes = pd.factorize(gen, sort=False)
+    shape = (len(categories), len(genomes))
+    cells = cat_codes.astype(np.int64) * shape[1] + gen_codes
+    size = shape[0] * shape[1]
+
+    def frame(values) -> "pd.DataFrame":
+        return pd.DataFrame(np.asarray(values).reshape(shape), index=categories, columns=genomes)
+
+    counts = np.bincount(cells, minlength=size)
+    result = {"counts": frame(counts)}
+    if hmm_col:
+        hmm_codes, hmms = pd.factorize(df[hmm_col], sort=False)
+        named = (df[hmm_col].str.strip() != "").to_numpy()  # short rows have no HMM
+        pairs = pd.unique(cells[named] * max(len(hmms), 1) + hmm_codes[named])
+        result["distinct-hmms"] = frame(np.bincount(pairs // max(len(hmms), 1), minlength=size))
+    if bit_col:
+        best = np.full(size, np.nan)
+        scores = pd.to_numeric(df[bit_col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        scored = ~np.isnan(scores)
+        np.fmax.at(best, cells[scored], scores[scored])
+        result["best-bitscore"] = frame(best)
+    if "per-mbp" in aggregations and genome_sizes:
+        mbp = np.array([genome_sizes.get(genome_stem(g), 0) / 1e6 for g in genomes])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            per_mbp = counts.reshape(shape) / np.where(mbp > 0, mbp, np.nan)
+        result["per-mbp"] = frame(per_mbp)
+    return result
+
+
+def write_matrix(matrix, dest: Path) -> None:
+    """Write a categories × genomes DataFrame in heatmap CSV layout ('X' first)."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    matrix.to_csv(dest, index_label="X", na_rep="", float_format="%.6g")
+
+
+def synthesize_heatmap_from_summary(summary_csv: Path, dest: Path) -> bool:
+    """Build a categories × genomes count matrix from a summary CSV.
+
+    A defensive fallback for when a Genie completes but fails to emit its own
+    heatmap CSV — this has been observed for FeGenie on single-genome inputs
+    and for some Genies when `--norm` isn't requested. The summary CSV always
+    contains a `category` column and a genome column (under varying names:
+    'genome/assembly', 'genome', 'bin', 'file', 'organism'), so we can
+    reconstruct the same categories × genomes count table the frontend
+    expects. Uses aggregate_summary() when pandas is installed and a
+    row-by-row count otherwise.
+
+    Returns True if a non-empty heatmap was written, False if we could not
+    find usable category / genome columns.
+    """
+    try:
+        matrices = aggregate_summary(summary_csv)
+    except ImportError:
+        return _synthesize_heatmap_rowwise(summary_csv, dest)
+    if matrices is None:
+        return False
+    write_matrix(matrices["counts"], dest)
+    return True
+
+
+def _synthesize_heatmap_rowwise(summary_csv: Path, dest: Path) -> bool:
+    """synthesize_heatmap_from_summary without pandas."""
+    _, cat_col, gen_col = _summary_columns(summary_csv)
+    if not cat_col or not gen_col:
+        logging.warning("synthesize_heatmap_from_summary: %s missing category or genome column.", summary_csv)
+        return False
+    counts: dict[tuple[str, str], int] = {}
+    genomes_ordered: dict[str, None] = {}
+    categories_ordered: dict[str, None] = {}
+    with summary_csv.open("r", newline="", encoding="utf-8", errors="replace") as inp:
+        for row in csv.DictReader(inp):
             cat = (row.get(cat_col) or "").strip()
             genome = (row.get(gen_col) or "").strip()
-            # Skip header echoes and `####` separator rows used by some Genies.
-            if not cat or not genome:
-                continue
-            if cat in (cat_col, "category", "subcategory"):
+            if not cat or not genome or cat in (cat_col, "category", "subcategory"):
                 continue
             if cat.startswith("#") or genome.startswith("#"):
                 continue
-            counts[cat][genome] += 1
+            counts[(cat, genome)] = counts.get((cat, genome), 0) + 1
             genomes_ordered.setdefault(genome, None)
             categories_ordered.setdefault(cat, None)
-
-    if not categories_ordered or not genomes_ordered:
-        logging.warning(
-            "synthesize_heatmap_from_summary: no usable rows in %s", summary_csv,
-        )
+    if not categories_ordered:
+        logging.warning("synthesize_heatmap_from_summary: no usable rows in %s", summary_csv)
         return False
-
     dest.parent.mkdir(parents=True, exist_ok=True)
     with dest.open("w", newline="", encoding="utf-8") as out:
         writer = csv.writer(out)
-        writer.writerow(["X", *genomes_ordered.keys()])
+        writer.writerow(["X", *genomes_ordered])
         for cat in categories_ordered:
-            writer.writerow([cat, *(counts[cat].get(g, 0) for g in genomes_ordered)])
+            writer.writerow([cat, *(counts.get((cat, g), 0) for g in genomes_ordered)])
     return True
 
 
@@ -739,6 +2183,160 @@ def write_fallback_report(dest: Path, slug: str, genie: str, summary_csv: Path,
     )
 
 
+# ---------- Reports ---------------------------------------------------------
+#
+# Rendering a report imports pandas, scipy and plotly, which costs seconds
+# when every Genie spawns its own `conda run ... python magiclamp_report.py`.
+# With --report-mode pool (the default) run_genies starts a small pool of
+# report processes with the job: they import the report script while
+# MagicLamp runs, then render every Genie's report as soon as that Genie
+# finishes, side by side with each other and with Genies still running.
+# A script that cannot be imported here (its dependencies live in another
+# environment) falls back to the subprocess, which --report-mode subprocess
+# always uses.
+#
+# --report-plotlyjs shared (the default) has every report load one
+# versioned plotly-<version>.min.js written next to them in frontend_results
+# instead of embedding its own ~4.5 MB copy; the bundle is published with
+# the reports (and lands in the tarball, so offline copies still work).
+REPORT_MODES = ("pool", "subprocess")
+REPORT_PLOTLYJS = ("shared", "inline")
+# One tabbed report across all of a job's Genies (--combined-report auto).
+COMBINED_REPORT = "combined-report.html"
+COMBINED_REPORT_LOG = "combined-report.log"
+PLOTLY_BUNDLE_GLOB = "plotly-*.min.js"
+# The bundle name carries the plotly.js version, so its content never changes.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_report_modules: dict[Path, object] = {}
+
+
+def report_scripts(args) -> list[Path]:
+    """Existing report scripts in preference order: --report-script, then beside this file, then cwd."""
+    candidates: list[Path] = []
+    if args.report_script:
+        candidates.append(Path(args.report_script))
+    candidates.append(Path(__file__).resolve().parent / "magiclamp_report.py")
+    candidates.append(Path.cwd() / "magiclamp_report.py")
+    scripts: list[Path] = []
+    for script in candidates:
+        script = script.expanduser().resolve()
+        if script not in scripts and script.exists():
+            scripts.append(script)
+    return scripts
+
+
+def load_report_module(script: Path):
+    """Import a report script by path, once per process."""
+    module = _report_modules.get(script)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(f"_report_{script.stem}", script)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"cannot import {script}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _report_modules[script] = module
+    return module
+
+
+def _warm_report_module(script: Path) -> None:
+    """Pool initializer: pay the report imports before the first render."""
+    try:
+        load_report_module(script)
+    except Exception:  # surfaced again, with context, by render_report
+        pass
+
+
+def render_report(script: Path, heatmap_csv: Path, report_dest: Path, plotlyjs: str = "inline") -> None:
+    """Render one report with the script's build_html_report() in this process.
+
+    Scripts without write_plotly_bundle() (older report generators) always
+    render self-contained reports.
+    """
+    report = load_report_module(script)
+    df = report.load_heatmap_csv(heatmap_csv)
+    if df.empty:
+        raise ValueError(f"{heatmap_csv.name} produced an empty data frame")
+    options = {}
+    if plotlyjs == "shared" and hasattr(report, "write_plotly_bundle"):
+        options["plotlyjs"] = report.write_plotly_bundle(report_dest.parent).name
+    html = report.build_html_report(df, source_name=heatmap_csv.name, **options)
+    tmp = report_dest.with_name(f".{report_dest.name}.tmp")
+    tmp.write_text(html, encoding="utf-8")
+    os.replace(tmp, report_dest)
+
+
+def report_pool(args, reports: int) -> ProcessPoolExecutor | None:
+    """A warm pool for up to `reports` concurrent renders, or None for subprocess mode.
+
+    The workers start (and import the report script) right away. The
+    caller owns the pool and shuts it down when the job's reports are done.
+    """
+    scripts = report_scripts(args)
+    if args.report_mode != "pool" or not scripts or reports < 1:
+        return None
+    pool = ProcessPoolExecutor(
+        max_workers=max(1, min(args.threads, reports)),
+        initializer=_warm_report_module,
+        initargs=(scripts[0],),
+    )
+    pool.submit(_warm_report_module, scripts[0])
+    return pool
+
+
+def _script_accepts(script: Path, option: str) -> bool:
+    """Whether a report script's source mentions a command-line option.
+
+    Subprocess renders cannot ask the script (it may need another
+    environment to import), and argparse rejects unknown options outright.
+    """
+    try:
+        return option in script.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return False
+
+
+def _render_with_fallback(
+    args,
+    what: str,
+    render: Callable,
+    inputs: tuple,
+    cli_inputs: list[str],
+    report_dest: Path,
+    log_handle,
+    renderers: Executor | None = None,
+) -> bool:
+    """Try each report script on `renderers`, then as a subprocess, until `report_dest` exists.
+
+    `render(script, *inputs, report_dest, plotlyjs)` runs in the pool;
+    `cli_inputs` are the script's command-line arguments before `-o`.
+    """
+    for script in report_scripts(args):
+        if renderers is not None:
+            logging.info("Rendering %s in the report pool: %s", what, script)
+            try:
+                renderers.submit(render, script, *inputs, report_dest, args.report_plotlyjs).result()
+                return True
+            except Exception as e:
+                logging.warning("In-process %s failed (%s); trying a subprocess.", what, e)
+                log_handle.write(f"[{what}] In-process report failed: {e!r}\n")
+
+        logging.info("Generating %s with: %s", what, script)
+        cmd: list[str] = []
+        if args.command_prefix:
+            cmd.extend(args.command_prefix.split())
+        cmd.extend(["python", str(script), *cli_inputs, "-o", str(report_dest)])
+        # Like render_report: older scripts without the option render inline.
+        if args.report_plotlyjs == "shared" and _script_accepts(script, "--plotlyjs"):
+            cmd.extend(["--plotlyjs", "shared"])
+        try:
+            run_command(cmd, log_handle)
+        except RuntimeError as e:
+            logging.warning("Generating %s failed: %s", what, e)
+        if report_dest.exists():
+            return True
+    return False
+
+
 def maybe_generate_report(
     args,
     job_root: Path,
@@ -748,73 +2346,1124 @@ def maybe_generate_report(
     summary_csv: Path,
     heatmap_csv: Path | None,
     log_handle,
+    renderers: Executor | None = None,
 ) -> None:
     """Generate a Plotly HTML report for one Genie, with graceful fallbacks.
 
-    Reuses magiclamp_report.py (Genie-agnostic — categories × genomes heatmap).
-    Falls back to a static HTML stub if no heatmap CSV was produced or the
-    report script is unavailable.
+    Reuses magiclamp_report.py (Genie-agnostic — categories × genomes heatmap),
+    rendered on `renderers` (see report_pool) or, failing that, in a
+    subprocess. Falls back to a static HTML stub if no heatmap CSV was
+    produced or the report script is unavailable.
     """
-    if heatmap_csv is not None:
-        candidate_scripts: list[Path] = []
-        if args.report_script:
-            candidate_scripts.append(Path(args.report_script))
-        candidate_scripts.append(Path(__file__).resolve().parent / "magiclamp_report.py")
-        candidate_scripts.append(Path.cwd() / "magiclamp_report.py")
-
-        seen: set[Path] = set()
-        for script in candidate_scripts:
-            script = script.expanduser().resolve()
-            if script in seen:
-                continue
-            seen.add(script)
-            if script.exists():
-                logging.info("Generating Plotly report for %s with: %s", genie, script)
-                cmd: list[str] = []
-                if args.command_prefix:
-                    cmd.extend(args.command_prefix.split())
-                cmd.extend(["python", str(script), str(heatmap_csv), "-o", str(report_dest)])
-                try:
-                    run_command(cmd, log_handle)
-                except RuntimeError as e:
-                    logging.warning("Report generation failed for %s: %s", genie, e)
-                if report_dest.exists():
-                    return
+    if heatmap_csv is not None and _render_with_fallback(
+        args, f"{genie} report", render_report, (heatmap_csv,), [str(heatmap_csv)],
+        report_dest, log_handle, renderers,
+    ):
+        return
 
     logging.info("Writing fallback static report for %s.", genie)
     write_fallback_report(report_dest, slug, genie, summary_csv, heatmap_csv)
 
 
-# ---------- Tarball ---------------------------------------------------------
-def make_tarball(source_dir: Path, tar_gz: Path) -> None:
-    with tarfile.open(tar_gz, "w:gz") as tar:
-        tar.add(source_dir, arcname=source_dir.name)
+def render_combined_report(
+    script: Path,
+    heatmaps: list[tuple[str, Path]],
+    report_dest: Path,
+    plotlyjs: str = "inline",
+) -> None:
+    """Render the script's build_combined_report() over (Genie, heatmap CSV) pairs in this process."""
+    report = load_report_module(script)
+    if not hasattr(report, "build_combined_report"):
+        raise ImportError(f"{script.name} has no build_combined_report()")
+    frames = {genie: report.load_heatmap_csv(path) for genie, path in heatmaps}
+    options = {}
+    if plotlyjs == "shared" and hasattr(report, "write_plotly_bundle"):
+        options["plotlyjs"] = report.write_plotly_bundle(report_dest.parent).name
+    html = report.build_combined_report(frames, **options)
+    tmp = report_dest.with_name(f".{report_dest.name}.tmp")
+    tmp.write_text(html, encoding="utf-8")
+    os.replace(tmp, report_dest)
+
+
+def generate_combined_report(
+    args,
+    heatmaps: list[tuple[str, Path]],
+    report_dest: Path,
+    log_path: Path,
+    renderers: Executor | None = None,
+) -> bool:
+    """One tabbed report across several Genies' heatmaps (--combined-report).
+
+    There is no static fallback: every Genie already has its own report, so
+    a script that cannot build the combined view just leaves it out.
+    """
+    with log_path.open("a", encoding="utf-8") as log_handle:
+        cli_inputs = [*(str(path) for _, path in heatmaps), "--labels", *(genie for genie, _ in heatmaps)]
+        return _render_with_fallback(
+            args, "combined report", render_combined_report, (heatmaps,), cli_inputs,
+            report_dest, log_handle, renderers,
+        )
+
+
+def generate_genie_report(
+    args,
+    job_root: Path,
+    report_dest: Path,
+    slug: str,
+    genie: str,
+    summary_csv: Path,
+    heatmap_csv: Path | None,
+    log_path: Path,
+    renderers: Executor | None = None,
+) -> None:
+    """maybe_generate_report appending to the Genie's log; safe to run on a thread."""
+    with log_path.open("a", encoding="utf-8") as log_handle:
+        maybe_generate_report(
+            args, job_root, report_dest, slug, genie, summary_csv, heatmap_csv, log_handle, renderers,
+        )
+
+
+@dataclass
+class ReportQueue:
+    """Reports queued by run_genie and rendered while later Genies run (see run_genies)."""
+    threads: Executor
+    renderers: Executor | None = None   # report_pool(), or None to render in subprocesses
+    metrics: JobMetrics | None = None   # gets each report's render time
+
+    def _timed(self, name: str, render: Callable, *render_args, **render_kwargs):
+        started = time.perf_counter()
+        try:
+            return render(*render_args, **render_kwargs)
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_report(name, time.perf_counter() - started)
+
+    def submit(self, genie: str, **report_kwargs) -> Future:
+        """Queue generate_genie_report(genie=genie, **report_kwargs)."""
+        return self.threads.submit(
+            self._timed, genie, generate_genie_report,
+            genie=genie, renderers=self.renderers, **report_kwargs,
+        )
+
+    def submit_combined(self, args, heatmaps: list[tuple[str, Path]], report_dest: Path, log_path: Path) -> Future:
+        return self.threads.submit(
+            self._timed, "combined", generate_combined_report,
+            args, heatmaps, report_dest, log_path, self.renderers,
+        )
+
+
+# ---------- Results archive -------------------------------------------------
+#
+# The tarball holds MagicLamp's raw output (one folder per Genie) plus the
+# frontend CSVs/reports and run.log. Job scratch that only duplicates the
+# user's own uploads or our caches stays out of it, as does the archive
+# itself when it is written inside job_root.
+#
+# --archive-format picks the compressor: gz (pigz -p <threads> when it is on
+# PATH, otherwise single-threaded zlib) or zst (python-zstandard with worker
+# threads, or the zstd CLI). With --stream-archive nothing is written
+# locally: the compressed tar stream goes straight into a multipart upload.
+ARCHIVE_EXCLUDES = (
+    "input", "unpacked", "bins", "hmms", "orfs", "subsets", "shards", "cache-hits", "logs",
+    "*-results.tar.gz", "*-results.tar.zst",
+)
+ARCHIVE_CONTENT_TYPES = {"gz": "application/gzip", "zst": "application/zstd"}
+# Non-seekable uploads buffer whole parts in memory, so keep them modest.
+STREAM_UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=32 * 1024 * 1024,
+    max_concurrency=8,
+)
+
+
+def archive_name(slug: str, fmt: str) -> str:
+    return f"{slug}-results.tar.{fmt}"
+
+
+def archive_filter(excludes: Iterable[str]) -> Callable[[tarfile.TarInfo], tarfile.TarInfo | None]:
+    """tarfile filter dropping entries whose path below the archive root matches `excludes`.
+
+    A plain name ("bins") matches a top-level entry of the archive root only,
+    so the job's staging bins/ goes but a Genie's own FeGenie/.../bins/ stays.
+    A glob ("*-results.tar.*") matches the entry's full relative path or any
+    one of its path components.
+    """
+    names = {p for p in excludes if not any(c in p for c in "*?[")}
+    globs = [p for p in excludes if p not in names]
+
+    def _filter(info: tarfile.TarInfo) -> tarfile.TarInfo | None:
+        rel = info.name.split("/", 1)[1] if "/" in info.name else ""
+        if not rel:
+            return info
+        if rel.split("/", 1)[0] in names:
+            return None
+        for pattern in globs:
+            if fnmatch.fnmatch(rel, pattern) or any(fnmatch.fnmatch(part, pattern) for part in rel.split("/")):
+                return None
+        return info
+
+    return _filter
+
+
+@contextlib.contextmanager
+def compressed_writer(sink: BinaryIO, fmt: str, threads: int) -> Iterator[BinaryIO]:
+    """Yield a stream whose bytes reach `sink` compressed as `fmt`."""
+    threads = max(1, threads)
+    cli: list[str] | None = None
+    if fmt == "zst":
+        try:
+            import zstandard
+        except ImportError:
+            if not shutil.which("zstd"):
+                raise RuntimeError("--archive-format zst needs python-zstandard or the zstd CLI.")
+            cli = ["zstd", "-q", "-c", f"-T{threads}"]
+        else:
+            compressor = zstandard.ZstdCompressor(level=3, threads=threads)
+            with compressor.stream_writer(sink, closefd=False) as stream:
+                yield stream
+            return
+    elif fmt == "gz":
+        if shutil.which("pigz"):
+            cli = ["pigz", "-c", "-p", str(threads)]
+        else:
+            with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=6) as stream:
+                yield stream
+            return
+    else:
+        raise ValueError(f"Unknown archive format: {fmt}")
+
+    sink.flush()
+    proc = subprocess.Popen(cli, stdin=subprocess.PIPE, stdout=sink)
+    try:
+        yield proc.stdin
+    finally:
+        proc.stdin.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"{cli[0]} exited with code {returncode}")
+
+
+def write_archive(source_dir: Path, sink: BinaryIO, fmt: str = "gz", threads: int = 1,
+                  excludes: Iterable[str] = ARCHIVE_EXCLUDES) -> None:
+    with compressed_writer(sink, fmt, threads) as stream:
+        with tarfile.open(fileobj=stream, mode="w|") as tar:
+            tar.add(source_dir, arcname=source_dir.name, filter=archive_filter(excludes))
+
+
+def make_tarball(source_dir: Path, tar_path: Path, fmt: str = "gz", threads: int = 1,
+                 excludes: Iterable[str] = ARCHIVE_EXCLUDES) -> None:
+    with tar_path.open("wb") as sink:
+        write_archive(source_dir, sink, fmt, threads, excludes)
+
+
+class ProducerStream:
+    """Read end of a pipe filled by `produce(sink)` on a background thread.
+
+    Reading past the end re-raises anything the producer raised, so a
+    consumer such as upload_fileobj fails instead of completing an upload
+    of a truncated archive.
+    """
+
+    def __init__(self, produce: Callable[[BinaryIO], None]):
+        read_fd, write_fd = os.pipe()
+        self._reader = os.fdopen(read_fd, "rb")
+        self._error: BaseException | None = None
+        self.bytes_read = 0
+
+        def _run() -> None:
+            try:
+                with os.fdopen(write_fd, "wb") as sink:
+                    produce(sink)
+            except BaseException as e:  # surfaced to the reader at EOF
+                self._error = e
+
+        self._thread = threading.Thread(target=_run, name="archive-producer", daemon=True)
+        self._thread.start()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._reader.read(size)
+        self.bytes_read += len(data)
+        if not data:
+            self._thread.join()
+            if self._error is not None:
+                raise RuntimeError(f"Archive producer failed: {self._error}") from self._error
+        return data
+
+    def close(self) -> None:
+        self._reader.close()
+        self._thread.join()
+
+
+def stream_tarball_to_s3(s3, bucket: str, key: str, source_dir: Path, fmt: str = "gz",
+                         threads: int = 1, excludes: Iterable[str] = ARCHIVE_EXCLUDES) -> int:
+    """Tar + compress `source_dir` straight into a multipart upload; no local archive.
+
+    Returns the archive's size in bytes.
+    """
+    stream = ProducerStream(lambda sink: write_archive(source_dir, sink, fmt, threads, excludes))
+    try:
+        s3.upload_fileobj(
+            stream, bucket, key,
+            ExtraArgs={"ContentType": ARCHIVE_CONTENT_TYPES[fmt]},
+            Config=STREAM_UPLOAD_TRANSFER_CONFIG,
+        )
+    finally:
+        stream.close()
+    logging.info("Streamed results archive -> s3://%s/%s (%d bytes)", bucket, key, stream.bytes_read)
+    return stream.bytes_read
+
+
+# ---------- Result cache ----------------------------------------------------
+GENOME_NAME_EXTS = sorted(FASTA_EXTS | GENBANK_EXTS | {".faa"}, key=len, reverse=True)
+
+
+def genome_stem(name: str) -> str:
+    """Map a genome name as written in Genie output back to its bins stem."""
+    for ext in GENOME_NAME_EXTS:
+        if name.lower().endswith(ext):
+            return name[: -len(ext)]
+    return name
+
+
+def result_cache_version(args, bin_ext: str) -> str:
+    """Version component of result-cache keys.
+
+    --hmm-set-version names the HMM set explicitly; otherwise fingerprint the
+    MagicLamp.py script so upgrading MagicLamp invalidates old entries. The
+    input kind (contigs / proteins / GenBank) is part of the key because it
+    changes how genes are called.
+    """
+    version = args.hmm_set_version
+    if not version:
+        script = shutil.which(args.magiclamp_bin) or args.magiclamp_bin
+        try:
+            version = "ml-" + file_digest(Path(script))[:16]
+        except OSError:
+            version = "unversioned"
+    return f"{safe_output_name(version)}-{bin_ext}"
+
+
+@dataclass
+class ResultCache:
+    """Per-genome, per-Genie results kept under <cache-dir>/results.
+
+    An entry holds one genome's rows of a Genie's normalized summary CSV and
+    its column of the heatmap, keyed by (genome SHA-256, Genie, HMM set
+    version). Genome names inside an entry are rewritten to the current
+    job's names when the entry is reused.
+    """
+    root: Path
+    version: str
+    digests: dict[str, str]            # bins stem -> SHA-256 of the uploaded genome
+    hmm_digest: str | None = None      # uploaded HMMs, for Custom (HmmGenie)
+    grew: bool = False                 # set once store() has written an entry
+
+    def entry(self, genie: str, stem: str) -> Path:
+        version = self.version
+        if genie == "Custom" and self.hmm_digest:
+            version = f"{version}-hmm{self.hmm_digest[:16]}"
+        return self.root / "results" / genie / version / self.digests[stem]
+
+    def lookup(self, genie: str, genomes: list[Path]) -> dict[str, Path]:
+        """Cached entries for the genomes that have one, keyed by stem."""
+        hits: dict[str, Path] = {}
+        for genome in genomes:
+            if genome.stem not in self.digests:
+                continue
+            entry = self.entry(genie, genome.stem)
+            if (entry / "meta.json").exists():
+                touch_cache_entry(entry)
+                hits[genome.stem] = entry
+        return hits
+
+    def store(self, genie: str, genomes: list[Path], summary_csv: Path, heatmap_csv: Path | None) -> int:
+        """Split a fresh run's outputs per genome and cache them.
+
+        Nothing is stored if a summary row or heatmap column names a genome
+        that isn't one of `genomes` — we would not be able to tell which
+        genome it belongs to. Returns the number of entries written.
+        """
+        stems = {g.stem for g in genomes if g.stem in self.digests}
+        with summary_csv.open("r", newline="", encoding="utf-8", errors="replace") as inp:
+            reader = csv.reader(inp)
+            header = next(reader, None) or []
+            gen_col = next((c for c in SUMMARY_GENOME_COLS if c in header), None)
+            if gen_col is None:
+                logging.info("Not caching %s results: no genome column in %s.", genie, summary_csv.name)
+                return 0
+            gi = header.index(gen_col)
+            rows: dict[str, list[list[str]]] = {stem: [] for stem in stems}
+            summary_suffixes: dict[str, str] = {}
+            for row in reader:
+                if not row or row == header or len(row) <= gi:
+                    continue
+                stem = genome_stem(row[gi])
+                if stem not in rows:
+                    logging.info("Not caching %s results: unknown genome %r.", genie, row[gi])
+                    return 0
+                rows[stem].append(row)
+                summary_suffixes.setdefault(stem, row[gi][len(stem):])
+
+        columns: dict[str, list[list[str]]] = {stem: [] for stem in stems}
+        heatmap_suffixes: dict[str, str] = {}
+        if heatmap_csv is not None and heatmap_csv.exists():
+            with heatmap_csv.open("r", newline="", encoding="utf-8", errors="replace") as inp:
+                reader = csv.reader(inp)
+                hm_header = next(reader, None) or ["X"]
+                col_stems = [genome_stem(name) for name in hm_header[1:]]
+                if any(stem not in columns for stem in col_stems):
+                    logging.info("Not caching %s results: unknown genome column in %s.", genie, heatmap_csv.name)
+                    return 0
+                for stem, name in zip(col_stems, hm_header[1:]):
+                    heatmap_suffixes[stem] = name[len(stem):]
+                for row in reader:
+                    if not row or not row[0]:
+                        continue
+                    for stem, value in zip(col_stems, row[1:]):
+                        columns[stem].append([row[0], value])
+
+        written = 0
+        for stem in stems:
+            entry = self.entry(genie, stem)
+            tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            with (tmp / "summary.csv").open("w", newline="", encoding="utf-8") as out:
+                writer = csv.writer(out)
+                writer.writerow(header)
+                writer.writerows(rows[stem])
+            with (tmp / "heatmap.csv").open("w", newline="", encoding="utf-8") as out:
+                writer = csv.writer(out)
+                writer.writerow(["X", stem])
+                writer.writerows(columns[stem])
+            meta = {
+                "genie": genie,
+                "genome_column": gen_col,
+                "stem": stem,
+                "summary_suffix": summary_suffixes.get(stem, ""),
+                "heatmap_suffix": heatmap_suffixes.get(stem, ""),
+                "created_at": utc_now(),
+            }
+            (tmp / "meta.json").write_text(json.dumps(meta, indent=2, sort_keys=True), encoding="utf-8")
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.replace(tmp, entry)
+                written += 1
+                self.grew = True
+            except OSError:
+                # A concurrent job stored the same entry first; keep theirs.
+                shutil.rmtree(tmp, ignore_errors=True)
+        return written
+
+    def materialize(self, entry: Path, stem: str, dest_dir: Path) -> tuple[Path, Path]:
+        """Copy a cached entry into `dest_dir`, renamed to the current job's genome."""
+        meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+        dest_dir.mkdir(parents=True, exist_ok=True)
+
+        summary = dest_dir / f"{stem}.summary.csv"
+        with (entry / "summary.csv").open("r", newline="", encoding="utf-8") as inp, \
+                summary.open("w", newline="", encoding="utf-8") as out:
+            reader = csv.reader(inp)
+            writer = csv.writer(out)
+            header = next(reader, None) or []
+            writer.writerow(header)
+            gi = header.index(meta["genome_column"]) if meta.get("genome_column") in header else None
+            for row in reader:
+                if gi is not None and gi < len(row):
+                    row[gi] = f"{stem}{meta.get('summary_suffix', '')}"
+                writer.writerow(row)
+
+        heatmap = dest_dir / f"{stem}.heatmap.csv"
+        with (entry / "heatmap.csv").open("r", newline="", encoding="utf-8") as inp, \
+                heatmap.open("w", newline="", encoding="utf-8") as out:
+            reader = csv.reader(inp)
+            writer = csv.writer(out)
+            next(reader, None)
+            writer.writerow(["X", f"{stem}{meta.get('heatmap_suffix', '')}"])
+            writer.writerows(reader)
+        return summary, heatmap
+
+
+def link_subset(genomes: list[Path], dest: Path) -> Path:
+    """A bins directory holding only `genomes`, linked rather than copied."""
+    shutil.rmtree(dest, ignore_errors=True)
+    dest.mkdir(parents=True)
+    for src in genomes:
+        link_or_copy(src, dest / src.name)
+    return dest
+
+
+# ---------- Genome sharding -------------------------------------------------
+#
+# With --shard-size N, a Genie whose (uncached) genomes outnumber N runs as
+# several MagicLamp.py calls on N-genome shards whose summary rows and
+# heatmap columns are merged afterwards. Shards run on this host, up to
+# --shard-workers at a time, or — with --shard-queue s3://bucket/prefix/ —
+# are published as tasks that any worker started with --serve-shards can
+# claim. The job's own worker works through unclaimed shards too, so a job
+# always finishes even when no helper is running.
+SHARD_POLL_SECONDS = 15
+
+
+def shard_genomes(genomes: list[Path], shard_size: int) -> list[list[Path]]:
+    """Split genomes into consecutive shards of at most `shard_size` (0 = one shard)."""
+    if shard_size <= 0 or len(genomes) <= shard_size:
+        return [genomes]
+    return [genomes[i:i + shard_size] for i in range(0, len(genomes), shard_size)]
+
+
+@dataclass
+class RunOutputs:
+    """Normalized outputs of one MagicLamp run — a whole Genie or one shard."""
+    summary: Path
+    heatmap: Path | None
+    log: Path | None = None
+    rows: int | None = None            # data rows in `summary`, when known
+    usage: ProcessUsage | None = None  # MagicLamp.py processes run on this host
+
+
+class ShardQueue:
+    """Shard tasks shared between worker hosts under s3://<bucket>/<prefix>.
+
+    One "directory" per task:
+      <slug>/<genie>/shard-0003/task.json        what to run (written last)
+                               bins/, hmms/      its inputs
+                               claim.json        written once, by the host running it
+                               result/           summary.csv, heatmap.csv, run.log
+                               done.json         {"state": "complete" | "failed", ...}
+
+    Claims are conditional puts (If-None-Match: *), so exactly one host wins
+    each shard. Tasks are not deleted; expire the prefix with a lifecycle rule.
+    """
+
+    def __init__(self, s3, url: str):
+        parsed = urllib.parse.urlparse(url)
+        if parsed.scheme != "s3" or not parsed.netloc:
+            raise ValueError(f"--shard-queue must be s3://bucket/prefix/, got {url!r}")
+        self.s3 = s3
+        self.bucket = parsed.netloc
+        self.prefix = parsed.path.lstrip("/")
+        if self.prefix and not self.prefix.endswith("/"):
+            self.prefix += "/"
+
+    def task_prefix(self, slug: str, genie: str, index: int) -> str:
+        return f"{self.prefix}{slug}/{genie}/shard-{index:04d}/"
+
+    def publish(
+        self,
+        slug: str,
+        genie: str,
+        shards: list[list[Path]],
+        bin_ext: str,
+        hmm_dir: Path | None,
+        workers: int = 8,
+    ) -> list[str]:
+        """Upload every shard's inputs, then its task.json. Returns task prefixes."""
+        tasks = [self.task_prefix(slug, genie, i) for i in range(len(shards))]
+        hmms = sorted(hmm_dir.iterdir()) if hmm_dir else []
+        publish_artifacts(self.s3, self.bucket, [
+            *(Artifact(f"{task}bins/{g.name}", g, None) for task, shard in zip(tasks, shards) for g in shard),
+            *(Artifact(f"{task}hmms/{h.name}", h, None) for task in tasks for h in hmms),
+        ], workers=workers)
+        for i, (task, shard) in enumerate(zip(tasks, shards)):
+            put_json(self.s3, self.bucket, f"{task}task.json", {
+                "slug": slug,
+                "genie": genie,
+                "shard": i,
+                "shards": len(shards),
+                "bin_ext": bin_ext,
+                "genomes": [g.name for g in shard],
+                "hmms": bool(hmms),
+                "created_at": utc_now(),
+            })
+        return tasks
+
+    def claim(self, task: str) -> bool:
+        """Try to take `task` for this host; False if another host already has it."""
+        try:
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=f"{task}claim.json",
+                Body=json.dumps({"host": os.uname().nodename, "pid": os.getpid(), "claimed_at": utc_now()}).encode(),
+                ContentType="application/json",
+                IfNoneMatch="*",
+            )
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"PreconditionFailed", "ConditionalRequestConflict", "412", "409"}:
+                return False
+            raise
+
+    def spec(self, task: str) -> dict:
+        spec = get_json(self.s3, self.bucket, f"{task}task.json")
+        if spec is None:
+            raise RuntimeError(f"Shard task s3://{self.bucket}/{task} has no task.json.")
+        return spec
+
+    def state(self, task: str) -> dict | None:
+        """done.json of a finished task, or None while it is open or running."""
+        return get_json(self.s3, self.bucket, f"{task}done.json")
+
+    def complete(self, task: str, result: RunOutputs | None, error: str | None = None) -> None:
+        """Publish a shard's outputs (if any), then mark it done."""
+        if result is not None:
+            publish_artifacts(self.s3, self.bucket, [
+                Artifact(f"{task}result/summary.csv", result.summary, "text/csv"),
+                *([Artifact(f"{task}result/heatmap.csv", result.heatmap, "text/csv")] if result.heatmap else []),
+                *([Artifact(f"{task}result/run.log", result.log, "text/plain")] if result.log else []),
+            ])
+        put_json(self.s3, self.bucket, f"{task}done.json", {
+            "state": "failed" if error else "complete",
+            "error": error,
+            "host": os.uname().nodename,
+            "finished_at": utc_now(),
+        })
+
+    def fetch(self, task: str, dest: Path) -> RunOutputs:
+        """Download a completed task's outputs from another host."""
+        files = {p.name: p for p in download_prefix(self.s3, self.bucket, f"{task}result/", dest)}
+        if "summary.csv" not in files:
+            raise RuntimeError(f"Shard s3://{self.bucket}/{task} finished without a summary CSV.")
+        return RunOutputs(files["summary.csv"], files.get("heatmap.csv"), files.get("run.log"))
+
+    def open_tasks(self) -> list[str]:
+        """Published tasks nobody has claimed yet, oldest job first."""
+        published: list[str] = []
+        claimed: set[str] = set()
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                task, _, name = obj["Key"].rpartition("/")
+                if name == "task.json":
+                    published.append(f"{task}/")
+                elif name in ("claim.json", "done.json"):
+                    claimed.add(f"{task}/")
+        return sorted(t for t in published if t not in claimed)
+
+
+def run_shards(
+    args,
+    job_root: Path,
+    slug: str,
+    genie: str,
+    shards: list[list[Path]],
+    bin_ext: str,
+    hmm_dir: Path | None,
+    summary_dest: Path,
+    heatmap_candidate: Path,
+    log_handle,
+    shard_queue: ShardQueue | None = None,
+) -> RunOutputs:
+    """Run one Genie shard by shard and merge the shards' outputs.
+
+    The merged summary goes to `summary_dest` and the merged heatmap (if
+    any) to `heatmap_candidate`. Any shard failing fails the Genie, since
+    its genomes would silently be missing from the results.
+    """
+    shard_root = job_root / "shards" / genie
+    workers = max(1, min(args.shard_workers, len(shards)))
+    shard_args = with_threads(args, max(1, args.threads // workers))
+
+    def _local(i: int) -> RunOutputs:
+        # Raw MagicLamp output goes under the Genie's folder so it still
+        # lands in the results archive; staging and logs stay in shards/.
+        out = shard_root / f"shard-{i:04d}"
+        run_dir = link_subset(shards[i], out / "bins")
+        log = out / "run.log"
+        with log.open("w", encoding="utf-8") as shard_log:
+            outputs = run_magiclamp_once(
+                shard_args, genie, run_dir, job_root / genie / f"shard-{i:04d}", bin_ext, hmm_dir,
+                out / "summary.csv", out / "heatmap.csv", shard_log,
+            )
+        outputs.log = log
+        return outputs
+
+    log_handle.write(
+        f"[{genie}] Running {sum(len(s) for s in shards)} genome(s) as {len(shards)} shard(s)"
+        + (f" via s3://{shard_queue.bucket}/{shard_queue.prefix}.\n" if shard_queue else ".\n")
+    )
+    log_handle.flush()
+
+    results: dict[int, RunOutputs] = {}
+    if shard_queue is None:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = dict(enumerate(pool.map(_local, range(len(shards)))))
+    else:
+        tasks = shard_queue.publish(slug, genie, shards, bin_ext, hmm_dir, workers=args.upload_workers)
+        pending = dict(enumerate(tasks))
+        # When each shard was first seen claimed by another host. Its
+        # --shard-timeout counts from then, or from the end of our last local
+        # shard if that is later, so time spent running shards here never
+        # counts against the hosts helping out.
+        claimed_at: dict[int, float] = {}
+        local_done = time.monotonic()
+        while pending:
+            progressed = False
+            for i, task in list(pending.items()):
+                done = shard_queue.state(task)
+                if done is None and i not in claimed_at:
+                    if shard_queue.claim(task):
+                        try:
+                            results[i] = _local(i)
+                        except RuntimeError as e:
+                            shard_queue.complete(task, None, error=str(e))
+                            raise
+                        shard_queue.complete(task, results[i])
+                        local_done = time.monotonic()
+                        del pending[i]
+                        progressed = True
+                    else:
+                        claimed_at[i] = time.monotonic()
+                elif done is not None:
+                    if done.get("state") != "complete":
+                        raise RuntimeError(f"Shard {i} failed on {done.get('host')}: {done.get('error')}")
+                    results[i] = shard_queue.fetch(task, shard_root / f"shard-{i:04d}" / "remote")
+                    del pending[i]
+                    progressed = True
+            if pending and not progressed:
+                now = time.monotonic()
+                overdue = [
+                    i for i in sorted(pending)
+                    if now >= max(claimed_at.get(i, now), local_done) + args.shard_timeout
+                ]
+                for i in overdue:
+                    # Last look before duplicating the work: it may just have finished.
+                    if shard_queue.state(pending[i]) is not None:
+                        continue
+                    # Claimed by a host that never finished; run it here.
+                    logging.warning("Shard %d of %s timed out on another host; running it locally.", i, genie)
+                    results[i] = _local(i)
+                    local_done = time.monotonic()
+                    del pending[i]
+                if not overdue:
+                    time.sleep(SHARD_POLL_SECONDS)
+
+    ordered = [results[i] for i in range(len(shards))]
+    for i, result in enumerate(ordered):
+        if result.log and result.log.exists():
+            log_handle.write(f"\n----- {genie} shard {i + 1}/{len(shards)} ({len(shards[i])} genome(s)) -----\n")
+            with result.log.open("r", encoding="utf-8", errors="replace") as src:
+                shutil.copyfileobj(src, log_handle)
+    rows = merge_summary_csvs([r.summary for r in ordered], summary_dest)
+    heatmaps = [r.heatmap for r in ordered if r.heatmap]
+    merged = bool(heatmaps) and merge_heatmap_csvs(heatmaps, heatmap_candidate)
+    # Shards fetched from other hosts carry no usage; only local ones count.
+    usage = ProcessUsage()
+    for result in ordered:
+        usage.add(result.usage)
+    return RunOutputs(summary_dest, heatmap_candidate if merged else None, rows=rows, usage=usage)
+
+
+def run_shard_task(args, s3, task: str) -> str:
+    """Run one shard claimed from --shard-queue on this host and publish its result.
+
+    The claim is ours, so every way out publishes a done.json: a MagicLamp
+    failure returns "failed", anything else (missing task.json, a failed
+    download, S3 errors) is published as a failure and re-raised. Without
+    it the owning job would wait out --shard-timeout for nothing.
+    """
+    queue = ShardQueue(s3, args.shard_queue)
+    work = Path(args.work_root) / "shards" / safe_output_name(task.strip("/"))
+    shutil.rmtree(work, ignore_errors=True)
+    try:
+        spec = queue.spec(task)
+        bins = work / "bins"
+        download_prefix(s3, queue.bucket, f"{task}bins/", bins, workers=args.download_workers)
+        hmm_dir: Path | None = None
+        if spec.get("hmms"):
+            hmm_dir = work / "hmms"
+            download_prefix(s3, queue.bucket, f"{task}hmms/", hmm_dir, workers=args.download_workers)
+        log = work / "run.log"
+        try:
+            with log.open("w", encoding="utf-8") as log_handle:
+                outputs = run_magiclamp_once(
+                    args, spec["genie"], bins, work / "output", spec["bin_ext"], hmm_dir,
+                    work / "summary.csv", work / "heatmap.csv", log_handle,
+                )
+        except RuntimeError as e:
+            logging.warning("Shard %s failed: %s", task, e)
+            queue.complete(task, None, error=str(e))
+            return "failed"
+        outputs.log = log
+        queue.complete(task, outputs)
+        return "complete"
+    except Exception as e:
+        logging.exception("Shard %s failed", task)
+        queue.complete(task, None, error=repr(e))
+        raise
+    finally:
+        if args.clean:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+# ---------- Per-Genie runs --------------------------------------------------
+@dataclass
+class GenieOutcome:
+    """What one Genie produced for a job, merged into status.json in manifest order."""
+    genie: str
+    status: dict
+    summary: Path | None = None
+    heatmap: Path | None = None
+    report: Path | None = None
+    extras: list[Path] = field(default_factory=list)   # side-cars published next to the CSVs
+    pending_report: Future | None = None               # report still rendering (see run_genies)
+    usage: ProcessUsage | None = None                   # its MagicLamp.py processes (see run_command)
+
+
+def run_magiclamp_once(
+    args,
+    genie: str,
+    run_dir: Path,
+    genie_out: Path,
+    bin_ext: str,
+    hmm_dir: Path | None,
+    summary_dest: Path,
+    heatmap_candidate: Path,
+    log_handle,
+) -> RunOutputs:
+    """One MagicLamp.py call on `run_dir`, with its outputs normalized.
+
+    Writes the summary CSV to `summary_dest` and the heatmap CSV (MagicLamp's
+    own or one synthesized from the summary) to `heatmap_candidate`. Raises
+    RuntimeError if MagicLamp fails or leaves no summary behind.
+    """
+    genie_out.mkdir(parents=True, exist_ok=True)
+    summary_dest.parent.mkdir(parents=True, exist_ok=True)
+    cmd = build_magiclamp_command(args, genie, run_dir, genie_out, bin_ext, hmm_dir)
+    usage = run_command(cmd, log_handle)
+
+    # Collect the canonical outputs.
+    summary_src = find_summary_csv(genie_out, genie)
+    if not summary_src:
+        raise RuntimeError(f"Could not find {summary_filename(genie)} under {genie_out}.")
+    rows = normalize_csv(summary_src, summary_dest)
+    log_handle.write(f"[{genie}] {rows} summary row(s).\n")
+
+    heatmap_src = find_heatmap_csv(genie_out, genie)
+    if heatmap_src:
+        normalize_heatmap(heatmap_src, heatmap_candidate)
+        return RunOutputs(summary_dest, heatmap_candidate, rows=rows, usage=usage)
+    # FeGenie (and a few others) occasionally complete without
+    # writing a heatmap CSV — most commonly on single-genome
+    # inputs. Rather than ship an incomplete results page that
+    # says "Heatmap not available for this run", we synthesize
+    # the categories × genomes count table from the summary CSV.
+    # If even that fails (no category/genome columns), we return
+    # None and the frontend's existing empty state still kicks in.
+    if synthesize_heatmap_from_summary(summary_dest, heatmap_candidate):
+        log_handle.write(
+            f"[{genie}] No heatmap CSV emitted by MagicLamp; "
+            f"synthesized {heatmap_candidate.name} from the summary CSV.\n"
+        )
+        return RunOutputs(summary_dest, heatmap_candidate, rows=rows, usage=usage)
+    return RunOutputs(summary_dest, None, rows=rows, usage=usage)
+
+
+def write_summary_extras(
+    args,
+    genie: str,
+    summary_dest: Path,
+    heatmap_dest: Path | None,
+    final_dir: Path,
+    log_handle,
+    genome_sizes: dict[str, int] | None = None,
+) -> list[Path]:
+    """Side-cars (--summary-sidecar), the Parquet export (--columnar-export)
+    and extra heatmap matrices (--heatmap-aggregations).
+
+    The CSVs stay the source of truth: any failure here (e.g. pyarrow not
+    installed) is logged and the Genie still completes without the extras.
+    """
+    formats = [args.summary_sidecar] if args.summary_sidecar else []
+    if args.columnar_export and "parquet" not in formats:
+        formats.append("parquet")
+    aggregations = [a.strip() for a in args.heatmap_aggregations.split(",") if a.strip()]
+    for name in set(aggregations) - set(HEATMAP_AGGREGATIONS):
+        logging.warning("Ignoring unknown heatmap aggregation %r (known: %s).", name, ", ".join(HEATMAP_AGGREGATIONS))
+    extras: list[Path] = []
+    if aggregations:
+        try:
+            matrices = aggregate_summary(summary_dest, aggregations, genome_sizes) or {}
+            for name in aggregations:
+                if name in matrices:
+                    dest = final_dir / f"{genie}.heatmap.{name}.csv"
+                    write_matrix(matrices[name], dest)
+                    extras.append(dest)
+        except (ImportError, OSError, ValueError) as err:
+            logging.warning("No heatmap aggregations for %s: %s", genie, err)
+            log_handle.write(f"[{genie}] Skipped heatmap aggregations: {err}\n")
+    if not formats:
+        return extras
+    try:
+        normalize_csv(summary_dest, summary_dest, sidecars=formats)
+        extras.extend(sidecar_path(summary_dest, fmt) for fmt in formats)
+        if args.columnar_export:
+            files = {"summary": sidecar_path(summary_dest, "parquet")}
+            if heatmap_dest is not None:
+                files["heatmap"] = heatmap_dest.with_suffix(".parquet")
+                heatmap_to_parquet(heatmap_dest, files["heatmap"])
+                extras.append(files["heatmap"])
+            index_path = final_dir / f"{genie}-results.index.json"
+            columnar_index(genie, files, index_path, genome_columns=(*SUMMARY_GENOME_COLS, "genome"))
+            extras.append(index_path)
+    except (RuntimeError, ImportError, OSError) as err:
+        logging.warning("No side-cars for %s: %s", genie, err)
+        log_handle.write(f"[{genie}] Skipped side-cars: {err}\n")
+    return extras
+
+
+def run_genie(
+    args,
+    job_root: Path,
+    slug: str,
+    genie: str,
+    bins_dir: Path,
+    bin_ext: str,
+    hmm_dir: Path | None,
+    final_dir: Path,
+    log_path: Path,
+    result_cache: ResultCache | None = None,
+    shard_queue: ShardQueue | None = None,
+    genome_sizes: dict[str, int] | None = None,
+    reports: ReportQueue | None = None,
+) -> GenieOutcome:
+    """Run one Genie end to end: MagicLamp.py, output collection, report.
+
+    Each Genie writes into its own `job_root / genie` directory and its own
+    log file, so several can run side by side against the same read-only
+    bins directory. With a result cache, MagicLamp only runs on the genomes
+    the cache has not seen, and cached rows are merged into the outputs.
+    More than --shard-size genomes run as shards (see run_shards). With
+    `reports`, the report is only queued there and the outcome carries its
+    future in pending_report.
+    """
+    genie_out = job_root / genie
+    genie_out.mkdir(parents=True, exist_ok=True)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_dest = final_dir / summary_filename(genie)
+    heatmap_dest: Path | None = None
+    usage: ProcessUsage | None = None
+
+    with log_path.open("w", encoding="utf-8") as log_handle:
+        genomes = sorted(p for p in bins_dir.iterdir() if p.is_file())
+        hits = result_cache.lookup(genie, genomes) if result_cache else {}
+        todo = [g for g in genomes if g.stem not in hits]
+        if hits:
+            log_handle.write(
+                f"[{genie}] Reusing cached results for {len(hits)} of "
+                f"{len(genomes)} genome(s).\n"
+            )
+            log_handle.flush()
+
+        summary_rows: int | None = None
+        try:
+            if todo or not hits:
+                shards = shard_genomes(todo, args.shard_size)
+                if len(shards) > 1:
+                    outputs = run_shards(
+                        args, job_root, slug, genie, shards, bin_ext, hmm_dir,
+                        summary_dest, final_dir / heatmap_filename(genie), log_handle, shard_queue,
+                    )
+                else:
+                    run_dir = bins_dir if not hits else link_subset(todo, job_root / "subsets" / genie)
+                    outputs = run_magiclamp_once(
+                        args, genie, run_dir, genie_out, bin_ext, hmm_dir,
+                        summary_dest, final_dir / heatmap_filename(genie), log_handle,
+                    )
+                heatmap_dest, summary_rows, usage = outputs.heatmap, outputs.rows, outputs.usage
+
+                if result_cache:
+                    stored = result_cache.store(genie, todo, summary_dest, heatmap_dest)
+                    if stored:
+                        log_handle.write(f"[{genie}] Cached results for {stored} genome(s).\n")
+
+            if hits:
+                hit_dir = job_root / "cache-hits" / genie
+                cached = [result_cache.materialize(hits[g.stem], g.stem, hit_dir) for g in genomes if g.stem in hits]
+                summary_rows = merge_summary_csvs(
+                    ([summary_dest] if todo else []) + [summary for summary, _ in cached],
+                    summary_dest,
+                )
+                candidate = final_dir / heatmap_filename(genie)
+                heatmap_dest = candidate if merge_heatmap_csvs(
+                    ([heatmap_dest] if heatmap_dest else []) + [heatmap for _, heatmap in cached],
+                    candidate,
+                ) else None
+        except RuntimeError as run_err:
+            logging.warning("Genie %s failed: %s", genie, run_err)
+            return GenieOutcome(genie, {"genie": genie, "state": "failed", "error": str(run_err)}, usage=usage)
+        except Exception as err:
+            # Cache I/O (disk full, a concurrent eviction) or a malformed CSV
+            # in the merge fails this Genie only, like a MagicLamp error.
+            logging.exception("Genie %s failed", genie)
+            log_handle.write(f"[{genie}] Failed: {err!r}\n")
+            return GenieOutcome(genie, {"genie": genie, "state": "failed", "error": repr(err)}, usage=usage)
+
+        # Compressed / columnar copies of the final (merged) outputs for the viewer.
+        extras = write_summary_extras(
+            args, genie, summary_dest, heatmap_dest, final_dir, log_handle, genome_sizes,
+        )
+
+    # Per-Genie Plotly report, queued on `reports` when run_genies shares one.
+    report_dest = final_dir / f"{genie}-report.html"
+    report_kwargs = dict(
+        args=args, job_root=job_root, report_dest=report_dest, slug=slug,
+        summary_csv=summary_dest, heatmap_csv=heatmap_dest, log_path=log_path,
+    )
+    if reports is None:
+        generate_genie_report(genie=genie, **report_kwargs)
+        pending = None
+    else:
+        pending = reports.submit(genie, **report_kwargs)
+
+    return GenieOutcome(
+        genie,
+        {
+            "genie": genie,
+            "state": "complete",
+            "summary": summary_filename(genie),
+            "heatmap": heatmap_filename(genie) if heatmap_dest else None,
+            "report": f"{genie}-report.html",
+            "cached_genomes": len(hits),
+            "summary_rows": summary_rows,
+            "extras": [p.name for p in extras],
+        },
+        summary=summary_dest,
+        heatmap=heatmap_dest,
+        report=report_dest,
+        extras=extras,
+        pending_report=pending,
+        usage=usage,
+    )
+
+
+def run_genies(
+    args,
+    job_root: Path,
+    slug: str,
+    genies: list[str],
+    bins_dir: Path,
+    bin_ext: str,
+    hmm_dir: Path | None,
+    final_dir: Path,
+    result_cache: ResultCache | None = None,
+    shard_queue: ShardQueue | None = None,
+    genome_sizes: dict[str, int] | None = None,
+    metrics: JobMetrics | None = None,
+) -> list[GenieOutcome]:
+    """Run every Genie in the manifest, up to --parallel-genies at a time.
+
+    The job's thread budget is split evenly across the Genies running at
+    once. Each Genie's report is queued as soon as the Genie finishes, the
+    combined report (--combined-report) once they all have, and all of them
+    are rendered before this returns. Outcomes come back in
+    manifest order regardless of which Genie finishes first. With
+    `metrics`, each Genie's wall time and MagicLamp usage and each report's
+    render time are recorded there.
+    """
+    if not genies:
+        return []
+    parallel = max(1, min(args.parallel_genies, len(genies)))
+    genie_args = with_threads(args, max(1, args.threads // parallel))
+    log_dir = job_root / "logs"
+    # Report processes start importing now, while MagicLamp runs.
+    renderers = report_pool(args, len(genies))
+
+    # Threads exit first, so every queued report has been rendered before the pool shuts down.
+    with renderers or contextlib.nullcontext(), ThreadPoolExecutor(max_workers=len(genies)) as threads:
+        reports = ReportQueue(threads, renderers, metrics)
+
+        def _one(genie: str) -> GenieOutcome:
+            started = time.perf_counter()
+            outcome = run_genie(
+                genie_args, job_root, slug, genie, bins_dir, bin_ext, hmm_dir,
+                final_dir, log_dir / f"{genie}.log", result_cache, shard_queue,
+                genome_sizes, reports,
+            )
+            if metrics is not None:
+                metrics.record_genie(
+                    genie,
+                    state=outcome.status["state"],
+                    seconds=round(time.perf_counter() - started, 3),
+                    threads=genie_args.threads,
+                    cached_genomes=outcome.status.get("cached_genomes", 0),
+                    magiclamp=outcome.usage.as_dict() if outcome.usage else None,
+                )
+            return outcome
+
+        if parallel == 1:
+            outcomes = [_one(g) for g in genies]
+        else:
+            logging.info("Running %d Genie(s), %d at a time (%d thread(s) each).",
+                         len(genies), parallel, genie_args.threads)
+            with ThreadPoolExecutor(max_workers=parallel) as pool:
+                outcomes = list(pool.map(_one, genies))
+        heatmaps = [(o.genie, o.heatmap) for o in outcomes if o.heatmap is not None]
+        combined: Future | None = None
+        if args.combined_report == "auto" and len(heatmaps) > 1:
+            combined = reports.submit_combined(
+                args, heatmaps, final_dir / COMBINED_REPORT, log_dir / COMBINED_REPORT_LOG,
+            )
+        for outcome in outcomes:
+            if outcome.pending_report is not None:
+                outcome.pending_report.result()
+        if combined is not None:
+            # Optional: a failure leaves it out of the job (status.json says so)
+            # but must still show up in the logs.
+            try:
+                combined.result()
+            except Exception as e:
+                logging.exception("Combined report failed")
+                with (log_dir / COMBINED_REPORT_LOG).open("a", encoding="utf-8") as log_handle:
+                    log_handle.write(f"Combined report failed: {e!r}\n")
+    return outcomes
+
+
+def append_genie_logs(log_handle, job_root: Path, genies: list[str]) -> None:
+    """Copy each Genie's own log into run.log as one section, in manifest order,
+    followed by the combined report's log if there is one."""
+    for genie in genies:
+        log_handle.write(f"\n===== Running Genie: {genie} =====\n")
+        genie_log = job_root / "logs" / f"{genie}.log"
+        if genie_log.exists():
+            with genie_log.open("r", encoding="utf-8", errors="replace") as src:
+                shutil.copyfileobj(src, log_handle)
+    combined_log = job_root / "logs" / COMBINED_REPORT_LOG
+    if combined_log.exists():
+        log_handle.write("\n===== Combined report =====\n")
+        with combined_log.open("r", encoding="utf-8", errors="replace") as src:
+            shutil.copyfileobj(src, log_handle)
+    log_handle.flush()
 
 
 # ---------- Per-job pipeline ------------------------------------------------
-def process_job(args, s3, prefix: str) -> None:
+def process_job(args, s3, prefix: str) -> str:
+    """Run one job end to end. Returns how it ended: complete, failed,
+    skipped (already has a status.json) or waiting (no form-data.txt yet)."""
     slug_match = PREFIX_RE.match(prefix)
     if not slug_match:
-        return
+        return "skipped"
     slug = slug_match.group("slug")
     result_prefix = f"magiclamp-{slug}/"
     status_key = f"{result_prefix}status.json"
 
     if s3_key_exists(s3, args.results_bucket, status_key) and not args.force:
         logging.info("Skipping %s; result status already exists.", prefix)
-        return
+        return "skipped"
 
     manifest_key = manifest_key_for(prefix)
     if not s3_key_exists(s3, args.input_bucket, manifest_key):
         logging.info("Skipping %s; form-data.txt not present yet.", prefix)
-        return
+        return "waiting"
 
     job_root = Path(args.work_root) / f"magiclamp-{slug}"
     if job_root.exists():
         shutil.rmtree(job_root)
     job_dir = job_root / "input"
+    unpacked_dir = job_root / "unpacked"
     bins_dir = job_root / "bins"
     hmm_dir = job_root / "hmms"
+    orf_dir = job_root / "orfs"
     out_dir = job_root
     final_dir = job_root / "frontend_results"
     log_path = job_root / "run.log"
@@ -828,8 +3477,57 @@ def process_job(args, s3, prefix: str) -> None:
     )
 
     manifest: JobManifest | None = None
+    validation: dict[str, dict] = {}
+    genome_stats: dict[str, dict] = {}
+    metrics = JobMetrics()
+    orf_calls: list[Path] = []
+    result_cache: ResultCache | None = None
     try:
-        download_prefix(s3, args.input_bucket, prefix, job_dir)
+        # Start validating (or unpacking) each upload the moment it lands
+        # instead of after the whole prefix has downloaded. Full-file scans
+        # and decompression are CPU bound, so they run on a process pool.
+        unpacked: list[Path] = []
+        check_cpu = children_cpu_seconds()
+        with ProcessPoolExecutor(max_workers=max(1, args.threads)) as check_pool:
+            # Start the workers from this thread, before any download thread
+            # exists: with fork the first submit forks them all, and forking
+            # from a download thread would copy boto3/urllib3 locks mid-use.
+            check_pool.submit(os.getpid).result()
+            pending_checks: dict[Path, Future] = {}
+            pending_unpacks: list[Future] = []
+
+            def _on_download(local: Path) -> None:
+                if local.parent != job_dir:
+                    return
+                kind = input_kind(local.name)
+                if kind == "genome":
+                    pending_checks[local] = check_pool.submit(scan_genome, local)
+                elif kind in ("compressed", "archive"):
+                    pending_unpacks.append(check_pool.submit(unpack_input, local, unpacked_dir))
+
+            with metrics.phase("download") as downloaded:
+                files = download_prefix(
+                    s3, args.input_bucket, prefix, job_dir,
+                    workers=args.download_workers, on_file=_on_download,
+                )
+                downloaded["files"] = len(files)
+                downloaded["bytes"] = sum(p.stat().st_size for p in files)
+            with metrics.phase("validation") as validated:
+                for future in pending_unpacks:
+                    for path in future.result():
+                        unpacked.append(path)
+                        if input_kind(path.name) == "genome":
+                            pending_checks[path] = check_pool.submit(scan_genome, path)
+                checks = {path: future.result() for path, future in pending_checks.items()}
+                validated["genomes"] = len(checks)
+        # The scan processes are reaped once the pool has shut down.
+        validated["cpu_seconds"] = round(children_cpu_seconds() - check_cpu, 3)
+        validation.update({path.name: report.summary() for path, report in checks.items()})
+        genome_stats.update({
+            path.name: report.stats()
+            for path, report in checks.items()
+            if isinstance(report, FastaReport) and report.ok
+        })
         manifest_path = job_dir / "form-data.txt"
         manifest = parse_manifest(manifest_path, fallback_slug=slug)
 
@@ -840,23 +3538,34 @@ def process_job(args, s3, prefix: str) -> None:
         for g in manifest.genies:
             magiclamp_subcommand(g)  # raises nothing; OmniGenie path catches the unknown case
 
-        genomes, hmms = split_inputs(job_dir)
-        bin_ext, normalized = prepare_bins(genomes, bins_dir)
-
-        needs_hmm = any(g == "Custom" for g in manifest.genies)
-        used_hmm_dir: Path | None = None
-        # Missing HMMs only fails the Custom genie, not the whole job, so any
-        # other genies in the manifest still run.
-        custom_missing_hmm = needs_hmm and not hmms
-        if needs_hmm and not custom_missing_hmm:
-            prepare_hmms(hmms, hmm_dir)
-            used_hmm_dir = hmm_dir
+        with metrics.phase("staging") as staged:
+            genomes, hmms = split_inputs(job_dir, unpacked)
+            bin_ext, normalized = prepare_bins(genomes, bins_dir, checks)
+            # Assembly sizes by bins stem, for --heatmap-aggregations per-mbp.
+            genome_sizes = {
+                dest.stem: checks[src].total_length
+                for src, dest in zip(genomes, normalized)
+                if isinstance(checks.get(src), FastaReport)
+            }
+
+            requested_genies = list(manifest.genies)
+            needs_hmm = any(g == "Custom" for g in manifest.genies)
+            used_hmm_dir: Path | None = None
+            # Missing HMMs only fails the Custom genie, not the whole job, so any
+            # other genies in the manifest still run.
+            custom_missing_hmm = needs_hmm and not hmms
+            if needs_hmm and not custom_missing_hmm:
+                prepare_hmms(hmms, hmm_dir)
+                used_hmm_dir = hmm_dir
+            staged["genomes"] = len(normalized)
+            staged["bin_ext"] = bin_ext
 
         # Per-Genie bookkeeping for status.json. Order preserved from manifest.
         per_genie_status: list[dict] = []
         per_genie_summary_paths: list[Path] = []
         per_genie_heatmap_paths: list[Path] = []
         per_genie_report_paths: list[Path] = []
+        per_genie_extra_paths: list[Path] = []
 
         if custom_missing_hmm:
             per_genie_status.append({
@@ -876,93 +3585,75 @@ def process_job(args, s3, prefix: str) -> None:
             if used_hmm_dir:
                 log_handle.write(f"HMMs:    {[p.name for p in hmms]}\n")
 
-            # Run each Genie sequentially. Each one writes into its own
-            # subdirectory so their summary/heatmap CSVs cannot collide.
-            for genie in manifest.genies:
-                log_handle.write(f"\n===== Running Genie: {genie} =====\n")
-                log_handle.flush()
-
-                genie_out = out_dir / genie
-                genie_out.mkdir(parents=True, exist_ok=True)
-
-                cmd = build_magiclamp_command(
-                    args, genie, bins_dir, genie_out, bin_ext, used_hmm_dir
-                )
+            # Call genes once per genome (or reuse earlier calls) and hand
+            # every Genie the proteins instead of the contigs. GenBank inputs
+            # already carry their CDS translations.
+            run_bins_dir, run_bin_ext = bins_dir, bin_ext
+            if args.cache_dir and args.orf_cache and bin_ext == "fa":
                 try:
-                    run_command(cmd, log_handle)
-                except RuntimeError as run_err:
-                    logging.warning("Genie %s failed: %s", genie, run_err)
-                    per_genie_status.append({"genie": genie, "state": "failed", "error": str(run_err)})
-                    continue
-
-                # Collect the canonical outputs.
-                summary_src = find_summary_csv(genie_out, genie)
-                if not summary_src:
-                    msg = (
-                        f"Could not find {summary_filename(genie)} under {genie_out}."
-                    )
-                    logging.warning(msg)
-                    per_genie_status.append({"genie": genie, "state": "failed", "error": msg})
-                    continue
-
-                summary_dest = final_dir / summary_filename(genie)
-                normalize_csv(summary_src, summary_dest)
-                per_genie_summary_paths.append(summary_dest)
-
-                heatmap_dest: Path | None = None
-                heatmap_src = find_heatmap_csv(genie_out, genie)
-                if heatmap_src:
-                    heatmap_dest = final_dir / heatmap_filename(genie)
-                    normalize_heatmap(heatmap_src, heatmap_dest)
-                    per_genie_heatmap_paths.append(heatmap_dest)
-                else:
-                    # FeGenie (and a few others) occasionally complete without
-                    # writing a heatmap CSV — most commonly on single-genome
-                    # inputs. Rather than ship an incomplete results page that
-                    # says "Heatmap not available for this run", we synthesize
-                    # the categories × genomes count table from the summary CSV.
-                    # If even that fails (no category/genome columns), we leave
-                    # heatmap_dest as None and the frontend's existing empty
-                    # state still kicks in.
-                    candidate = final_dir / heatmap_filename(genie)
-                    if synthesize_heatmap_from_summary(summary_dest, candidate):
-                        heatmap_dest = candidate
-                        per_genie_heatmap_paths.append(heatmap_dest)
-                        log_handle.write(
-                            f"[{genie}] No heatmap CSV emitted by MagicLamp; "
-                            f"synthesized {candidate.name} from the summary CSV.\n"
-                        )
-
-                # Per-Genie Plotly report.
-                report_dest = final_dir / f"{genie}-report.html"
-                maybe_generate_report(
-                    args, job_root, report_dest, slug, genie,
-                    summary_dest, heatmap_dest, log_handle,
+                    with metrics.phase("orfs"):
+                        stage_orfs(args, normalized, orf_dir, log_handle, orf_calls)
+                    run_bins_dir, run_bin_ext = orf_dir, "faa"
+                except RuntimeError as orf_err:
+                    logging.warning("ORF staging failed; Genies will call genes themselves: %s", orf_err)
+                    log_handle.write(f"ORF cache unavailable for this job: {orf_err}\n")
+
+            if args.cache_dir and args.result_cache:
+                result_cache = ResultCache(
+                    root=Path(args.cache_dir),
+                    version=result_cache_version(args, run_bin_ext),
+                    digests={p.stem: file_digest(p) for p in normalized},
+                    hmm_digest=(
+                        hashlib.sha256("".join(file_digest(h) for h in hmms).encode()).hexdigest()
+                        if used_hmm_dir else None
+                    ),
                 )
-                per_genie_report_paths.append(report_dest)
 
-                per_genie_status.append({
-                    "genie": genie,
-                    "state": "complete",
-                    "summary": summary_filename(genie),
-                    "heatmap": heatmap_filename(genie) if heatmap_dest else None,
-                    "report": f"{genie}-report.html",
-                })
+            # Each Genie writes into its own subdirectory and log file, so
+            # their outputs cannot collide even when several run at once.
+            try:
+                with metrics.phase("genies"):
+                    outcomes = run_genies(
+                        args, job_root, slug, manifest.genies, run_bins_dir, run_bin_ext,
+                        used_hmm_dir, final_dir, result_cache,
+                        ShardQueue(s3, args.shard_queue) if args.shard_queue else None,
+                        genome_sizes, metrics,
+                    )
+            finally:
+                append_genie_logs(log_handle, job_root, manifest.genies)
+
+        for outcome in outcomes:
+            per_genie_status.append(outcome.status)
+            if outcome.summary:
+                per_genie_summary_paths.append(outcome.summary)
+            if outcome.heatmap:
+                per_genie_heatmap_paths.append(outcome.heatmap)
+            if outcome.report:
+                per_genie_report_paths.append(outcome.report)
+            per_genie_extra_paths.extend(outcome.extras)
+        # Shared plotly.js bundle the reports load (--report-plotlyjs shared).
+        report_assets = sorted(final_dir.glob(PLOTLY_BUNDLE_GLOB))
+        combined_report = final_dir / COMBINED_REPORT
+        if combined_report.exists():
+            per_genie_report_paths.append(combined_report)
+
+        per_genie_status.sort(key=lambda st: requested_genies.index(st["genie"]))
 
         if not per_genie_summary_paths:
             raise RuntimeError("All Genies failed; no summary CSVs were produced.")
 
-        # Tarball the entire raw MagicLamp output tree (one folder per Genie).
-        tar_path = job_root / f"{slug}-results.tar.gz"
-        make_tarball(out_dir, tar_path)
+        # Archive the raw MagicLamp output tree (one folder per Genie) plus
+        # the frontend files, leaving out staged inputs and scratch.
+        tarball = archive_name(slug, args.archive_format)
+        excludes = [*ARCHIVE_EXCLUDES, *args.archive_exclude]
+        tar_path: Path | None = None
+        if not args.stream_archive:
+            tar_path = job_root / tarball
+            with metrics.phase("archive") as archived:
+                make_tarball(out_dir, tar_path, args.archive_format, args.threads, excludes)
+                archived["bytes"] = tar_path.stat().st_size
 
         # Upload every per-Genie summary + heatmap + report, plus run.log + tarball.
-        for p in per_genie_summary_paths:
-            upload_file(s3, args.results_bucket, f"{result_prefix}{p.name}", p, "text/csv")
-        for p in per_genie_heatmap_paths:
-            upload_file(s3, args.results_bucket, f"{result_prefix}{p.name}", p, "text/csv")
-        for p in per_genie_report_paths:
-            upload_file(s3, args.results_bucket, f"{result_prefix}{p.name}", p, "text/html")
         # The tarball lives INSIDE the slug prefix alongside the other
         # artifacts. Previously it was uploaded one level above (at the
         # bucket root), which worked only when the bucket policy granted
@@ -971,13 +3662,50 @@ def process_job(args, s3, prefix: str) -> None:
         # download link resolved to a root-level key. Keeping the tarball
         # inside the slug prefix also means lifecycle rules on magiclamp-*
         # clean it up correctly.
-        upload_file(s3, args.results_bucket, f"{result_prefix}{slug}-results.tar.gz", tar_path, "application/gzip")
-        upload_file(s3, args.results_bucket, f"{result_prefix}run.log", log_path, "text/plain")
+        artifacts = [
+            *(Artifact(f"{result_prefix}{p.name}", p, "text/csv") for p in per_genie_summary_paths),
+            *(Artifact(f"{result_prefix}{p.name}", p, "text/csv") for p in per_genie_heatmap_paths),
+            *(Artifact(f"{result_prefix}{p.name}", p, "text/html") for p in per_genie_report_paths),
+            *(Artifact(f"{result_prefix}{p.name}", p, "text/javascript", IMMUTABLE_CACHE_CONTROL) for p in report_assets),
+            *(Artifact(f"{result_prefix}{p.name}", p, SIDECAR_CONTENT_TYPES.get(p.suffix)) for p in per_genie_extra_paths),
+            Artifact(f"{result_prefix}run.log", log_path, "text/plain"),
+        ]
+        if tar_path is not None:
+            artifacts.append(Artifact(f"{result_prefix}{tarball}", tar_path, ARCHIVE_CONTENT_TYPES[args.archive_format]))
+        with metrics.phase("upload") as uploaded:
+            uploaded["files"] = len(artifacts)
+            uploaded["bytes"] = sum(a.path.stat().st_size for a in artifacts)
+            if tar_path is not None:
+                publish_artifacts(s3, args.results_bucket, artifacts, workers=args.upload_workers)
+            else:
+                # Compress and upload the archive while the small files go up;
+                # its phase overlaps this one.
+                def _stream_archive() -> int:
+                    with metrics.phase("archive") as archived:
+                        archived["streamed"] = True
+                        archived["bytes"] = stream_tarball_to_s3(
+                            s3, args.results_bucket, f"{result_prefix}{tarball}",
+                            out_dir, args.archive_format, args.threads, excludes,
+                        )
+                    return archived["bytes"]
+
+                uploaded["streamed_archive"] = True
+                with ThreadPoolExecutor(max_workers=1) as archiver:
+                    streamed = archiver.submit(_stream_archive)
+                    publish_artifacts(s3, args.results_bucket, artifacts, workers=args.upload_workers)
+                    uploaded["files"] += 1
+                    uploaded["bytes"] += streamed.result()
 
         result_url = (
             f"{args.app_url.rstrip('/')}/#magiclamp/results-{slug}" if args.app_url else ""
         )
 
+        job_metrics = metrics.as_dict()
+        publish_metrics(
+            s3, args.results_bucket, result_prefix,
+            {"slug": slug, "state": "complete", "genies": manifest.genies, "threads": args.threads, **job_metrics},
+            args.metrics_log,
+        )
         put_json(
             s3,
             args.results_bucket,
@@ -990,7 +3718,11 @@ def process_job(args, s3, prefix: str) -> None:
                 "completed_at": utc_now(),
                 "result_prefix": result_prefix,
                 "result_url": result_url,
-                "tarball": f"{slug}-results.tar.gz",
+                "tarball": tarball,
+                "combined_report": COMBINED_REPORT if combined_report.exists() else None,
+                "validation": validation,
+                "genome_stats": genome_stats,
+                "metrics": job_metrics,
             },
         )
 
@@ -998,31 +3730,63 @@ def process_job(args, s3, prefix: str) -> None:
             "Completed job %s (%d Genie(s)) -> s3://%s/%s",
             slug, len(manifest.genies), args.results_bucket, result_prefix,
         )
+        return "complete"
 
     except Exception as e:
         logging.exception("Job %s failed", slug)
+        job_metrics = metrics.as_dict()
+        genies = manifest.genies if manifest else []
         put_json(
             s3,
             args.results_bucket,
             status_key,
             {
                 "slug": slug,
-                "genies": manifest.genies if manifest else [],
+                "genies": genies,
                 "state": "failed",
                 "failed_at": utc_now(),
                 "error": str(e),
+                "validation": validation,
+                "genome_stats": genome_stats,
+                "metrics": job_metrics,
             },
         )
+        # After status.json, so a metrics failure can neither hide the job's
+        # failure from the frontend nor replace its error.
+        try:
+            publish_metrics(
+                s3, args.results_bucket, result_prefix,
+                {"slug": slug, "state": "failed", "genies": genies, "threads": args.threads, **job_metrics},
+                args.metrics_log,
+            )
+        except Exception:
+            logging.exception("Could not publish metrics for failed job %s", slug)
         if log_path.exists():
             upload_file(s3, args.results_bucket, f"{result_prefix}run.log", log_path, "text/plain")
         if not args.continue_on_error:
             raise
+        return "failed"
     finally:
+        # Trimming stats the whole cache tree; only worth it if this job added to it.
+        if args.cache_dir and (orf_calls or (result_cache is not None and result_cache.grew)):
+            evict_lru(Path(args.cache_dir), args.cache_max_bytes)
         if args.clean and job_root.exists():
             shutil.rmtree(job_root)
 
 
-# ---------- Lock + main loop ------------------------------------------------
+# ---------- Locks + job scheduler -------------------------------------------
+#
+# The worker used to hold one global lock file and run every pending job
+# serially, so a single 200-genome job held up every small job queued behind
+# it. The scheduler below runs up to --max-jobs jobs at once from a bounded
+# process pool instead:
+#
+#   * Each job takes its own lock file (<lock-dir>/magiclamp-<slug>.lock), so
+#     two worker processes on the same host never pick up the same job.
+#   * The number of live lock files is the host-wide running-job count, so
+#     overlapping cron invocations still respect --max-jobs between them.
+#   * --threads is the per-host CPU budget. Every job gets an equal share
+#     (threads // max_jobs, at least 1), which is what MagicLamp.py sees as -t.
 def acquire_lock(lock_path: Path):
     lock_path.parent.mkdir(parents=True, exist_ok=True)
     try:
@@ -1040,7 +3804,175 @@ def release_lock(lock_path: Path):
         pass
 
 
-def parse_args() -> argparse.Namespace:
+def lock_is_stale(lock_path: Path) -> bool:
+    """True if the process that wrote `lock_path` is no longer running."""
+    try:
+        pid = int(lock_path.read_text().strip() or "0")
+    except (OSError, ValueError):
+        return True
+    if pid <= 0:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def job_lock_path(lock_dir: Path, slug: str) -> Path:
+    return lock_dir / f"magiclamp-{slug}.lock"
+
+
+def live_job_locks(lock_dir: Path) -> list[Path]:
+    """Per-job locks held by running workers on this host; stale ones are removed."""
+    live: list[Path] = []
+    for path in sorted(lock_dir.glob("magiclamp-*.lock")):
+        if lock_is_stale(path):
+            logging.info("Removing stale job lock %s", path)
+            release_lock(path)
+        else:
+            live.append(path)
+    return live
+
+
+def acquire_job_lock(lock_dir: Path, slug: str) -> Path | None:
+    """Take the lock for one job. Returns None if another worker holds it."""
+    lock_path = job_lock_path(lock_dir, slug)
+    try:
+        acquire_lock(lock_path)
+    except RuntimeError:
+        if not lock_is_stale(lock_path):
+            return None
+        release_lock(lock_path)
+        try:
+            acquire_lock(lock_path)
+        except RuntimeError:
+            return None
+    return lock_path
+
+
+def job_share(args) -> int:
+    """Threads handed to each concurrently running job out of the --threads budget."""
+    return max(1, args.threads // max(1, args.max_jobs))
+
+
+def with_threads(args, threads: int):
+    """Shallow copy of `args` with a different MagicLamp thread count."""
+    scoped = copy.copy(args)
+    scoped.threads = threads
+    return scoped
+
+
+def _run_job(args, prefix: str) -> str:
+    """Process-pool entry point. boto3 clients don't survive a fork, so each job builds its own."""
+    return process_job(args, make_s3(args.region, s3_pool_size(args)), prefix)
+
+
+def _run_shard_task(args, task: str) -> str:
+    """Process-pool entry point for a shard claimed from --shard-queue."""
+    return run_shard_task(args, make_s3(args.region, s3_pool_size(args)), task)
+
+
+def submit_jobs(
+    args,
+    pool: ProcessPoolExecutor,
+    running: dict[str, tuple[Future, Path]],
+    queue: list[str],
+    lock_dir: Path,
+) -> list[str]:
+    """Start queued jobs while host-wide slots are free. Returns the prefixes still queued."""
+    queue = list(queue)
+    while queue:
+        if len(live_job_locks(lock_dir)) >= args.max_jobs:
+            break
+        prefix = queue.pop(0)
+        slug_match = PREFIX_RE.match(prefix)
+        if not slug_match or prefix in running:
+            continue
+        lock_path = acquire_job_lock(lock_dir, slug_match.group("slug"))
+        if lock_path is None:
+            logging.info("Skipping %s; another worker holds its lock.", prefix)
+            continue
+        logging.info("Scheduling %s (%d thread(s)).", prefix, args.threads)
+        running[prefix] = (pool.submit(_run_job, args, prefix), lock_path)
+    return queue
+
+
+def submit_shard_tasks(
+    args,
+    pool: ProcessPoolExecutor,
+    serving: dict[str, tuple[Future, Path]],
+    shard_queue: ShardQueue,
+    lock_dir: Path,
+) -> None:
+    """Claim other workers' open shard tasks while host-wide slots are free.
+
+    Shards share the --max-jobs slots (and lock directory) with whole jobs,
+    so a helper never runs more MagicLamp processes than it would otherwise.
+    """
+    for task in shard_queue.open_tasks():
+        if len(live_job_locks(lock_dir)) >= args.max_jobs:
+            break
+        if task in serving:
+            continue
+        lock_path = acquire_job_lock(lock_dir, "shard-" + hashlib.sha256(task.encode()).hexdigest()[:16])
+        if lock_path is None:
+            continue
+        if not shard_queue.claim(task):
+            release_lock(lock_path)
+            continue
+        logging.info("Serving shard %s (%d thread(s)).", task, args.threads)
+        serving[task] = (pool.submit(_run_shard_task, args, task), lock_path)
+
+
+def reap_shard_tasks(
+    serving: dict[str, tuple[Future, Path]],
+    done: set[Future],
+    shard_queue: ShardQueue | None = None,
+) -> None:
+    """Release the locks of finished shard tasks; their owners see done.json.
+
+    A task that died before publishing one (e.g. its process crashed) is
+    marked failed on `shard_queue`, so its owner stops waiting for it.
+    """
+    for task, (future, lock_path) in list(serving.items()):
+        if future not in done:
+            continue
+        del serving[task]
+        release_lock(lock_path)
+        error = future.exception()
+        if error is not None:
+            logging.error("Shard %s raised: %s", task, error)
+            if shard_queue is not None:
+                try:
+                    if shard_queue.state(task) is None:
+                        shard_queue.complete(task, None, error=repr(error))
+                except Exception:
+                    logging.exception("Could not mark shard %s failed", task)
+        else:
+            logging.info("Shard %s %s.", task, future.result())
+
+
+def reap_jobs(args, running: dict[str, tuple[Future, Path]], done: set[Future], intake) -> None:
+    """Release the locks of finished jobs, report them to the intake and surface errors."""
+    for prefix, (future, lock_path) in list(running.items()):
+        if future not in done:
+            continue
+        del running[prefix]
+        release_lock(lock_path)
+        error = future.exception()
+        if error is not None:
+            # process_job only lets exceptions escape without --continue-on-error.
+            logging.error("Job %s raised: %s", prefix, error)
+            if not args.continue_on_error:
+                raise error
+            continue
+        intake.mark(prefix, future.result())
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Poll S3 for MagicLamp jobs, run MagicLamp, and publish frontend-ready results.")
     parser.add_argument("--input-bucket",     default=os.getenv("MAGICLAMP_INPUT_BUCKET",   "midauthorbio-magiclamp-input"))
     parser.add_argument("--results-bucket",   default=os.getenv("MAGICLAMP_RESULTS_BUCKET", "midauthorbio-magiclamp-results"))
@@ -1049,42 +3981,103 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--magiclamp-bin",    default=os.getenv("MAGICLAMP_BIN",            "MagicLamp.py"))
     parser.add_argument("--command-prefix",   default=os.getenv("MAGICLAMP_COMMAND_PREFIX", ""), help='Optional prefix, e.g. "conda run -n magiclamp"')
     parser.add_argument("--report-script",    default=os.getenv("MAGICLAMP_REPORT_SCRIPT",  ""), help="Optional Plotly report script path (falls back to magiclamp_report.py / fegenie_report.py beside this file).")
+    parser.add_argument("--report-plotlyjs", choices=REPORT_PLOTLYJS, default=os.getenv("MAGICLAMP_REPORT_PLOTLYJS", "shared"), help="shared: reports load one plotly-<version>.min.js published next to them; inline: every report embeds plotly.js (self-contained).")
+    parser.add_argument("--combined-report", choices=["auto", "off"], default=os.getenv("MAGICLAMP_COMBINED_REPORT", "auto"), help=f"auto: also publish {COMBINED_REPORT}, one tabbed report comparing every Genie with a heatmap (jobs with 2+ such Genies).")
+    parser.add_argument("--report-mode", choices=REPORT_MODES, default=os.getenv("MAGICLAMP_REPORT_MODE", "pool"), help="pool: render reports in warm worker processes that import the report script once; subprocess: one `python <report-script>` per Genie (for report dependencies in another env).")
     parser.add_argument("--app-url",          default=os.getenv("MAGICLAMP_APP_URL",        ""), help="Amplify app base URL embedded in status.json result_url.")
-    parser.add_argument("--threads",          type=int, default=int(os.getenv("MAGICLAMP_THREADS", "4")))
+    parser.add_argument("--threads",          type=int, default=int(os.getenv("MAGICLAMP_THREADS", "4")), help="Per-host CPU budget, split evenly across concurrently running jobs.")
+    parser.add_argument("--download-workers", type=int, default=int(os.getenv("MAGICLAMP_DOWNLOAD_WORKERS", "8")), help="Objects downloaded concurrently per job.")
+    parser.add_argument("--upload-workers",   type=int, default=int(os.getenv("MAGICLAMP_UPLOAD_WORKERS", "8")), help="Result files uploaded concurrently per job.")
+    parser.add_argument("--archive-format", choices=["gz", "zst"], default=os.getenv("MAGICLAMP_ARCHIVE_FORMAT", "gz"), help="Results tarball compression: gz (pigz when available) or zst. Both use --threads.")
+    parser.add_argument("--archive-exclude", action="append", default=[], help="Extra glob to leave out of the results tarball (repeatable).")
+    parser.add_argument("--stream-archive", action="store_true", help="Stream the results tarball straight into a multipart upload instead of writing it to disk first.")
+    parser.add_argument("--parallel-genies",  type=int, default=int(os.getenv("MAGICLAMP_PARALLEL_GENIES", "1")), help="Run up to N Genies of one job at once, sharing the job's thread budget.")
+    parser.add_argument("--max-jobs",         type=int, default=int(os.getenv("MAGICLAMP_MAX_JOBS", "1")), help="Maximum number of jobs running at once on this host.")
+    parser.add_argument("--cache-dir",        default=os.getenv("MAGICLAMP_CACHE_DIR",      ""), help="Directory for content-addressed caches shared across jobs (disabled if empty).")
+    parser.add_argument("--cache-max-bytes",  type=int, default=int(os.getenv("MAGICLAMP_CACHE_MAX_BYTES", "0")), help="Trim --cache-dir to this size after each job that added to it, least-recently-used first (0 = unbounded).")
+    parser.add_argument("--orf-cache", action="store_true", help="Call genes once per genome with Prodigal, cache the proteins in --cache-dir, and run every Genie on them.")
+    parser.add_argument("--result-cache", action="store_true", help="Cache each genome's per-Genie results in --cache-dir and only run MagicLamp on genomes not seen before.")
+    parser.add_argument("--hmm-set-version",  default=os.getenv("MAGICLAMP_HMM_SET_VERSION", ""), help="HMM set version for result-cache keys (defaults to a fingerprint of --magiclamp-bin).")
+    parser.add_argument("--prodigal-bin",     default=os.getenv("MAGICLAMP_PRODIGAL_BIN",   "prodigal"))
+    parser.add_argument("--summary-sidecar", choices=["", "gz", "parquet"], default=os.getenv("MAGICLAMP_SUMMARY_SIDECAR", ""), help="Also publish a compressed copy of each summary CSV (parquet needs pyarrow).")
+    parser.add_argument("--columnar-export", action="store_true", help="Also publish Parquet copies of each summary and heatmap plus a <genie>-results.index.json for range reads (needs pyarrow).")
+    parser.add_argument("--heatmap-aggregations", default=os.getenv("MAGICLAMP_HEATMAP_AGGREGATIONS", ""), help="Comma list of extra per-Genie matrices to publish beside the heatmap: distinct-hmms, best-bitscore, per-mbp (needs pandas).")
+    parser.add_argument("--shard-size",       type=int, default=int(os.getenv("MAGICLAMP_SHARD_SIZE", "0")), help="Run a Genie in shards of at most N genomes and merge the results (0 = never shard).")
+    parser.add_argument("--shard-workers",    type=int, default=int(os.getenv("MAGICLAMP_SHARD_WORKERS", "1")), help="Shards of one Genie run on this host at once, sharing its thread budget.")
+    parser.add_argument("--shard-queue",      default=os.getenv("MAGICLAMP_SHARD_QUEUE",    ""), help="s3://bucket/prefix/ where shards are published for other workers to claim (local shards if empty).")
+    parser.add_argument("--shard-timeout",    type=int, default=int(os.getenv("MAGICLAMP_SHARD_TIMEOUT", "21600")), help="Seconds to wait for shards claimed by other hosts before running them here.")
+    parser.add_argument("--serve-shards", action="store_true", help="Also claim and run shard tasks from --shard-queue published by other workers.")
+    parser.add_argument("--intake", choices=["poll", "incremental", "queue"], default=os.getenv("MAGICLAMP_INTAKE", "poll"), help="How new jobs are found (see 'Job intake' in the source).")
+    parser.add_argument("--intake-index",     default=os.getenv("MAGICLAMP_INTAKE_INDEX",   ""), help="SQLite index of seen job prefixes (default: <work-root>/intake-index.sqlite).")
+    parser.add_argument("--intake-queue",     default=os.getenv("MAGICLAMP_INTAKE_QUEUE",   ""), help="SQS queue URL with S3 notifications, or sqlite:///path/queue.db, for --intake queue.")
     parser.add_argument("--once", action="store_true", help="Run one scan and exit.")
     parser.add_argument("--interval", type=int, default=300, help="Polling interval seconds when not using --once.")
     parser.add_argument("--force", action="store_true", help="Reprocess jobs even if a status.json already exists.")
     parser.add_argument("--clean", action="store_true", help="Delete local work directory after each job.")
     parser.add_argument("--continue-on-error", action="store_true", help="Continue polling other jobs after a failure.")
+    parser.add_argument("--metrics-log",      default=os.getenv("MAGICLAMP_METRICS_LOG",    ""), help=f"Also append each job's {METRICS_FILE} record as one JSON line to this file.")
     parser.add_argument("--verbose", action="store_true")
-    parser.add_argument("--lock-file", default=os.getenv("MAGICLAMP_LOCK_FILE", "/tmp/magiclamp-worker.lock"))
+    parser.add_argument("--lock-dir",  default=os.getenv("MAGICLAMP_LOCK_DIR", "/tmp/magiclamp-worker-locks"), help="Directory holding one lock file per running job.")
     parser.add_argument("--log-file",  default=os.getenv("MAGICLAMP_WORKER_LOG", "/tmp/magiclamp-worker.log"))
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def main() -> int:
     args = parse_args()
+    args.max_jobs = max(1, args.max_jobs)
     configure_logging(Path(args.log_file), verbose=args.verbose)
-    lock_path = Path(args.lock_file)
-
+    lock_dir = Path(args.lock_dir)
+    lock_dir.mkdir(parents=True, exist_ok=True)
+
+    s3 = make_s3(args.region, s3_pool_size(args))
+    intake = make_intake(args, s3)
+    job_args = with_threads(args, job_share(args))
+    shard_queue = ShardQueue(s3, args.shard_queue) if args.serve_shards and args.shard_queue else None
+    running: dict[str, tuple[Future, Path]] = {}
+    serving: dict[str, tuple[Future, Path]] = {}
+    queue: list[str] = []
+    polled = False
+    next_poll = 0.0
     try:
-        acquire_lock(lock_path)
-    except RuntimeError as e:
-        logging.warning("%s", e)
-        return 0
-
-    s3 = make_s3(args.region)
-    try:
-        while True:
-            prefixes = list_job_prefixes(s3, args.input_bucket)
-            logging.info("Found %d MagicLamp job prefix(es).", len(prefixes))
-            for prefix in prefixes:
-                process_job(args, s3, prefix)
-            if args.once:
-                break
-            time.sleep(args.interval)
+        with ProcessPoolExecutor(
+            max_workers=args.max_jobs,
+            initializer=configure_logging,
+            initargs=(Path(args.log_file), args.verbose),
+        ) as pool:
+            while True:
+                polling = not (args.once and polled) and time.monotonic() >= next_poll
+                if polling:
+                    prefixes = intake.pending()
+                    logging.info("Found %d MagicLamp job prefix(es).", len(prefixes))
+                    queue = [p for p in prefixes if p not in running]
+                    polled = True
+                    next_poll = time.monotonic() + args.interval
+
+                queue = submit_jobs(job_args, pool, running, queue, lock_dir)
+                if polling and shard_queue is not None:
+                    # Our own jobs first; spare slots help other hosts' shards.
+                    submit_shard_tasks(job_args, pool, serving, shard_queue, lock_dir)
+
+                if running or serving:
+                    # Wake up as soon as a job finishes so its slot is reused
+                    # right away, or at the next poll, whichever comes first.
+                    timeout = None if args.once else max(0.0, next_poll - time.monotonic())
+                    done, _ = wait(
+                        [future for future, _ in [*running.values(), *serving.values()]],
+                        timeout=timeout,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    reap_shard_tasks(serving, done, shard_queue)
+                    reap_jobs(args, running, done, intake)
+                elif args.once:
+                    # Anything left in the queue is waiting on slots held by
+                    # another worker process; the next cron run picks it up.
+                    break
+                else:
+                    time.sleep(max(0.0, next_poll - time.monotonic()))
     finally:
-        release_lock(lock_path)
+        for _, lock_path in [*running.values(), *serving.values()]:
+            release_lock(lock_path)
     return 0
 
 
@@ -3,10 +3,12 @@
 #
 # Mirrors run_fegenie_worker.sh — run this every few minutes from cron and
 # it will:
-#   1. Skip if another worker is already running (via /tmp/magiclamp-worker.lock).
-#   2. Clean up stale locks left by killed processes.
-#   3. Invoke magiclamp_worker.py in --once mode so cron, not the script, owns
-#      the scheduling.
+#   1. Invoke magiclamp_worker.py in --once mode so cron, not the script, owns
+#      the polling schedule.
+#   2. Let the worker run up to --max-jobs jobs at once. Each job takes its own
+#      lock under /tmp/magiclamp-worker-locks, so overlapping cron runs never
+#      pick up the same job and never exceed --max-jobs between them. Stale
+#      locks left by killed workers are cleaned up by the worker itself.
 #
 # Edit the *paths* and the *conda env* on the lines marked TODO to match
 # your host. Default values mirror the FeGenie worker layout under
@@ -22,14 +24,6 @@ LOG="/home/ark/MAB/bin/cronlogs/magiclamp_worker_cron.log"
 
 echo "===== $(date) starting MagicLamp worker =====" >> "$LOG"
 
-# Remove stale lock if no matching worker is running.
-if [ -f /tmp/magiclamp-worker.lock ]; then
-    if ! pgrep -f "magiclamp_worker.py" >/dev/null 2>&1; then
-        echo "$(date) removing stale lock file" >> "$LOG"
-        rm -f /tmp/magiclamp-worker.lock
-    fi
-fi
-
 /home/ark/miniconda3/envs/magiclamp/bin/python \
   /home/ark/MAB/bin/magiclamp-local/react-app-backend/magiclamp_worker.py \
   --input-bucket midauthorbio-magiclamp-input \
@@ -40,6 +34,7 @@ fi
   --command-prefix "/home/ark/miniconda3/bin/conda run -n magiclamp" \
   --app-url "https://main.d2sjsjikg6d3zc.amplifyapp.com" \
   --threads 4 \
+  --max-jobs 1 \
   --once \
   --continue-on-error \
   >> "$LOG" 2>&1
@@ -13,6 +13,31 @@ These cover:
       * FeGenie / GenBank -> MagicLamp.py FeGenie  ... --gbk
       * MagnetoGenie      -> MagicLamp.py OmniGenie ... -genie MagnetoGenie
   - GenBank annotation detection
+  - Per-job locks + CPU budget split used by the concurrent job scheduler
+  - Parallel Genie runs against a stub MagicLamp.py (order, logs, threads)
+  - Content-addressed ORF cache (hit across jobs, --orfs argv, LRU eviction)
+  - Per-genome result cache: only unseen genomes run, cached rows merge back
+  - Queue-based job intake through the SQLite stand-in for SQS
+  - Parallel download_prefix: verification, retry, per-file callback
+  - Concurrent result publishing (all uploads awaited, errors surfaced)
+  - Results archive: exclude rules, gz/zst, streaming upload with no local file
+  - Zero-copy staging of genomes into bins/ (hard links, copy fallback)
+  - Whole-file GenBank validation (multi-record, late corruption, gzip)
+  - FASTA intake scan: stats (N50, GC) and empty/FASTQ/protein rejection
+  - Compressed uploads: .gz/.bgz genomes and .zip/.tar.gz bundles unpacked
+  - Genome sharding: local shards merged; S3 shard queue shared with a helper
+  - Streaming merge of summary (header union) and heatmap (outer join) CSVs
+  - Streaming normalize_csv: junk rows dropped, gz/parquet side-cars, flat memory
+  - Columnar export: Parquet summary/heatmap + row-group/column byte-range index
+  - Vectorized heatmap synthesis and the extra aggregation matrices
+  - Warm report pool: script imported once, subprocess fallback and mode
+  - Shared plotly.js bundle: one versioned copy referenced by every report
+  - Combined multi-Genie report: shared genome axis and clustering, tabs
+  - Large-matrix report: one-trace dendrograms, sampled clustering, size caps
+  - Sparse report path: non-zero cells only, same page as the dense path
+  - Report benchmark: per-stage timings to JSON, regression guard
+  - Worker benchmark: process_job against LocalS3 + a stub MagicLamp, per-phase times
+  - Job metrics: per-child wait4 rusage, phases in status.json / metrics.json
 """
 from __future__ import annotations
 
@@ -25,11 +50,38 @@ sys.path.insert(0, str(ROOT))
 
 from magiclamp_worker import (
     NAMED_GENIES,
+    acquire_job_lock,
+    Artifact,
     build_magiclamp_command,
+    download_prefix,
+    evict_lru,
+    orf_cache_path,
     heatmap_filename,
     is_annotated_genbank,
+    job_share,
+    live_job_locks,
     magiclamp_subcommand,
+    link_or_copy,
     parse_manifest,
+    prepare_bins,
+    JobIndex,
+    QueueIntake,
+    ResultCache,
+    SqliteMessageQueue,
+    file_digest,
+    publish_artifacts,
+    make_tarball,
+    normalize_csv,
+    release_lock,
+    run_genies,
+    ShardQueue,
+    run_shard_task,
+    scan_fasta,
+    split_inputs,
+    unpack_input,
+    scan_genbank,
+    stage_orfs,
+    stream_tarball_to_s3,
     summary_filename,
 )
 
@@ -189,6 +241,1348 @@ def test_build_command_shape(tmp: Path) -> None:
     print("PASS build_command Lucifer (named, direct subcommand)")
 
 
+def test_job_locks_and_share(tmp: Path) -> None:
+    locks = tmp / "locks"
+    first = acquire_job_lock(locks, "aB12cdEF34")
+    assert first is not None and first.exists()
+    # A second worker cannot take the same job while the first is alive.
+    assert acquire_job_lock(locks, "aB12cdEF34") is None
+    assert live_job_locks(locks) == [first]
+    release_lock(first)
+
+    # A lock left behind by a dead process is reclaimed, not honoured.
+    stale = locks / "magiclamp-deadbeef.lock"
+    stale.write_text("999999999")
+    assert live_job_locks(locks) == []
+    assert not stale.exists()
+
+    # --threads is a host budget split across --max-jobs, never below 1.
+    assert job_share(SimpleNamespace(threads=32, max_jobs=4)) == 8
+    assert job_share(SimpleNamespace(threads=2, max_jobs=4)) == 1
+    print("PASS per-job locks (stale reclaimed) + per-job thread share")
+
+
+FAKE_MAGICLAMP = '''\
+import sys, time
+from pathlib import Path
+argv = sys.argv[1:]
+genie = argv[argv.index("-genie") + 1] if "-genie" in argv else argv[0]
+out = Path(argv[argv.index("-out") + 1])
+print(f"fake {genie} -t {argv[argv.index('-t') + 1]}")
+time.sleep(0.5)
+if genie != "LithoGenie":
+    (out / f"{genie}-summary.csv").write_text("organism,HMM\\ng1,x\\n")
+'''
+
+
+def test_run_genies_parallel(tmp: Path) -> None:
+    fake = write(tmp / "FakeMagicLamp.py", FAKE_MAGICLAMP)
+    bins = tmp / "pg-bins"; bins.mkdir()
+    job_root = tmp / "pg-job"
+    final = job_root / "frontend_results"; final.mkdir(parents=True)
+    args = SimpleNamespace(
+        magiclamp_bin=str(fake),
+        command_prefix=sys.executable,
+        threads=8,
+        parallel_genies=4,
+        report_script="", report_mode="subprocess", report_plotlyjs="shared", combined_report="auto",
+        shard_size=0, summary_sidecar="", columnar_export=False, heatmap_aggregations="",
+    )
+    genies = ["FeGenie", "LithoGenie", "MagnetoGenie"]
+
+    import time
+    started = time.monotonic()
+    outcomes = run_genies(args, job_root, "slug", genies, bins, "fa", None, final)
+    elapsed = time.monotonic() - started
+    assert elapsed < 1.4, f"Genies ran serially ({elapsed:.2f}s)"
+
+    # Manifest order is preserved; failures stay per-Genie.
+    assert [o.genie for o in outcomes] == genies
+    assert [o.status["state"] for o in outcomes] == ["complete", "failed", "complete"]
+    # The job's 8 threads are split across the 3 Genies running at once.
+    fe_log = (job_root / "logs" / "FeGenie.log").read_text()
+    assert "fake FeGenie -t 2" in fe_log, fe_log
+    assert "MagnetoGenie" not in fe_log
+
+    # Queued reports are labelled by Genie name, and a failed combined report
+    # is logged without failing the Genies.
+    import bench_worker
+    import magiclamp_worker
+    write(bins / "g1.fa", ">c\nACGT\n")
+    args.magiclamp_bin = str(bench_worker.write_stub_magiclamp(tmp / "StubMagicLamp.py", delay=0))
+    rendered = []
+
+    def fake_report(**kw):
+        rendered.append((kw["genie"], kw["report_dest"].name))
+
+    def broken_combined(*a, **kw):
+        raise ValueError("no common genomes")
+    saved = magiclamp_worker.generate_genie_report, magiclamp_worker.generate_combined_report
+    magiclamp_worker.generate_genie_report, magiclamp_worker.generate_combined_report = fake_report, broken_combined
+    try:
+        outcomes = run_genies(args, job_root, "slug", ["FeGenie", "LithoGenie"], bins, "fa", None, final)
+    finally:
+        magiclamp_worker.generate_genie_report, magiclamp_worker.generate_combined_report = saved
+    assert [o.status["state"] for o in outcomes] == ["complete", "complete"]
+    assert sorted(rendered) == [("FeGenie", "FeGenie-report.html"), ("LithoGenie", "LithoGenie-report.html")]
+    combined_log = (job_root / "logs" / magiclamp_worker.COMBINED_REPORT_LOG).read_text()
+    assert "no common genomes" in combined_log, combined_log
+    print(f"PASS run_genies parallel ({elapsed:.2f}s, per-Genie logs, manifest order, report labels)")
+
+
+FAKE_PRODIGAL = '''\
+import sys
+from pathlib import Path
+argv = sys.argv[1:]
+Path(argv[argv.index("-a") + 1]).write_text(">orf_1\\nMKV\\n")
+with open(Path(__file__).with_suffix(".calls"), "a") as fh:
+    fh.write(argv[argv.index("-i") + 1] + "\\n")
+'''
+
+
+def test_orf_cache(tmp: Path) -> None:
+    fake = write(tmp / "fake_prodigal.py", FAKE_PRODIGAL)
+    calls = fake.with_suffix(".calls")
+    cache = tmp / "cache"
+    args = SimpleNamespace(
+        cache_dir=str(cache), command_prefix=sys.executable,
+        prodigal_bin=str(fake), threads=2,
+    )
+    job1 = tmp / "orf-job1"; job1.mkdir()
+    g1 = write(job1 / "g1.fa", ">c1\nACGT\n")
+    g2 = write(job1 / "g2.fa", ">c1\nGGCC\n")
+    log = (tmp / "orf.log").open("w")
+    called: list[Path] = []
+    staged = stage_orfs(args, [g1, g2], job1 / "orfs", log, called)
+    assert [p.name for p in staged] == ["g1.faa", "g2.faa"] and sorted(called) == [g1, g2]
+    assert len(calls.read_text().splitlines()) == 2
+
+    # Same genome content under a new name in a later job: no new Prodigal run.
+    job2 = tmp / "orf-job2"; job2.mkdir()
+    again = write(job2 / "renamed.fa", ">c1\nACGT\n")
+    called = []
+    staged = stage_orfs(args, [again], job2 / "orfs", log, called)
+    log.close()
+    assert called == []  # nothing new, so process_job skips evict_lru
+    assert staged[0].read_text() == ">orf_1\nMKV\n"
+    assert len(calls.read_text().splitlines()) == 2
+
+    # Protein bins switch MagicLamp to --orfs.
+    cmd = build_magiclamp_command(
+        SimpleNamespace(magiclamp_bin="MagicLamp.py", command_prefix="", threads=1),
+        "FeGenie", job2 / "orfs", tmp / "out", "faa", None,
+    )
+    assert cmd[cmd.index("-bin_ext") + 1] == "faa" and "--orfs" in cmd
+
+    # LRU eviction drops the oldest entry first.
+    import os
+    old, new = orf_cache_path(cache, file_digest(g2)), orf_cache_path(cache, file_digest(g1))
+    os.utime(old, (1, 1))
+    evict_lru(cache, old.stat().st_size)
+    assert new.exists() and not old.exists()
+
+    # Concurrent Prodigal runs log in genome order, one block each, and an
+    # entry evicted by another job between lookup and link is called again.
+    import magiclamp_worker
+    chatty = write(tmp / "chatty_prodigal.py", FAKE_PRODIGAL + (
+        "import time\n"
+        "name = Path(argv[argv.index('-i') + 1]).name\n"
+        "print('begin', name, flush=True); time.sleep(0.2); print('end', name, flush=True)\n"
+    ))
+    args.prodigal_bin, args.cache_dir = str(chatty), str(tmp / "cache2")
+    job3 = tmp / "orf-job3"; job3.mkdir()
+    genomes = [write(job3 / f"{n}.fa", f">c1\n{seq}\n") for n, seq in (("a", "AAAA"), ("b", "CCCC"))]
+    original, evicted = magiclamp_worker.link_or_copy, []
+
+    def evicting_link(src, dest):
+        if not evicted:
+            evicted.append(src)
+            src.unlink()
+        return original(src, dest)
+
+    magiclamp_worker.link_or_copy = evicting_link
+    try:
+        with (tmp / "orf3.log").open("w") as log:
+            staged = stage_orfs(args, genomes, job3 / "orfs", log)
+    finally:
+        magiclamp_worker.link_or_copy = original
+    assert evicted and all(p.read_text() == ">orf_1\nMKV\n" for p in staged)
+    lines = (tmp / "orf3.log").read_text().splitlines()
+    assert lines[:2] == ["begin a.fa", "end a.fa"] and lines[-2:] == ["begin b.fa", "end b.fa"], lines
+    assert not list((job3 / "orfs").glob(".*.log"))
+    print("PASS ORF cache (cross-job hit, --orfs argv, LRU eviction, eviction race, per-genome logs)")
+
+
+FAKE_MAGICLAMP_HITS = '''\
+import sys
+from pathlib import Path
+argv = sys.argv[1:]
+genie = argv[0]
+bins = Path(argv[argv.index("-bin_dir") + 1])
+out = Path(argv[argv.index("-out") + 1])
+names = sorted(p.name for p in bins.iterdir())
+with open(Path(__file__).with_suffix(".calls"), "a") as fh:
+    fh.write(",".join(names) + "\\n")
+rows = ["category,genome/assembly,HMM"]
+for name in names:
+    rows.append(f"iron_reduction,{name},{Path(name).stem}_hmm")
+(out / f"{genie}-summary.csv").write_text("\\n".join(rows) + "\\n")
+'''
+
+
+def test_result_cache(tmp: Path) -> None:
+    import csv
+    from magiclamp_worker import run_genie
+    fake = write(tmp / "FakeHits.py", FAKE_MAGICLAMP_HITS)
+    calls = fake.with_suffix(".calls")
+    args = SimpleNamespace(
+        magiclamp_bin=str(fake), command_prefix=sys.executable,
+        threads=1, report_script="", report_mode="pool", report_plotlyjs="shared", combined_report="auto", shard_size=0, summary_sidecar="", columnar_export=False, heatmap_aggregations="",
+    )
+
+    caches = []
+
+    def job(name: str, genomes: dict[str, str]):
+        root = tmp / name
+        bins = root / "bins"; bins.mkdir(parents=True)
+        final = root / "frontend_results"; final.mkdir()
+        for fname, seq in genomes.items():
+            write(bins / fname, f">c\n{seq}\n")
+        cache = ResultCache(
+            root=tmp / "rcache", version="v1-fa",
+            digests={p.stem: file_digest(p) for p in bins.iterdir()},
+        )
+        caches.append(cache)
+        return run_genie(args, root, name, "FeGenie", bins, "fa", None, final,
+                         root / "logs" / "FeGenie.log", cache)
+
+    first = job("rc-job1", {"a.fa": "ACGT", "b.fa": "GGGG"})
+    assert first.status["state"] == "complete" and first.status["cached_genomes"] == 0
+    assert caches[-1].grew
+
+    # b.fa comes back renamed as z.fa next to a new genome: only c.fa runs.
+    second = job("rc-job2", {"c.fa": "TTTT", "z.fa": "GGGG"})
+    assert calls.read_text().splitlines() == ["a.fa,b.fa", "c.fa"]
+    assert second.status["cached_genomes"] == 1
+    with second.summary.open() as fh:
+        genomes = sorted(r["genome/assembly"] for r in csv.DictReader(fh))
+    assert genomes == ["c.fa", "z.fa"], genomes
+    with second.heatmap.open() as fh:
+        assert next(csv.reader(fh)) == ["X", "c.fa", "z.fa"]
+
+    # All hits: the cache did not grow.
+    assert job("rc-job3", {"a.fa": "ACGT"}).status["cached_genomes"] == 1 and not caches[-1].grew
+
+    # A cache write error fails this Genie, not the whole job.
+    store = ResultCache.store
+
+    def full_disk(self, *a, **kw):
+        raise OSError(28, "No space left on device")
+    ResultCache.store = full_disk
+    try:
+        failed = job("rc-job4", {"d.fa": "CCCC"})
+    finally:
+        ResultCache.store = store
+    assert failed.status["state"] == "failed" and "No space left" in failed.status["error"], failed.status
+    print("PASS result cache (unseen genomes only, renamed hit merged back, store errors fail the Genie)")
+
+
+def test_queue_intake(tmp: Path) -> None:
+    import json
+    import sqlite3
+    queue = SqliteMessageQueue(tmp / "queue.db")
+    intake = QueueIntake(queue, JobIndex(tmp / "intake-index.sqlite"))
+
+    def event(key: str) -> str:
+        return json.dumps({"Records": [{"s3": {"object": {"key": key}}}]})
+
+    queue.send(event("magiclamp-aB12cdEF34/form-data.txt"))
+    queue.send(event("magiclamp-aB12cdEF34/genome.fa"))           # not the manifest
+    queue.send(json.dumps({"Message": event("magiclamp-Zz9/form-data.txt")}))  # SNS envelope
+    queue.send(json.dumps({"Event": "s3:TestEvent"}))
+    assert intake.pending() == ["magiclamp-Zz9/", "magiclamp-aB12cdEF34/"]
+
+    # Waiting jobs stay queued; finished ones drop out for good.
+    intake.mark("magiclamp-Zz9/", "waiting")
+    intake.mark("magiclamp-aB12cdEF34/", "complete")
+    assert intake.pending() == ["magiclamp-Zz9/"]
+
+    # A failure while recording the batch leaves every message on the queue.
+    queue.send(event("magiclamp-Crash1/form-data.txt"))
+    queue.send(event("magiclamp-Crash2/form-data.txt"))
+    broken = QueueIntake(queue, JobIndex(tmp / "broken-index.sqlite"))
+    recorded = []
+
+    def set_state(prefix: str, state: str) -> None:
+        if recorded:
+            raise sqlite3.OperationalError("disk I/O error")
+        recorded.append(prefix)
+    broken.index.set_state = set_state
+    try:
+        broken.pending()
+        raise AssertionError("index failure was swallowed")
+    except sqlite3.OperationalError:
+        pass
+    assert len(queue.receive()) == 2
+    assert intake.pending() == ["magiclamp-Crash1/", "magiclamp-Crash2/", "magiclamp-Zz9/"]
+    assert queue.receive() == []
+    print("PASS queue intake (S3/SNS events, waiting retried, finished remembered, delete after index)")
+
+
+class FakeS3:
+    """Just enough of the boto3 S3 client for download_prefix / publish_artifacts."""
+
+    def __init__(self, objects: dict[str, bytes], corrupt_once: set[str] = frozenset()):
+        self.objects = objects
+        self.corrupt_once = set(corrupt_once)
+        self.downloads: list[str] = []
+        self.fail_uploads: set[str] = set()
+
+    def get_paginator(self, name: str):
+        import hashlib
+        objects = self.objects
+
+        class _Paginator:
+            def paginate(self, Bucket: str, Prefix: str):
+                yield {"Contents": [
+                    {"Key": k, "Size": len(v), "ETag": f'"{hashlib.md5(v).hexdigest()}"'}
+                    for k, v in sorted(objects.items()) if k.startswith(Prefix)
+                ]}
+        return _Paginator()
+
+    def download_file(self, bucket: str, key: str, filename: str, Config=None) -> None:
+        self.downloads.append(key)
+        data = self.objects[key]
+        if key in self.corrupt_once:
+            self.corrupt_once.discard(key)
+            data = data[::-1]
+        Path(filename).write_bytes(data)
+
+    def upload_file(self, filename: str, bucket: str, key: str, ExtraArgs=None, Config=None) -> None:
+        import time
+        time.sleep(0.2)
+        if key in self.fail_uploads:
+            raise RuntimeError(f"upload of {key} failed")
+        self.objects[key] = Path(filename).read_bytes()
+
+    def upload_fileobj(self, fileobj, bucket: str, key: str, ExtraArgs=None, Config=None) -> None:
+        chunks = []
+        while True:
+            chunk = fileobj.read(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.objects[key] = b"".join(chunks)
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, ContentType=None, IfNoneMatch=None) -> None:
+        from botocore.exceptions import ClientError
+        if IfNoneMatch == "*" and Key in self.objects:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        import io
+        from botocore.exceptions import ClientError
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+
+def test_download_prefix_parallel(tmp: Path) -> None:
+    prefix = "magiclamp-aB12cdEF34/"
+    objects = {f"{prefix}g{i}.fa": f">c{i}\nACGT{i}\n".encode() for i in range(20)}
+    objects[f"{prefix}form-data.txt"] = b"Genies: FeGenie\n"
+    s3 = FakeS3(objects, corrupt_once={f"{prefix}g3.fa"})
+    seen: list[str] = []
+    paths = download_prefix(s3, "in", prefix, tmp / "dl", workers=4, on_file=lambda p: seen.append(p.name))
+
+    assert [p.name for p in paths] == sorted(Path(k).name for k in objects)
+    assert sorted(seen) == sorted(p.name for p in paths)
+    # The corrupted first attempt was caught by the ETag check and retried.
+    assert s3.downloads.count(f"{prefix}g3.fa") == 2
+    assert (tmp / "dl" / "g3.fa").read_bytes() == objects[f"{prefix}g3.fa"]
+    print("PASS download_prefix (parallel, MD5-verified with retry, per-file callback)")
+
+
+def test_publish_artifacts(tmp: Path) -> None:
+    import time
+    s3 = FakeS3({})
+    artifacts = [
+        Artifact(f"magiclamp-x/{i}.csv", write(tmp / f"pub{i}.csv", "a,b\n"), "text/csv")
+        for i in range(6)
+    ]
+    started = time.monotonic()
+    publish_artifacts(s3, "results", artifacts, workers=6)
+    assert time.monotonic() - started < 0.6, "uploads ran serially"
+    assert sorted(s3.objects) == sorted(a.key for a in artifacts)
+
+    # One failure still lets every other upload finish, then raises.
+    s3 = FakeS3({})
+    s3.fail_uploads = {"magiclamp-x/2.csv"}
+    try:
+        publish_artifacts(s3, "results", artifacts, workers=2)
+    except RuntimeError as e:
+        assert "2.csv" in str(e)
+    else:
+        raise AssertionError("publish_artifacts swallowed an upload failure")
+    assert len(s3.objects) == 5
+    print("PASS publish_artifacts (concurrent, failure raised after all uploads)")
+
+
+def test_results_archive(tmp: Path) -> None:
+    import io
+    import tarfile
+    job = tmp / "magiclamp-arch"
+    for rel in ["input/g.fa", "bins/g.fa", "FeGenie/FeGenie-summary.csv",
+                "FeGenie/intermediate/bins/g.fa-HMM-results", "FeGenie/logs/hmmsearch.log",
+                "frontend_results/FeGenie-summary.csv", "run.log", "arch-results.tar.gz",
+                "FeGenie/old-results.tar.gz"]:
+        (job / rel).parent.mkdir(parents=True, exist_ok=True)
+        write(job / rel, "x" * 100)
+
+    def members(data: bytes, fmt: str) -> set[str]:
+        if fmt == "zst":
+            import zstandard
+            data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as tar:
+            return {m.name for m in tar.getmembers() if m.isfile()}
+
+    # Scratch names are only dropped at the top; a Genie's own bins/ and logs/ stay.
+    expected = {"magiclamp-arch/FeGenie/FeGenie-summary.csv",
+                "magiclamp-arch/FeGenie/intermediate/bins/g.fa-HMM-results",
+                "magiclamp-arch/FeGenie/logs/hmmsearch.log",
+                "magiclamp-arch/frontend_results/FeGenie-summary.csv",
+                "magiclamp-arch/run.log"}
+    for fmt in ("gz", "zst"):
+        out = tmp / f"archive.tar.{fmt}"
+        make_tarball(job, out, fmt, threads=2)
+        assert members(out.read_bytes(), fmt) == expected, fmt
+
+    s3 = FakeS3({})
+    sent = stream_tarball_to_s3(s3, "results", "k.tar.gz", job, "gz", threads=2)
+    assert members(s3.objects["k.tar.gz"], "gz") == expected and sent == len(s3.objects["k.tar.gz"])
+
+    # A producer failure must fail the upload, not publish a truncated archive.
+    try:
+        stream_tarball_to_s3(s3, "results", "bad.tar.gz", tmp / "missing", "gz")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("streamed upload of a failed archive succeeded")
+    assert "bad.tar.gz" not in s3.objects
+    print("PASS results archive (excludes inputs/scratch, gz + zst, streamed upload)")
+
+
+def test_zero_copy_staging(tmp: Path) -> None:
+    import os
+    inputs = tmp / "stage-input"; inputs.mkdir()
+    a = write(inputs / "My Genome.fasta", ">c\nACGT\n")
+    b = write(inputs / "other.fna", ">c\nGGCC\n")
+    bin_ext, normalized = prepare_bins([a, b], tmp / "stage-bins")
+    assert bin_ext == "fa"
+    assert [p.name for p in normalized] == ["My_Genome.fa", "other.fa"]
+    # Same inode: the normalized name is a hard link, not a second copy.
+    assert os.stat(normalized[0]).st_ino == os.stat(a).st_ino
+    assert link_or_copy(b, tmp / "stage-extra.fa") == "link"
+    # Re-staging over a stale hard link must never truncate the source.
+    from magiclamp_worker import reflink
+    reflink(b, tmp / "stage-extra.fa")
+    assert b.read_text() == ">c\nGGCC\n" and [p.name for p in tmp.glob(".stage-extra*")] == []
+    print("PASS zero-copy staging (normalized bins are hard links)")
+
+
+def test_genbank_full_scan(tmp: Path) -> None:
+    import gzip
+
+    plasmid = """\
+LOCUS       pPLAS 50 bp DNA circular BCT 21-MAY-2026
+FEATURES             Location/Qualifiers
+     source          1..50
+ORIGIN
+        1 atgc
+//
+"""
+    chromosome = """\
+LOCUS       CHROM 1000 bp DNA linear BCT 21-MAY-2026
+FEATURES             Location/Qualifiers
+     gene            1..600
+                     /gene="omcS"
+     CDS             1..600
+                     /product="outer membrane cytochrome OmcS"
+ORIGIN
+""" + "        1 atgcatgcat atgcatgcat\n" * 60000 + "//\n"
+
+    # Annotated record after an unannotated plasmid (and beyond the old
+    # 1 MiB sniff window) still passes; the plasmid is reported.
+    multi = write(tmp / "multi.gbk", plasmid + chromosome)
+    assert multi.stat().st_size > 1024 * 1024
+    report = scan_genbank(multi)
+    assert report.ok, report.reason
+    assert [r.locus for r in report.records] == ["pPLAS", "CHROM"]
+    assert report.summary()["unannotated_records"] == [
+        {"locus": "pPLAS", "reason": "missing CDS features"}
+    ]
+
+    # Truncation or binary junk past the first MiB is caught.
+    truncated = write(tmp / "trunc.gbk", chromosome[:-3])
+    ok, reason = is_annotated_genbank(truncated)
+    assert not ok and "truncated" in reason, reason
+    junk = write(tmp / "junk.gbk", chromosome[:-3] + "\x00\x00//\n")
+    ok, reason = is_annotated_genbank(junk)
+    assert not ok and "binary" in reason, reason
+
+    # gzip input is read transparently; a cut-off gzip stream fails cleanly.
+    gz = tmp / "multi.gbk.gz"
+    gz.write_bytes(gzip.compress((plasmid + chromosome).encode()))
+    assert scan_genbank(gz).ok
+    cut = tmp / "cut.gbk.gz"
+    cut.write_bytes(gz.read_bytes()[:-12])
+    ok, reason = is_annotated_genbank(cut)
+    assert not ok and "could not read" in reason, reason
+    print("PASS whole-file GenBank scan (multi-record, late corruption, gzip)")
+
+
+def test_fasta_scan(tmp: Path) -> None:
+    import gzip
+
+    genome = ">c1 long\n" + "ACGTACGTGG\n" * 1000 + ">c2\nacgtNNNNNN\nAT\n>c3\r\nGGCC\r\n"
+    good = write(tmp / "good.fa", genome)
+    report = scan_fasta(good)
+    assert report.ok, report.reason
+    assert report.stats() == {
+        "contigs": 3, "total_length": 10016, "n50": 10000,
+        "gc": round((6000 + 2 + 4) / (10016 - 6), 4), "n_fraction": round(6 / 10016, 4),
+    }, report.stats()
+    assert report.warnings == []
+
+    gz = tmp / "good.fa.gz"
+    gz.write_bytes(gzip.compress(genome.encode()))
+    assert scan_fasta(gz).stats() == report.stats()
+
+    rejects = {
+        "empty.fa": ("", "empty"),
+        "reads.fa": ("@read1\nACGT\n+\nIIII\n", "FASTQ"),
+        "protein.fa": (">p1\nMKLVEEFPQLLKRAEIDW\n", "protein"),
+        "headless.fa": ("ACGT\n", "header"),
+    }
+    for name, (text, expect) in rejects.items():
+        bad = scan_fasta(write(tmp / name, text))
+        assert not bad.ok and expect in bad.reason, (name, bad.reason)
+
+    # Chunk boundaries change nothing: headers split across chunks, long
+    # single-line contigs scanned piecewise, a '>' in the middle of a line.
+    import magiclamp_worker
+    tricky = write(tmp / "tricky.fa", "\n>first contig\n" + "ACGTTGCA" * 40 + "\n>c2 x\nGGC>C\n>c3")
+    expected = (scan_fasta(tricky).stats(), scan_fasta(tricky).warnings, scan_fasta(tricky).reason)
+    chunk_bytes = magiclamp_worker.FASTA_CHUNK_BYTES
+    try:
+        for size in range(1, 40):
+            magiclamp_worker.FASTA_CHUNK_BYTES = size
+            got = scan_fasta(tricky)
+            assert (got.stats(), got.warnings, got.reason) == expected, size
+            assert scan_fasta(good).stats() == report.stats(), size
+    finally:
+        magiclamp_worker.FASTA_CHUNK_BYTES = chunk_bytes
+    assert expected[0]["contigs"] == 3 and expected[0]["total_length"] == 320 + 5
+
+    tiny = scan_fasta(write(tmp / "tiny.fa", ">t\nNNNNACGT\n>e\n"))
+    assert tiny.ok and len(tiny.warnings) == 2, tiny.warnings
+
+    bins = tmp / "fasta-bins"
+    try:
+        prepare_bins([good, tmp / "protein.fa"], bins)
+    except RuntimeError as e:
+        assert "protein.fa" in str(e) and "good.fa" not in str(e), e
+    else:
+        raise AssertionError("protein FASTA was accepted")
+    print("PASS FASTA scan (stats, gzip, empty/FASTQ/protein rejected)")
+
+
+def test_compressed_inputs(tmp: Path) -> None:
+    import gzip, io, tarfile, zipfile
+
+    fasta = b">c1\n" + b"ACGT" * 50 + b"\n"
+    upload = tmp / "packed-input"; upload.mkdir()
+    (upload / "form-data.txt").write_text("Genie: FeGenie\n")
+    (upload / "plain.fna").write_bytes(fasta)
+    (upload / "one.fna.gz").write_bytes(gzip.compress(fasta))
+    # bgzip output is a series of gzip members.
+    (upload / "two.fa.bgz").write_bytes(gzip.compress(fasta[:20]) + gzip.compress(fasta[20:]))
+    with zipfile.ZipFile(upload / "bundle.zip", "w") as zf:
+        zf.writestr("genomes/three.fasta", fasta)
+        zf.writestr("genomes/four.fna.gz", gzip.compress(fasta))
+        zf.writestr("__MACOSX/genomes/._three.fasta", b"junk")
+        zf.writestr("README.txt", b"notes")
+    with tarfile.open(upload / "more.tar.gz", "w:gz") as tf:
+        for name, data in (("../../escape.fa", fasta), ("x/custom.hmm", b"HMMER3/f\n")):
+            info = tarfile.TarInfo(name); info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+
+    unpacked_dir = tmp / "unpacked"
+    unpacked: list[Path] = []
+    for src in sorted(upload.iterdir()):
+        if src.name.endswith((".gz", ".bgz", ".zip")):
+            unpacked += unpack_input(src, unpacked_dir)
+    assert all(unpacked_dir in p.parents for p in unpacked), unpacked
+    assert all(p.read_bytes() == fasta for p in unpacked if p.suffix != ".hmm")
+
+    genomes, hmms = split_inputs(upload, unpacked)
+    assert sorted(p.name for p in genomes) == [
+        "escape.fa", "four.fna", "one.fna", "plain.fna", "three.fasta", "two.fa",
+    ], genomes
+    assert [p.name for p in hmms] == ["custom.hmm"]
+
+    broken = upload / "broken.fa.gz"
+    broken.write_bytes(gzip.compress(fasta)[:-10])
+    try:
+        unpack_input(broken, unpacked_dir)
+    except RuntimeError as e:
+        assert "broken.fa.gz" in str(e)
+    else:
+        raise AssertionError("truncated gzip was unpacked")
+    print("PASS compressed inputs (.gz/.bgz, zip and tar.gz bundles, flattened paths)")
+
+
+def test_genome_sharding(tmp: Path) -> None:
+    import csv, threading
+    import magiclamp_worker
+    from magiclamp_worker import run_genie
+
+    fake = write(tmp / "FakeShards.py", FAKE_MAGICLAMP_HITS + "import time\ntime.sleep(0.3)\n")
+    calls = fake.with_suffix(".calls")
+    args = SimpleNamespace(
+        magiclamp_bin=str(fake), command_prefix=sys.executable, threads=2,
+        report_script="", report_mode="pool", report_plotlyjs="shared", combined_report="auto", shard_size=2, shard_workers=2, shard_timeout=60, summary_sidecar="", columnar_export=False, heatmap_aggregations="",
+        upload_workers=4, download_workers=2, work_root=str(tmp / "helper"), clean=False,
+        shard_queue="s3://shards/queue/",
+    )
+
+    def job(name: str, shard_queue=None):
+        root = tmp / name
+        bins = root / "bins"; bins.mkdir(parents=True)
+        final = root / "frontend_results"; final.mkdir()
+        for i in range(5):
+            write(bins / f"g{i}.fa", f">c\n{'ACGT' * (i + 1)}\n")
+        outcome = run_genie(args, root, name, "FeGenie", bins, "fa", None, final,
+                            root / "logs" / "FeGenie.log", shard_queue=shard_queue)
+        assert outcome.status["state"] == "complete", outcome.status
+        with outcome.summary.open() as fh:
+            assert [r["genome/assembly"] for r in csv.DictReader(fh)] == [f"g{i}.fa" for i in range(5)]
+        with outcome.heatmap.open() as fh:
+            assert next(csv.reader(fh)) == ["X", *(f"g{i}.fa" for i in range(5))]
+        return root
+
+    # Local: five genomes in shards of two -> three MagicLamp calls, merged.
+    root = job("shard-local")
+    assert sorted(calls.read_text().splitlines()) == ["g0.fa,g1.fa", "g2.fa,g3.fa", "g4.fa"]
+    assert "shard 3/3" in (root / "logs" / "FeGenie.log").read_text()
+    calls.unlink()
+
+    # Queue: a helper claims a shard while the job's own worker runs the rest.
+    s3 = FakeS3({})
+    queue = ShardQueue(s3, "s3://shards/queue/")
+    magiclamp_worker.SHARD_POLL_SECONDS = 0.1
+    helped: list[str] = []
+    stop = threading.Event()
+
+    def helper() -> None:
+        while not stop.is_set() and not helped:
+            for task in queue.open_tasks():
+                if queue.claim(task):
+                    helped.append(run_shard_task(args, s3, task))
+                    break
+            stop.wait(0.05)
+
+    thread = threading.Thread(target=helper)
+    thread.start()
+    try:
+        job("shard-queue", queue)
+    finally:
+        stop.set()
+        thread.join()
+    assert helped == ["complete"], helped
+    assert len(calls.read_text().splitlines()) == 3
+    assert queue.open_tasks() == []
+    assert not queue.claim("queue/shard-queue/FeGenie/shard-0000/")
+
+    # A helper that fails outside MagicLamp (here: no task.json) still publishes
+    # done.json, and so does the scheduler for a task whose process died.
+    from concurrent.futures import Future
+    from magiclamp_worker import reap_shard_tasks
+    ghost = "queue/ghost/FeGenie/shard-0000/"
+    assert queue.claim(ghost)
+    try:
+        run_shard_task(args, s3, ghost)
+        raise AssertionError("missing task.json not raised")
+    except RuntimeError:
+        pass
+    assert queue.state(ghost)["state"] == "failed"
+    crashed = "queue/ghost/FeGenie/shard-0001/"
+    assert queue.claim(crashed)
+    dead: Future = Future()
+    dead.set_exception(OSError("worker process died"))
+    lock = write(tmp / "shard.lock", "")
+    reap_shard_tasks({crashed: (dead, lock)}, {dead}, queue)
+    assert queue.state(crashed)["state"] == "failed" and "died" in queue.state(crashed)["error"]
+
+    # A helper that claims a shard and stalls: the job runs it itself once
+    # --shard-timeout has passed since its own local shards finished.
+    calls.unlink()
+    args.shard_timeout = 0.5
+    stalled: list[str] = []
+    stop.clear()
+
+    def staller() -> None:
+        while not stop.is_set() and not stalled:
+            for task in queue.open_tasks():
+                if "shard-stall" in task and queue.claim(task):
+                    stalled.append(task)
+                    break
+            stop.wait(0.05)
+
+    thread = threading.Thread(target=staller)
+    thread.start()
+    try:
+        job("shard-stall", queue)
+    finally:
+        stop.set()
+        thread.join()
+    assert len(stalled) == 1 and queue.state(stalled[0]) is None
+    assert len(calls.read_text().splitlines()) == 3
+    print("PASS genome sharding (local shards merged, S3 queue shared with a helper, failures and timeouts)")
+
+
+def test_merge_csvs(tmp: Path) -> None:
+    import csv
+    from magiclamp_merge import merge_heatmap_csvs, merge_summary_csvs
+
+    d = tmp / "merge"; d.mkdir()
+    s1 = write(d / "s1.csv", "category,genome,HMM\niron,g1,h1\ncategory,genome,HMM\n\niron,g1,h2\n")
+    s2 = write(d / "s2.csv", "HMM,genome,bitscore\nh3,g2,99\n")
+    dest = d / "summary.csv"
+    write(dest, "category,genome,HMM\nsulfur,g0,h0\n")
+    # dest is also a source: its rows are kept, then the others appended.
+    assert merge_summary_csvs([dest, s1, s2], dest) == 4
+    with dest.open() as fh:
+        rows = list(csv.reader(fh))
+    assert rows == [
+        ["category", "genome", "HMM", "bitscore"],
+        ["sulfur", "g0", "h0", ""],
+        ["iron", "g1", "h1", ""],
+        ["iron", "g1", "h2", ""],
+        ["", "g2", "h3", "99"],
+    ], rows
+
+    # Five heatmap pieces pasted two at a time: zero-fill, first-seen order,
+    # a repeated genome column keeps its first source's values.
+    pieces = [
+        write(d / "h0.csv", "X,g0\niron,1\n"),
+        write(d / "h1.csv", "X,g1,g2\nsulfur,2,3\niron,,4\n"),
+        write(d / "h2.csv", "X,g0\niron,9\n"),
+        write(d / "h3.csv", "X,g3\nnitrogen,5\n"),
+        write(d / "h4.csv", "X,g4\n"),
+    ]
+    hm = d / "heatmap.csv"
+    assert merge_heatmap_csvs(pieces, hm, fanout=2)
+    with hm.open() as fh:
+        rows = list(csv.reader(fh))
+    assert rows == [
+        ["X", "g0", "g1", "g2", "g3", "g4"],
+        ["iron", "1", "0", "4", "0", "0"],
+        ["sulfur", "0", "2", "3", "0", "0"],
+        ["nitrogen", "0", "0", "0", "5", "0"],
+    ], rows
+    assert sorted(p.name for p in d.iterdir() if p.name.startswith(".")) == []
+    assert not merge_heatmap_csvs([pieces[4]], d / "empty.csv")
+    print("PASS merge CSVs (summary header union, heatmap outer join in fanout passes)")
+
+
+def test_normalize_csv_streaming(tmp: Path) -> None:
+    import csv, gzip, tracemalloc
+
+    src = write(tmp / "raw-summary.csv", (
+        "category,genome,HMM,ORF_sequence\n"
+        "iron,g1,h1,MKV\n"
+        "category,genome,HMM,ORF_sequence\n"
+        "\n"
+        "#,#,#,#\n"
+        "##########\n"
+        "iron,g2,h2,MKL\n"
+    ))
+    dest = tmp / "norm" / "FeGenie-summary.csv"
+    assert normalize_csv(src, dest, sidecars=["gz"]) == 2
+    expected = [["category", "genome", "HMM", "ORF_sequence"], ["iron", "g1", "h1", "MKV"], ["iron", "g2", "h2", "MKL"]]
+    with dest.open() as fh:
+        assert list(csv.reader(fh)) == expected
+    with gzip.open(tmp / "norm" / "FeGenie-summary.csv.gz", "rt") as fh:
+        assert list(csv.reader(fh)) == expected
+
+    # In place, with a Parquet side-car (when pyarrow is installed).
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        pq = None
+    if pq is not None:
+        assert normalize_csv(dest, dest, sidecars=["parquet"]) == 2
+        table = pq.read_table(tmp / "norm" / "FeGenie-summary.parquet")
+        assert table.column("genome").to_pylist() == ["g1", "g2"]
+    assert sorted(p.name for p in (tmp / "norm").iterdir()) == [
+        "FeGenie-summary.csv", "FeGenie-summary.csv.gz",
+        *(["FeGenie-summary.parquet"] if pq else []),
+    ]
+
+    # Memory stays flat: a ~20 MB summary normalizes in well under 2 MB.
+    big = tmp / "big-summary.csv"
+    with big.open("w") as fh:
+        fh.write("category,genome,HMM,ORF_sequence\n")
+        for i in range(100_000):
+            fh.write(f"iron,g{i % 50},h{i},{'MKVL' * 50}\n")
+            if i % 1000 == 0:
+                fh.write("####\n")
+    tracemalloc.start()
+    rows = normalize_csv(big, tmp / "big-out.csv", sidecars=["gz"])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert rows == 100_000
+    assert peak < 2 * 1024 * 1024, f"peak {peak / 1e6:.1f} MB"
+    print(f"PASS streaming normalize_csv (junk rows dropped, side-cars, peak {peak / 1e6:.2f} MB)")
+
+
+def test_columnar_export(tmp: Path) -> None:
+    import json
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("SKIP columnar export (pyarrow not installed)")
+        return
+    import magiclamp_worker
+    from magiclamp_worker import write_summary_extras
+
+    final = tmp / "columnar"; final.mkdir()
+    summary = write(final / "FeGenie-summary.csv", "genome/assembly,HMM,ORF_sequence\n" + "".join(
+        f"g{i // 4}.fa,h{i},{'MKV' * 20}\n" for i in range(40)
+    ))
+    heatmap = write(final / "FeGenie.heatmap.csv", "X,g0.fa,g1.fa\niron,2,0\nsulfur,0,1.5\n")
+    args = SimpleNamespace(summary_sidecar="gz", columnar_export=True, heatmap_aggregations="")
+    old_batch = magiclamp_worker.PARQUET_BATCH_ROWS
+    magiclamp_worker.PARQUET_BATCH_ROWS = 16
+    try:
+        with (tmp / "columnar.log").open("w") as log:
+            extras = write_summary_extras(args, "FeGenie", summary, heatmap, final, log)
+    finally:
+        magiclamp_worker.PARQUET_BATCH_ROWS = old_batch
+    assert [p.name for p in extras] == [
+        "FeGenie-summary.csv.gz", "FeGenie-summary.parquet",
+        "FeGenie.heatmap.parquet", "FeGenie-results.index.json",
+    ], extras
+
+    # Zero cells are dropped from the long-format heatmap.
+    rows = pq.read_table(final / "FeGenie.heatmap.parquet").to_pylist()
+    assert rows == [
+        {"category": "iron", "genome": "g0.fa", "value": 2.0},
+        {"category": "sulfur", "genome": "g1.fa", "value": 1.5},
+    ], rows
+
+    # The index's byte ranges are enough to read one column of one row group.
+    index = json.loads((final / "FeGenie-results.index.json").read_text())
+    entry = index["files"]["summary"]
+    assert entry["rows"] == 40 and [g["rows"] for g in entry["row_groups"]] == [16, 16, 8]
+    second = entry["row_groups"][1]
+    assert second["first_row"] == 16 and second["genome_range"] == ["g4.fa", "g7.fa"]
+    chunk = second["columns"]["ORF_sequence"]
+    data = (final / entry["name"]).read_bytes()
+    assert 0 < chunk["offset"] and chunk["offset"] + chunk["length"] <= len(data)
+    assert index["files"]["heatmap"]["columns"] == ["category", "genome", "value"]
+    print("PASS columnar export (Parquet summary + long heatmap, range index)")
+
+def test_heatmap_aggregation(tmp: Path) -> None:
+    import csv
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("SKIP heatmap aggregation (pandas not installed)")
+        return
+    from magiclamp_worker import (
+        _synthesize_heatmap_rowwise, aggregate_summary, synthesize_heatmap_from_summary,
+        write_summary_extras,
+    )
+
+    final = tmp / "aggregate"; final.mkdir()
+    summary = write(final / "FeGenie-summary.csv", (
+        "category,genome/assembly,HMM,bitscore\n"
+        "iron_reduction,g1.fa,h1,50.5\n"
+        "iron_reduction,g1.fa,h1,70\n"
+        "iron_reduction,g1.fa,h2,20\n"
+        "####,####,####,####\n"
+        "category,genome/assembly,HMM,bitscore\n"
+        "iron_storage,g2.fa,h3,\n"
+        "iron_reduction,g2.fa,h4,10\n"
+    ))
+
+    # Same matrix as the row-by-row fallback, including first-seen order.
+    fast, slow = final / "fast.csv", final / "slow.csv"
+    assert synthesize_heatmap_from_summary(summary, fast)
+    assert _synthesize_heatmap_rowwise(summary, slow)
+    read = lambda p: list(csv.reader(p.open()))
+    assert read(fast) == read(slow) == [
+        ["X", "g1.fa", "g2.fa"], ["iron_reduction", "3", "1"], ["iron_storage", "0", "1"],
+    ], read(fast)
+
+    # Ragged rows count the same with or without pandas: short ones are padded
+    # with blanks (and dropped only if category or genome is missing), long
+    # ones keep their leading fields.
+    ragged = write(final / "Ragged-summary.csv", (
+        "category,genome/assembly,HMM,bitscore\n"
+        "iron_reduction,g1.fa,h1,50.5\n"
+        "iron_reduction,g1.fa\n"
+        "iron_storage\n"
+        "iron_storage,g2.fa,h3,12,extra,fields\n"
+        "iron_reduction,g2.fa,h4,10\n"
+    ))
+    fast, slow = final / "ragged-fast.csv", final / "ragged-slow.csv"
+    assert synthesize_heatmap_from_summary(ragged, fast)
+    assert _synthesize_heatmap_rowwise(ragged, slow)
+    assert read(fast) == read(slow) == [
+        ["X", "g1.fa", "g2.fa"], ["iron_reduction", "2", "1"], ["iron_storage", "0", "1"],
+    ], read(fast)
+    assert aggregate_summary(ragged, ("distinct-hmms",))["distinct-hmms"].values.tolist() == [[1, 1], [0, 1]]
+
+    m = aggregate_summary(summary, ("distinct-hmms", "best-bitscore", "per-mbp"), {"g1": 2_000_000})
+    assert m["distinct-hmms"].loc["iron_reduction"].tolist() == [2, 1]
+    assert m["best-bitscore"].loc["iron_reduction"].tolist() == [70.0, 10.0]
+    assert m["best-bitscore"].isna().loc["iron_storage"].tolist() == [True, True]
+    assert m["per-mbp"].loc["iron_reduction", "g1.fa"] == 1.5
+    assert m["per-mbp"].isna().loc["iron_reduction", "g2.fa"]  # size unknown
+
+    # Published beside the heatmap as <genie>.heatmap.<aggregation>.csv.
+    args = SimpleNamespace(summary_sidecar="", columnar_export=False,
+                           heatmap_aggregations="best-bitscore,bogus,per-mbp")
+    with (tmp / "aggregate.log").open("w") as log:
+        extras = write_summary_extras(args, "FeGenie", summary, None, final, log, {"g1": 2_000_000})
+    assert [p.name for p in extras] == ["FeGenie.heatmap.best-bitscore.csv", "FeGenie.heatmap.per-mbp.csv"]
+    assert read(extras[0]) == [["X", "g1.fa", "g2.fa"], ["iron_reduction", "70", "10"], ["iron_storage", "", ""]]
+    assert read(extras[1])[1] == ["iron_reduction", "1.5", ""]
+    print("PASS heatmap aggregation (vectorized counts, distinct HMMs, best bitscore, per Mbp)")
+
+
+FAKE_REPORT = """\
+import os, sys
+if __name__ != "__main__" and os.environ.get("FAKE_REPORT_BROKEN"):
+    import magiclamp_missing_dependency  # noqa: F401
+with open(os.environ["FAKE_REPORT_IMPORTS"], "a") as fh:
+    fh.write(f"{os.getpid()}\\n")
+
+class Frame:
+    empty = False
+
+def load_heatmap_csv(path):
+    return Frame()
+
+def build_html_report(df, source_name):
+    return f"<html>pool {os.getpid()} {source_name}</html>"
+
+if __name__ == "__main__":
+    with open(sys.argv[sys.argv.index("-o") + 1], "w") as fh:
+        fh.write("<html>subprocess</html>")
+"""
+
+
+def test_report_pool(tmp: Path) -> None:
+    import os
+    from magiclamp_worker import maybe_generate_report, report_pool
+
+    root = tmp / "reports"; root.mkdir()
+    script = write(root / "fake_report.py", FAKE_REPORT)
+    imports = root / "imports.txt"
+    heatmap = write(root / "FeGenie.heatmap.csv", "X,g1\niron,1\n")
+    os.environ["FAKE_REPORT_IMPORTS"] = str(imports)
+    args = SimpleNamespace(report_script=str(script), report_mode="pool", report_plotlyjs="shared",
+                           threads=1, command_prefix="")
+
+    def render(name: str, renderers) -> str:
+        dest = root / f"{name}.html"
+        with (root / "report.log").open("a") as log:
+            maybe_generate_report(args, root, dest, "slug", "FeGenie", heatmap, heatmap, log, renderers)
+        return dest.read_text()
+
+    # Rendered outside this process by one worker that imported the script once.
+    with report_pool(args, 3) as renderers:
+        pages = [render(f"pool-{i}", renderers) for i in range(3)]
+    pids = {page.split()[1] for page in pages}
+    assert len(pids) == 1 and str(os.getpid()) not in pids, pages
+    assert pages[0].endswith("FeGenie.heatmap.csv</html>")
+    assert imports.read_text().split() == list(pids), imports.read_text()
+
+    # A script that cannot be imported here falls back to the subprocess...
+    os.environ["FAKE_REPORT_BROKEN"] = "1"
+    try:
+        with report_pool(args, 1) as renderers:
+            assert render("broken", renderers) == "<html>subprocess</html>"
+    finally:
+        del os.environ["FAKE_REPORT_BROKEN"]
+    # ...which --report-mode subprocess uses from the start.
+    args.report_mode = "subprocess"
+    assert report_pool(args, 3) is None
+    assert render("subprocess", None) == "<html>subprocess</html>"
+    print("PASS report pool (imported once, out of process, subprocess fallback)")
+
+
+def test_shared_plotly_bundle(tmp: Path) -> None:
+    try:
+        import plotly  # noqa: F401
+        import scipy  # noqa: F401
+    except ImportError:
+        print("SKIP shared plotly bundle (report dependencies not installed)")
+        return
+    from magiclamp_worker import PLOTLY_BUNDLE_GLOB, render_report, report_scripts
+
+    final = tmp / "bundle"; final.mkdir()
+    script = report_scripts(SimpleNamespace(report_script=""))[0]
+    heatmap = write(final / "FeGenie.heatmap.csv", "X,g1,g2,g3\niron,1,0,2.5\nsulfur,0,3,1\n")
+    for genie in ("FeGenie", "LithoGenie"):
+        render_report(script, heatmap, final / f"{genie}-report.html", "shared")
+    render_report(script, heatmap, final / "inline-report.html", "inline")
+
+    bundles = list(final.glob(PLOTLY_BUNDLE_GLOB))
+    assert len(bundles) == 1, bundles
+    tag = f'src="{bundles[0].name}"'
+    for genie in ("FeGenie", "LithoGenie"):
+        page = (final / f"{genie}-report.html").read_text()
+        assert tag in page and len(page) < bundles[0].stat().st_size // 4
+        assert "Genome: g1" not in page  # hover text comes from templates, not per-cell strings
+    inline = (final / "inline-report.html").read_text()
+    assert tag not in inline and len(inline) > bundles[0].stat().st_size
+
+    # An older script run as a subprocess never gets the option it would reject.
+    from magiclamp_worker import maybe_generate_report
+    old = write(tmp / "old_report.py", (
+        "import argparse\n"
+        "p = argparse.ArgumentParser(); p.add_argument('heatmap'); p.add_argument('-o')\n"
+        "a = p.parse_args(); open(a.o, 'w').write('<html>old</html>')\n"
+    ))
+    args = SimpleNamespace(report_script=str(old), report_mode="subprocess", report_plotlyjs="shared",
+                           command_prefix="")
+    with (tmp / "old-report.log").open("w") as log:
+        maybe_generate_report(args, final, final / "old-report.html", "slug", "FeGenie",
+                              heatmap, heatmap, log)
+    assert (final / "old-report.html").read_text() == "<html>old</html>"
+    print(f"PASS shared plotly bundle (one {bundles[0].name} for every report, older scripts inline)")
+
+
+def test_combined_report(tmp: Path) -> None:
+    try:
+        import magiclamp_report as report
+    except ImportError:
+        print("SKIP combined report (report dependencies not installed)")
+        return
+    from magiclamp_worker import COMBINED_REPORT, generate_combined_report, report_pool
+
+    final = tmp / "combined"; final.mkdir()
+    fe = write(final / "FeGenie.heatmap.csv", "X,g1,g2,g3\niron_a,1,0,2\niron_b,0,3,1\n")
+    li = write(final / "LithoGenie.heatmap.csv", "X,g3,g4,g1\nsulfur,2,1,0\nnitrogen,0,4,4\n")
+
+    # Genomes missing from one Genie are zero-filled onto one shared axis...
+    frames = report.align_genomes({"FeGenie": report.load_heatmap_csv(fe), "LithoGenie": report.load_heatmap_csv(li)})
+    assert list(frames["LithoGenie"].columns) == ["g1", "g2", "g3", "g4"]
+    assert frames["FeGenie"]["g4"].tolist() == [0, 0]
+    # ...and clustered once, so every Genie's heatmap shows the same genome order.
+    shared = report.shared_genome_clustering(frames)
+    orders = [list(report.build_clustered_heatmap(df, column_clustering=shared).data[-1].x) for df in frames.values()]
+    assert orders[0] == orders[1] and sorted(orders[0]) == ["g1", "g2", "g3", "g4"], orders
+
+    args = SimpleNamespace(report_script="", report_mode="pool", report_plotlyjs="shared",
+                           threads=1, command_prefix="")
+    dest = final / COMBINED_REPORT
+    with report_pool(args, 1) as renderers:
+        assert generate_combined_report(args, [("FeGenie", fe), ("LithoGenie", li)], dest,
+                                        final / "combined.log", renderers)
+    page = dest.read_text()
+    for tab in ("all", "FeGenie", "LithoGenie"):
+        assert f'data-tab="{tab}"' in page and f'id="{tab}"' in page, tab
+    assert page.count(" src=") == 1 and "FeGenie: iron_a" in page
+    print("PASS combined report (shared genome axis + clustering, one bundle, tabs)")
+
+
+def test_large_matrix_report(tmp: Path) -> None:
+    try:
+        import numpy as np
+        import pandas as pd
+        import magiclamp_report as report
+    except ImportError:
+        print("SKIP large-matrix report (report dependencies not installed)")
+        return
+
+    rng = np.random.default_rng(7)
+    def matrix(rows: int, cols: int) -> "pd.DataFrame":
+        df = pd.DataFrame(rng.poisson(0.5, (rows, cols)).astype(float),
+                          index=[f"cat{i}" for i in range(rows)],
+                          columns=[f"g{j}" for j in range(cols)])
+        df.index.name = "Category"
+        return df
+
+    # Each dendrogram is one trace however many merges it has.
+    small = matrix(6, 8)
+    fig = report.build_clustered_heatmap(small)
+    assert [t.type for t in fig.data] == ["scatter", "scatter", "heatmap"], fig.data
+    assert fig.data[-1].texttemplate == "%{z:g}"
+    # Past max_leaves, genomes are placed by a clustered sample: every genome
+    # is still drawn once, but the partial dendrogram is dropped.
+    wide = matrix(5, 40)
+    fig = report.build_clustered_heatmap(wide, max_leaves=10)
+    assert [t.type for t in fig.data] == ["scatter", "heatmap"]
+    assert sorted(fig.data[-1].x) == sorted(wide.columns)
+    assert report.build_clustered_heatmap(wide, optimal_ordering=True).data[-1].x is not None
+    # Too many cells for annotations or the table (the dot plot only draws hits).
+    big = matrix(60, 700)
+    page = report.build_html_report(big, "big.heatmap.csv", plotlyjs="plotly.min.js")
+    assert "too large for the table" in page and 'id="dotplot"' in page
+    assert '"texttemplate"' not in page and page.count(" src=") == 1
+    # Past HEATMAP_MAX_CELLS adjacent genomes are averaged into fewer columns.
+    limit = report.HEATMAP_MAX_CELLS
+    report.HEATMAP_MAX_CELLS = 60 * 100
+    try:
+        heat = report.build_clustered_heatmap(big).data[-1]
+    finally:
+        report.HEATMAP_MAX_CELLS = limit
+    assert len(heat.x) == 100 and heat.x[0].endswith("(7)"), heat.x[0]
+    assert abs(np.nanmean(heat.z) - big.values.mean()) < 1e-3
+    print("PASS large-matrix report (single-trace dendrograms, sampled clustering, size caps)")
+
+
+def test_sparse_report(tmp: Path) -> None:
+    try:
+        import numpy as np
+        import pandas as pd
+        import magiclamp_report as report
+    except ImportError:
+        print("SKIP sparse report (report dependencies not installed)")
+        return
+
+    # A mostly-zero heatmap big enough to load sparse, with one text cell.
+    counts = np.random.default_rng(11).poisson(0.05, (100, 1000))
+    cells = pd.DataFrame(counts, index=[f"cat{i}" for i in range(100)],
+                         columns=[f"g{j}" for j in range(1000)]).astype(object)
+    cells.iloc[3, 4] = "n/a"
+    csv_path = tmp / "Sparse.heatmap.csv"
+    cells.to_csv(csv_path)
+
+    sparse = report.load_heatmap_csv(csv_path)
+    dense = report.load_heatmap_csv(csv_path, sparse=False)
+    assert isinstance(sparse, report.SparseHeatmap) and isinstance(dense, pd.DataFrame)
+    hits = np.count_nonzero(counts) - (counts[3, 4] != 0)
+    assert sparse.values.nnz == hits + 1  # the NaN is stored, zeros are not
+    assert np.isnan(dense.iloc[3, 4]) and np.array_equal(
+        np.nan_to_num(sparse.values.toarray()), np.nan_to_num(dense.to_numpy()))
+    pd.testing.assert_frame_equal(dense, sparse.to_frame())
+
+    # A dense result never goes through CSR, whether forced or auto-chosen.
+    busy = tmp / "Dense.heatmap.csv"
+    pd.DataFrame(counts + 1, index=cells.index, columns=cells.columns).to_csv(busy)
+    csr_matrix = report.sp.csr_matrix
+    report.sp.csr_matrix = None
+    try:
+        assert isinstance(report.load_heatmap_csv(busy), pd.DataFrame)
+        assert report.load_heatmap_csv(csv_path, sparse=False).equals(dense)
+    finally:
+        report.sp.csr_matrix = csr_matrix
+    forced = report.load_heatmap_csv(busy, sparse=True)
+    assert forced.values.nnz == counts.size
+    pd.testing.assert_frame_equal(forced.to_frame(), report.load_heatmap_csv(busy))
+
+    for mode in ("none", "log1p", "presence_absence", "column_fraction", "column_fraction_row_zscore"):
+        got = report._cluster_transform(sparse.values, mode)
+        assert report.sp.issparse(got) == (mode != "column_fraction_row_zscore"), mode
+        got = got.toarray() if report.sp.issparse(got) else got
+        assert np.allclose(got, report._cluster_transform(dense.to_numpy(), mode)), mode
+
+    # Only hits become markers; zeros are the grid.
+    assert len(report.build_dotplot(sparse).data[0].x) == hits
+    # Same figures either way, with exact and with sampled clustering.
+    for max_leaves in (report.CLUSTER_MAX_LEAVES, 50):
+        a = report.build_clustered_heatmap(sparse, max_leaves=max_leaves).data[-1]
+        b = report.build_clustered_heatmap(dense, max_leaves=max_leaves).data[-1]
+        assert list(a.x) == list(b.x) and list(a.y) == list(b.y), max_leaves
+    assert report.build_html_report(sparse, "s.csv") == report.build_html_report(dense, "s.csv")
+    print("PASS sparse report (sparse load, transforms, hit-only dot plot, same page as dense)")
+
+
+def test_bench_report(tmp: Path) -> None:
+    import json
+    try:
+        import bench_report
+        import magiclamp_report  # noqa: F401
+    except ImportError:
+        print("SKIP report benchmark (report dependencies not installed)")
+        return
+
+    out = tmp / "bench.json"
+    argv = ["--sizes", "12x40", "--densities", "0.1", "--no-isolate",
+            "--work-dir", str(tmp / "bench"), "-o", str(out)]
+    assert bench_report.main(argv) == 0
+    results = json.loads(out.read_text())
+    (case,) = results["cases"]
+    assert case["name"] == "12x40@0.1" and (case["rows"], case["cols"]) == (12, 40)
+    assert list(case["stages"]) == bench_report.STAGES
+    assert case["output_bytes"] > 0 and case["peak_rss_mb"] > 0 and case["dotplot_drawn"]
+    assert 0 < case["nnz"] < 12 * 40
+
+    # The guard: a run never regresses against itself...
+    assert bench_report.compare(results, results) == []
+    # ...but does against a faster, smaller baseline, beyond the noise floor.
+    baseline = json.loads(out.read_text())
+    base = baseline["cases"][0]
+    base["stages"] = {stage: seconds / 10 for stage, seconds in case["stages"].items()}
+    base["output_bytes"] = case["output_bytes"] // 2
+    problems = bench_report.compare(results, baseline, min_seconds=0.0)
+    assert any("output_bytes" in p for p in problems) and any(" report:" in p for p in problems), problems
+    quiet = bench_report.compare(results, baseline, min_seconds=60)
+    assert quiet == [p for p in problems if "output_bytes" in p], quiet
+    (tmp / "baseline.json").write_text(json.dumps(baseline))
+    assert bench_report.main(argv + ["--compare", str(tmp / "baseline.json")]) == 1
+    print("PASS report benchmark (per-stage JSON, regression guard)")
+
+
+def test_bench_worker(tmp: Path) -> None:
+    import json
+    import bench_worker
+    from magiclamp_worker import get_json, list_job_prefixes, s3_key_exists, verify_download
+
+    # LocalS3 answers like S3 where the worker cares: 404s, delimiters, MD5 ETags.
+    s3 = bench_worker.LocalS3(tmp / "local-s3")
+    assert not s3_key_exists(s3, "b", "magiclamp-x1/status.json")
+    assert get_json(s3, "b", "magiclamp-x1/status.json") is None
+    s3.put_object(Bucket="b", Key="magiclamp-x1/status.json", Body=b'{"state": "running"}')
+    s3.seed("b", "magiclamp-y2/g.fa", b">c\nACGT\n")
+    assert get_json(s3, "b", "magiclamp-x1/status.json") == {"state": "running"}
+    assert list_job_prefixes(s3, "b") == ["magiclamp-x1/", "magiclamp-y2/"]
+    (obj,) = next(s3.get_paginator("list_objects_v2").paginate(Bucket="b", Prefix="magiclamp-y2/"))["Contents"]
+    s3.download_file("b", obj["Key"], str(tmp / "g.fa"))
+    assert verify_download(tmp / "g.fa", obj) is None
+    assert s3.stats["download_file"] == {"requests": 1, "bytes": 8}
+
+    out = tmp / "bench-worker.json"
+    argv = ["--sizes", "1", "3", "--genome-kb", "5", "--contig-kb", "2", "--delay", "0",
+            "--work-dir", str(tmp / "bench-worker"), "-o", str(out)]
+    assert bench_worker.main(argv) == 0
+    results = json.loads(out.read_text())
+    assert [c["genomes"] for c in results["cases"]] == [1, 3]
+    for case in results["cases"]:
+        assert case["state"] == "complete" and case["magiclamp_calls"] == 1
+        assert list(case["phases"]) == bench_worker.PHASES
+        assert abs(sum(case["phases"].values()) - case["total_seconds"]) < 0.01, case
+        assert case["s3"]["download_file"]["requests"] == case["genomes"] + 1
+        assert case["uploaded_bytes"] > 0 and case["input_bytes"] > 5000 * case["genomes"]
+    results_dir = tmp / "bench-worker" / "s3" / bench_worker.RESULTS_BUCKET / "magiclamp-bench3g5k0s"
+    status = json.loads((results_dir / "status.json").read_text())
+    assert status["state"] == "complete" and status["per_genie"][0]["summary_rows"] > 0
+    with (results_dir / "FeGenie.heatmap.csv").open() as fh:
+        assert fh.readline().strip() == "X,genome_00001.fa,genome_00002.fa,genome_00003.fa"
+
+    # Worker options after `--`: a streamed archive has no archive phase of its own.
+    assert bench_worker.main(["--sizes", "3", *argv[3:], "--", "--stream-archive"]) == 0
+    streamed = json.loads(out.read_text())
+    (case,) = streamed["cases"]
+    assert streamed["settings"]["worker_args"] == ["--stream-archive"] and case["state"] == "complete"
+    assert case["phases"]["archive"] == 0 and case["s3"]["upload_fileobj"]["requests"] == 1
+    print("PASS worker benchmark (LocalS3, stub MagicLamp, phases add up to the total)")
+
+
+def test_job_metrics(tmp: Path) -> None:
+    import json
+    import bench_worker
+    from magiclamp_worker import JobMetrics, process_job, run_command
+
+    # wait4 usage belongs to the child alone: its CPU time and its own peak RSS.
+    with (tmp / "usage.log").open("w") as log:
+        usage = run_command([sys.executable, "-c", "b = bytearray(200 << 20); sum(range(3_000_000))"], log)
+        try:
+            run_command([sys.executable, "-c", "raise SystemExit(3)"], log)
+            raise AssertionError("non-zero exit not raised")
+        except RuntimeError as e:
+            assert "exit code 3" in str(e)
+    assert usage.processes == 1 and usage.max_rss_mb >= 200, usage
+    assert 0 < usage.user_seconds + usage.system_seconds <= usage.wall_seconds + 0.5, usage
+
+    metrics = JobMetrics()
+    for _ in range(2):
+        with metrics.phase("download") as entry:
+            entry["files"] = 3
+    metrics.record_genie("FeGenie", seconds=1.5)
+    record = metrics.as_dict()
+    assert list(record["phases"]) == ["download"] and set(record["phases"]["download"]) == {"files", "seconds"}
+    assert record["genies"] == {"FeGenie": {"seconds": 1.5}} and record["total_seconds"] >= 0
+
+    # End to end: status.json, metrics.json and the --metrics-log line agree.
+    work = tmp / "metrics-job"
+    s3 = bench_worker.LocalS3(work / "s3")
+    stub = bench_worker.write_stub_magiclamp(work / "MagicLamp.py", delay=0.2)
+    log_path = work / "metrics.jsonl"
+    args = bench_worker.worker_args(work, stub, ["--metrics-log", str(log_path), "--continue-on-error"])
+    prefix = bench_worker.job_prefix(2, 5, 0)
+    bench_worker.seed_job(s3, prefix, 2, ["FeGenie", "LithoGenie"], genome_kb=5)
+    # The validation pool is already forked before any download thread starts.
+    import multiprocessing
+    import magiclamp_worker
+    download_prefix, forked = magiclamp_worker.download_prefix, []
+
+    def counting_download(*a, **kw):
+        forked.append(len(multiprocessing.active_children()))
+        return download_prefix(*a, **kw)
+    magiclamp_worker.download_prefix = counting_download
+    try:
+        assert process_job(args, s3, prefix) == "complete"
+    finally:
+        magiclamp_worker.download_prefix = download_prefix
+    assert forked[0] >= args.threads, forked
+
+    results = work / "s3" / bench_worker.RESULTS_BUCKET / prefix
+    status = json.loads((results / "status.json").read_text())
+    published = json.loads((results / "metrics.json").read_text())
+    logged = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert published["state"] == "complete" and logged == [published]
+    assert published["phases"] == status["metrics"]["phases"]
+    phases = status["metrics"]["phases"]
+    assert set(phases) == {"download", "validation", "staging", "genies", "archive", "upload"}, phases
+    assert phases["download"]["files"] == 3 and phases["download"]["bytes"] > 2 * 5000
+    assert phases["validation"]["genomes"] == 2 and phases["staging"]["genomes"] == 2
+    assert phases["archive"]["bytes"] > 0 and phases["upload"]["files"] >= 5
+    for genie in ("FeGenie", "LithoGenie"):
+        entry = status["metrics"]["genies"][genie]
+        assert entry["state"] == "complete" and entry["seconds"] >= 0.2
+        assert entry["magiclamp"]["processes"] == 1 and entry["magiclamp"]["max_rss_mb"] > 0
+        assert entry["magiclamp"]["wall_seconds"] >= 0.2
+    assert set(status["metrics"]["reports"]) == {"FeGenie", "LithoGenie", "combined"}
+
+    # A streamed tarball still shows up: as the archive phase and in the upload.
+    streamed_args = bench_worker.worker_args(work, stub, ["--stream-archive"])
+    assert process_job(streamed_args, s3, prefix) == "complete"
+    phases = json.loads((results / "status.json").read_text())["metrics"]["phases"]
+    tarball = next(results.glob("*-results.tar.gz")).stat().st_size
+    assert phases["archive"]["streamed"] and phases["archive"]["bytes"] == tarball
+    assert phases["upload"]["streamed_archive"] and phases["upload"]["bytes"] > tarball
+
+    # A failed job (Custom without .hmm uploads) still reports how far it got.
+    bad = bench_worker.job_prefix(1, 5, 1)
+    bench_worker.seed_job(s3, bad, 1, ["Custom"], genome_kb=5, seed=1)
+    assert process_job(args, s3, bad) == "failed"
+    status = json.loads((work / "s3" / bench_worker.RESULTS_BUCKET / bad / "status.json").read_text())
+    assert status["state"] == "failed" and status["metrics"]["phases"]["download"]["files"] == 2
+    assert "staging" in status["metrics"]["phases"] and "upload" not in status["metrics"]["phases"]
+    assert [line["state"] for line in map(json.loads, log_path.read_text().splitlines())] == ["complete", "failed"]
+
+    # Metrics that cannot be published must not hide the failure or its error.
+    def broken_metrics(*a, **kw):
+        raise RuntimeError("metrics bucket unavailable")
+    publish_metrics, magiclamp_worker.publish_metrics = magiclamp_worker.publish_metrics, broken_metrics
+    try:
+        assert process_job(args, s3, bad) == "failed"
+    finally:
+        magiclamp_worker.publish_metrics = publish_metrics
+    again = json.loads((work / "s3" / bench_worker.RESULTS_BUCKET / bad / "status.json").read_text())
+    assert again["state"] == "failed" and again["error"] == status["error"]
+    print("PASS job metrics (wait4 rusage per Genie, status.json + metrics.json + metrics log)")
+
+
 def main() -> int:
     import tempfile
     with tempfile.TemporaryDirectory() as td:
@@ -200,6 +1594,31 @@ def main() -> int:
         test_dispatch_named_and_omni()
         test_genbank_annotation_check(tmp)
         test_build_command_shape(tmp)
+        test_job_locks_and_share(tmp)
+        test_run_genies_parallel(tmp)
+        test_orf_cache(tmp)
+        test_result_cache(tmp)
+        test_queue_intake(tmp)
+        test_download_prefix_parallel(tmp)
+        test_publish_artifacts(tmp)
+        test_results_archive(tmp)
+        test_zero_copy_staging(tmp)
+        test_genbank_full_scan(tmp)
+        test_fasta_scan(tmp)
+        test_compressed_inputs(tmp)
+        test_genome_sharding(tmp)
+        test_merge_csvs(tmp)
+        test_normalize_csv_streaming(tmp)
+        test_columnar_export(tmp)
+        test_heatmap_aggregation(tmp)
+        test_report_pool(tmp)
+        test_shared_plotly_bundle(tmp)
+        test_combined_report(tmp)
+        test_large_matrix_report(tmp)
+        test_sparse_report(tmp)
+        test_bench_report(tmp)
+        test_bench_worker(tmp)
+        test_job_metrics(tmp)
     print("\nAll backend unit tests passed.")
     return 0
 